@@ -21,6 +21,36 @@ def create_app(config_name='default'):
     migrate.init_app(app, db)
     login.init_app(app)
 
+    # Buffer tulis heartbeat video (flush berkala + saat shutdown)
+    from app.services.progress_buffer import progress_buffer
+    progress_buffer.init_app(app)
+
+    # Cache aplikasi (backend dipilih lewat CACHE_TYPE)
+    from app.extensions.cache import cache
+    cache.init_app(app)
+
+    # Sweeper trial kedaluwarsa (thread periodik jika TRIAL_SWEEPER_ENABLED)
+    from app.services.trial_sweeper import trial_sweeper
+    trial_sweeper.init_app(app)
+
+    # Pub/sub push notifikasi (in-process atau fan-out Redis)
+    from app.extensions.pubsub import pubsub
+    pubsub.init_app(app)
+    from app.services.notification_service import NotificationService
+    NotificationService.init_app(app)
+
+    # Registry kemampuan ffmpeg (probe sekali per proses)
+    from app.services.ffmpeg_capabilities import ffmpeg_capabilities
+    ffmpeg_capabilities.init_app(app)
+
+    # Runner antrian video (process pool, dimulai saat request pertama jika diaktifkan)
+    from app.services.media_jobs import media_job_runner
+    media_job_runner.init_app(app)
+
+    # Hitung query per request dan peringatkan pola N+1
+    from app.extensions.query_profiler import query_profiler
+    query_profiler.init_app(app)
+
     # Setup user_loader untuk login manager
     from app.models.user import User
     
@@ -41,6 +71,14 @@ def create_app(config_name='default'):
     app.register_blueprint(api_bp, url_prefix='/api')
     app.register_blueprint(admin_bp, url_prefix='/admin')
 
+    # Keputusan akses kursus untuk template: course_access(course_id, lesson_id=None)
+    from app.services.access_service import AccessService
+    app.jinja_env.globals['course_access'] = AccessService.resolve_current
+
+    # Registrasi CLI commands (flask progress-summary ...)
+    from app.commands import register_commands
+    register_commands(app)
+
     return app
 
 # Import models di bagian bawah untuk menghindari circular import
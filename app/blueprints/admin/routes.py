@@ -1,11 +1,14 @@
 import os
-from flask import render_template, redirect, url_for, flash, request, current_app
+from flask import render_template, redirect, url_for, flash, request, current_app, Response, stream_with_context
 from flask_login import current_user, login_required
 from werkzeug.utils import secure_filename
 from app.blueprints.admin import bp
 from app.utils.decorators import teacher_required, admin_required
 from app.forms.admin_forms import CourseForm, TopicForm, LessonForm, QuizQuestionForm
 from app.services.course_service import CourseService
+from app.services.quiz_service import QuizService
+from app.services.quiz_transfer_service import QuizTransferService, QuizImportError
+from app.services.media_jobs import MediaJobService
 from app.utils.file_handler import FileHandler
 from app import db
 from app.models.quiz import QuizQuestion, QuizOption
@@ -26,7 +29,9 @@ def lesson_quiz_manage(lesson_id):
         return redirect(url_for('admin.course_detail', course_id=lesson.topic.course_id))
         
     questions = lesson.quiz_questions.all()
-    return render_template('admin/lessons/quiz_manage.html', lesson=lesson, questions=questions)
+    item_stats = QuizService.get_item_statistics(lesson.id)
+    return render_template('admin/lessons/quiz_manage.html', lesson=lesson, questions=questions,
+                         item_stats=item_stats)
 
 @bp.route('/lessons/<int:lesson_id>/quiz/questions/create', methods=['GET', 'POST'])
 @login_required
@@ -57,6 +62,7 @@ def question_create(lesson_id):
             db.session.add(option)
             
         db.session.commit()
+        QuizService.invalidate_answer_key(lesson.id)
         flash('Pertanyaan berhasil ditambahkan!', 'success')
         return redirect(url_for('admin.lesson_quiz_manage', lesson_id=lesson.id))
         
@@ -74,9 +80,99 @@ def question_delete(question_id):
     lesson_id = question.lesson_id
     db.session.delete(question)
     db.session.commit()
+    QuizService.invalidate_answer_key(lesson_id)
     flash('Pertanyaan berhasil dihapus!', 'success')
     return redirect(url_for('admin.lesson_quiz_manage', lesson_id=lesson_id))
 
+@bp.route('/lessons/<int:lesson_id>/quiz/settings', methods=['POST'])
+@login_required
+def quiz_settings(lesson_id):
+    """Atur bank soal: jumlah soal acak per attempt dan acak urutan option"""
+    lesson = CourseService.get_lesson_by_id(lesson_id)
+    if not lesson or lesson.content_type != 'quiz':
+        flash('Quiz tidak ditemukan', 'danger')
+        return redirect(url_for('admin.courses_list'))
+
+    course = lesson.topic.course
+    if current_user.role != 'admin' and course.instructor_id != current_user.id:
+        flash('Akses ditolak', 'danger')
+        return redirect(url_for('admin.courses_list'))
+
+    pool_size = request.form.get('quiz_pool_size', type=int)
+    if pool_size is not None and pool_size < 1:
+        flash('Jumlah soal per attempt minimal 1', 'danger')
+        return redirect(url_for('admin.lesson_quiz_manage', lesson_id=lesson.id))
+
+    try:
+        lesson.quiz_pool_size = pool_size
+        lesson.quiz_shuffle_options = bool(request.form.get('quiz_shuffle_options'))
+        db.session.commit()
+        flash('Pengaturan quiz berhasil disimpan!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error: {str(e)}', 'danger')
+    return redirect(url_for('admin.lesson_quiz_manage', lesson_id=lesson.id))
+
+@bp.route('/lessons/<int:lesson_id>/quiz/import', methods=['POST'])
+@login_required
+def quiz_import(lesson_id):
+    """Import soal quiz dari file CSV/JSON (semua atau tidak sama sekali)"""
+    lesson = CourseService.get_lesson_by_id(lesson_id)
+    if not lesson or lesson.content_type != 'quiz':
+        flash('Quiz tidak ditemukan', 'danger')
+        return redirect(url_for('admin.courses_list'))
+
+    course = lesson.topic.course
+    if current_user.role != 'admin' and course.instructor_id != current_user.id:
+        flash('Akses ditolak', 'danger')
+        return redirect(url_for('admin.courses_list'))
+
+    file = request.files.get('file')
+    if not file or not file.filename:
+        flash('Pilih file CSV atau JSON', 'danger')
+        return redirect(url_for('admin.lesson_quiz_manage', lesson_id=lesson.id))
+
+    fmt = file.filename.rsplit('.', 1)[-1].lower()
+    try:
+        count = QuizTransferService.import_questions(lesson.id, file.stream, fmt)
+    except QuizImportError as e:
+        for error in e.errors[:10]:
+            flash(error, 'danger')
+        if len(e.errors) > 10:
+            flash(f'... dan {len(e.errors) - 10} kesalahan lainnya', 'danger')
+        return redirect(url_for('admin.lesson_quiz_manage', lesson_id=lesson.id))
+    except Exception as e:
+        flash(f'Error: {str(e)}', 'danger')
+        return redirect(url_for('admin.lesson_quiz_manage', lesson_id=lesson.id))
+
+    flash(f'{count} pertanyaan berhasil diimport!', 'success')
+    return redirect(url_for('admin.lesson_quiz_manage', lesson_id=lesson.id))
+
+@bp.route('/lessons/<int:lesson_id>/quiz/export.<fmt>', methods=['GET'])
+@login_required
+def quiz_export(lesson_id, fmt):
+    """Export soal quiz sebagai CSV/JSON (di-stream per batch)"""
+    lesson = CourseService.get_lesson_by_id(lesson_id)
+    if not lesson or lesson.content_type != 'quiz' or fmt not in ('csv', 'json'):
+        flash('Quiz tidak ditemukan', 'danger')
+        return redirect(url_for('admin.courses_list'))
+
+    course = lesson.topic.course
+    if current_user.role != 'admin' and course.instructor_id != current_user.id:
+        flash('Akses ditolak', 'danger')
+        return redirect(url_for('admin.courses_list'))
+
+    if fmt == 'csv':
+        body, mimetype = QuizTransferService.export_csv(lesson.id), 'text/csv'
+    else:
+        body, mimetype = QuizTransferService.export_json(lesson.id), 'application/json'
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=quiz_{lesson.id}.{fmt}'}
+    )
+
 # ============ DASHBOARD ============
 
 @bp.route('/dashboard')
@@ -267,12 +363,12 @@ def topic_edit(topic_id):
     
     form = TopicForm()
     if form.validate_on_submit():
-        topic.title = form.title.data
-        topic.order = form.order.data
-        db.session.commit()
+        updated, message = CourseService.update_topic(topic_id, title=form.title.data, order=form.order.data)
         
-        flash('Topik berhasil diupdate!', 'success')
-        return redirect(url_for('admin.course_detail', course_id=course.id))
+        if updated:
+            flash('Topik berhasil diupdate!', 'success')
+            return redirect(url_for('admin.course_detail', course_id=course.id))
+        flash(message, 'danger')
     elif request.method == 'GET':
         form.title.data = topic.title
         form.order.data = topic.order
@@ -295,13 +391,12 @@ def topic_delete(topic_id):
         flash('Akses ditolak', 'danger')
         return redirect(url_for('admin.courses_list'))
     
-    try:
-        db.session.delete(topic)
-        db.session.commit()
+    success, message = CourseService.delete_topic(topic_id)
+    
+    if success:
         flash('Topik berhasil dihapus!', 'success')
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error: {str(e)}', 'danger')
+    else:
+        flash(message, 'danger')
     
     return redirect(url_for('admin.course_detail', course_id=course.id))
 
@@ -356,16 +451,9 @@ def lesson_create(topic_id):
             )
             
             if lesson:
-                # 2. Trigger background processing
-                import threading
-                from app.services.media_compression_service import MediaCompressionService
-                
-                app = current_app._get_current_object()
-                thread = threading.Thread(
-                    target=MediaCompressionService.process_video_background,
-                    args=(app, lesson.id, original_path, compressed_folder, hls_folder, current_user.id)
-                )
-                thread.start()
+                # 2. Masukkan ke antrian media_job (diproses worker dengan konkurensi terbatas)
+                MediaJobService.enqueue(lesson.id, current_user.id, original_path, compressed_folder, hls_folder)
+                db.session.commit()
                 
                 flash('Pelajaran dibuat! Video sedang diproses di background.', 'info')
                 return redirect(url_for('admin.course_detail', course_id=course.id))
@@ -454,16 +542,9 @@ def lesson_edit(lesson_id):
             lesson.compression_metadata = None
             db.session.commit()
             
-            # Trigger background processing
-            import threading
-            from app.services.media_compression_service import MediaCompressionService
-            
-            app = current_app._get_current_object()
-            thread = threading.Thread(
-                target=MediaCompressionService.process_video_background,
-                args=(app, lesson.id, original_path, compressed_folder, hls_folder, current_user.id)
-            )
-            thread.start()
+            # Masukkan ke antrian media_job; job lama lesson ini dibatalkan
+            MediaJobService.enqueue(lesson.id, current_user.id, original_path, compressed_folder, hls_folder)
+            db.session.commit()
             
             flash('Video baru berhasil diunggah! Data lama telah diganti dan video sedang diproses.', 'info')
         elif form.content_url.data:
@@ -475,6 +556,7 @@ def lesson_edit(lesson_id):
                 lesson.compression_status = 'completed'
         
         db.session.commit()
+        CourseService.invalidate_course_outline(course.id)
         
         # Handle image upload jika ada
         if form.image_file.data:
@@ -523,13 +605,12 @@ def lesson_delete(lesson_id):
         flash('Akses ditolak', 'danger')
         return redirect(url_for('admin.courses_list'))
     
-    try:
-        db.session.delete(lesson)
-        db.session.commit()
+    success, message = CourseService.delete_lesson(lesson_id)
+    
+    if success:
         flash('Pembelajaran berhasil dihapus!', 'success')
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error: {str(e)}', 'danger')
+    else:
+        flash(message, 'danger')
     
     return redirect(url_for('admin.course_detail', course_id=course.id))
 
@@ -568,3 +649,32 @@ def user_delete(user_id):
         flash(message, 'danger')
     
     return redirect(url_for('admin.users_list'))
+
+# ============ MEDIA STATUS (ADMIN ONLY) ============
+
+@bp.route('/media/status')
+@admin_required
+def media_status():
+    """Kemampuan ffmpeg yang terdeteksi dan kondisi antrian video (admin only)"""
+    from app.services.ffmpeg_capabilities import ffmpeg_capabilities, H264_ENCODERS, VP9_ENCODERS, AAC_ENCODERS
+    from app.services.media_jobs import media_job_runner
+
+    snapshot = ffmpeg_capabilities.get()
+    encoders = [(name, name in snapshot.encoders) for name in H264_ENCODERS + VP9_ENCODERS + AAC_ENCODERS]
+    muxers = [(name, name in snapshot.muxers) for name in ('mp4', 'hls', 'webm')]
+    return render_template('admin/media_status.html',
+                         capabilities=ffmpeg_capabilities.to_dict(),
+                         encoders=encoders,
+                         muxers=muxers,
+                         job_stats=MediaJobService.stats(),
+                         runner_stats=media_job_runner.stats())
+
+@bp.route('/media/status/refresh', methods=['POST'])
+@admin_required
+def media_status_refresh():
+    """Probe ulang ffmpeg/ffprobe di proses ini"""
+    from app.services.ffmpeg_capabilities import ffmpeg_capabilities
+
+    ffmpeg_capabilities.refresh()
+    flash('Kemampuan ffmpeg diperbarui', 'success')
+    return redirect(url_for('admin.media_status'))
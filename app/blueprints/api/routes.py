@@ -1,34 +1,152 @@
-from flask import jsonify, request
+import json
+import queue
+import time
+from flask import jsonify, request, current_app, Response, stream_with_context
 from flask_login import current_user, login_required
 from app.blueprints.api import bp
+from app.extensions.pubsub import pubsub, RESYNC
 from app.models.notification import Notification
+from app.services.notification_service import NotificationService
+from app.models.lesson import Lesson
+from app.services.progress import ProgressService
 from app import db
 
 @bp.route('/notifications')
 @login_required
 def get_notifications():
-    """Get unread notifications for current user"""
-    notifications = Notification.query.filter_by(
-        user_id=current_user.id, 
-        is_read=False
-    ).order_by(Notification.created_at.desc()).all()
+    """
+    Notifikasi belum dibaca, terbaru dulu, per halaman.
+    ?since_id=X hanya yang lebih baru dari X; ?before_id=X halaman berikutnya; ?limit=N (maks 100)
+    """
+    notifications, next_before_id = NotificationService.get_notifications(
+        current_user.id,
+        since_id=request.args.get('since_id', type=int),
+        before_id=request.args.get('before_id', type=int),
+        limit=request.args.get('limit', type=int)
+    )
     
-    return jsonify([{
-        'id': n.id,
-        'message': n.message,
-        'type': n.type,
-        'link': n.link,
-        'created_at': n.created_at.isoformat()
-    } for n in notifications])
+    return jsonify({
+        'notifications': [NotificationService.to_dict(n) for n in notifications],
+        'next_before_id': next_before_id
+    })
+
+@bp.route('/notifications/unread-count')
+@login_required
+def unread_count():
+    """Jumlah notifikasi belum dibaca (di-cache, diinvalidasi saat insert/baca)"""
+    return jsonify({'unread_count': NotificationService.get_unread_count(current_user.id)})
+
+@bp.route('/notifications/mark-read', methods=['POST'])
+@login_required
+def mark_read_batch():
+    """Tandai dibaca sekaligus: {"ids": [1, 2, 3]} atau {"before_id": 10} (semua id < 10)"""
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    before_id = data.get('before_id')
+    try:
+        ids = [int(i) for i in ids] if ids is not None else None
+        before_id = int(before_id) if before_id is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'ids/before_id harus berupa angka'}), 400
+    if ids is None and before_id is None:
+        return jsonify({'error': 'ids atau before_id wajib diisi'}), 400
+    if ids is not None and len(ids) > NotificationService.MAX_PAGE_SIZE * 10:
+        return jsonify({'error': 'Terlalu banyak ids'}), 400
+
+    updated = NotificationService.mark_read(current_user.id, ids=ids, before_id=before_id)
+    return jsonify({
+        'success': True,
+        'updated': updated,
+        'unread_count': NotificationService.get_unread_count(current_user.id)
+    })
+
+@bp.route('/notifications/stream')
+@login_required
+def notification_stream():
+    """
+    Server-Sent Events: notifikasi baru di-push saat dibuat.
+    Reconnect dengan header Last-Event-ID hanya mengambil delta (id > Last-Event-ID).
+    """
+    user_id = current_user.id
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0)
+    except ValueError:
+        last_id = 0
+    timeout = current_app.config.get('NOTIFICATION_STREAM_TIMEOUT', 300)
+    keepalive = current_app.config.get('NOTIFICATION_STREAM_KEEPALIVE', 15)
+
+    def event(payload):
+        return f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+
+    def generate():
+        nonlocal last_id
+        # Subscribe sebelum membaca DB agar notifikasi di antara keduanya tidak terlewat
+        with pubsub.subscribe(NotificationService.channel(user_id)) as subscription:
+            yield 'retry: 5000\n\n'
+            deadline = time.monotonic() + timeout
+            resync = True
+            while True:
+                if resync:
+                    while True:
+                        batch = NotificationService.get_unread_since(user_id, last_id)
+                        for notification in batch:
+                            last_id = notification.id
+                            yield event(NotificationService.to_dict(notification))
+                        if len(batch) < NotificationService.STREAM_BATCH_SIZE:
+                            break
+                    # Jangan tahan koneksi DB selama stream menunggu
+                    db.session.remove()
+                    resync = False
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Worker dilepas berkala; browser reconnect otomatis dengan Last-Event-ID
+                    return
+                try:
+                    message = subscription.get(timeout=min(keepalive, remaining))
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+
+                if message is RESYNC:
+                    resync = True
+                elif message['id'] > last_id:
+                    last_id = message['id']
+                    yield event(message)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 @bp.route('/notifications/<int:notif_id>/read', methods=['POST'])
 @login_required
 def mark_read(notif_id):
     """Mark a notification as read"""
-    notif = Notification.query.get_or_404(notif_id)
-    if notif.user_id != current_user.id:
+    user_id = db.session.query(Notification.user_id).filter_by(id=notif_id).scalar()
+    if user_id is None:
+        return jsonify({'error': 'Not found'}), 404
+    if user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
         
-    notif.is_read = True
-    db.session.commit()
+    NotificationService.mark_read(current_user.id, ids=[notif_id])
+    return jsonify({'success': True})
+
+@bp.route('/lessons/<int:lesson_id>/position', methods=['POST'])
+@login_required
+def update_video_position(lesson_id):
+    """Heartbeat posisi video dari player (ditampung di buffer progress)"""
+    data = request.get_json(silent=True) or {}
+    try:
+        timestamp = max(0, int(data.get('timestamp', 0)))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid timestamp'}), 400
+    
+    # Validasi lesson agar satu baris FK invalid tidak menggagalkan seluruh batch flush
+    if db.session.query(Lesson.id).filter_by(id=lesson_id).first() is None:
+        return jsonify({'error': 'Lesson not found'}), 404
+    
+    success, message = ProgressService.update_video_timestamp(current_user.id, lesson_id, timestamp)
+    if not success:
+        return jsonify({'success': False, 'message': message}), 503
     return jsonify({'success': True})
@@ -2,12 +2,34 @@ from flask import render_template, redirect, url_for, flash, request, jsonify
 from flask_login import current_user, login_required
 from app.blueprints.courses import bp
 from app.models.quiz import QuizQuestion, QuizOption, QuizAttempt
+from app.models.lesson import Lesson
 from app.services.course_service import CourseService
+from app.services.access_service import AccessService
+from app.utils.decorators import enrollment_required
 from app.services.progress import ProgressService
+from app.services.quiz_service import QuizService
 from app import db
 
 # ... (other imports) ...
 
+@bp.route('/lessons/<int:lesson_id>/quiz/start', methods=['POST'])
+@login_required
+def start_quiz(lesson_id):
+    """Mulai attempt quiz bank soal: soal diundi dan disimpan di QuizAttempt"""
+    lesson = CourseService.get_lesson_by_id(lesson_id)
+    if not lesson or lesson.content_type != 'quiz':
+        flash('Quiz tidak ditemukan', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    access = AccessService.resolve(current_user.id, lesson.topic.course_id, lesson.id)
+    if not access.has_access:
+        flash('Anda belum memiliki akses ke pelajaran ini', 'danger')
+        return redirect(url_for('courses.detail', course_id=lesson.topic.course_id))
+
+    if lesson.uses_question_pool:
+        QuizService.start_attempt(current_user.id, lesson)
+    return redirect(url_for('courses.view_lesson', lesson_id=lesson.id))
+
 @bp.route('/lessons/<int:lesson_id>/quiz/submit', methods=['POST'])
 @login_required
 def submit_quiz(lesson_id):
@@ -17,27 +39,33 @@ def submit_quiz(lesson_id):
         flash('Quiz tidak ditemukan', 'danger')
         return redirect(url_for('main.dashboard'))
         
-    questions = lesson.quiz_questions.all()
-    if not questions:
+    # Bank soal: yang dinilai hanya soal yang terpilih saat attempt dimulai
+    attempt = None
+    question_ids = None
+    if lesson.uses_question_pool:
+        attempt = QuizService.get_open_attempt(current_user.id, lesson.id)
+        if not attempt:
+            flash('Sesi quiz tidak ditemukan, silakan mulai ulang quiz', 'warning')
+            return redirect(url_for('courses.view_lesson', lesson_id=lesson.id))
+        question_ids = attempt.question_ids or []
+        
+    # Kunci jawaban dimuat sekali (cache) dan dinilai di memori
+    result = QuizService.grade_form(lesson.id, request.form, question_ids)
+    if not result.total_questions:
         flash('Quiz ini belum memiliki pertanyaan', 'warning')
         return redirect(url_for('courses.view_lesson', lesson_id=lesson.id))
         
-    total_questions = len(questions)
-    correct_answers = 0
-    
-    # Check answers
-    for question in questions:
-        selected_option_id = request.form.get(f'question_{question.id}')
-        if selected_option_id:
-            option = QuizOption.query.get(int(selected_option_id))
-            if option and option.is_correct:
-                correct_answers += 1
-                
-    score = (correct_answers / total_questions) * 100
+    score = result.score
     
     # Save attempt
-    attempt = QuizAttempt(user_id=current_user.id, lesson_id=lesson.id, score=score)
-    db.session.add(attempt)
+    if attempt is None:
+        attempt = QuizAttempt(user_id=current_user.id, lesson_id=lesson.id, score=score)
+        db.session.add(attempt)
+    else:
+        attempt.score = score
+        attempt.completed_at = datetime.utcnow()
+    db.session.flush()
+    QuizService.record_answers(attempt, result)
     
     # Mark lesson as complete if score >= 80
     if score >= 80:
@@ -83,8 +111,10 @@ def list():
     # Get enrollment status for authenticated users
     user_enrolled = {}
     if current_user.is_authenticated:
-        for course in courses:
-            user_enrolled[course.id] = CourseService.is_student_enrolled(current_user.id, course.id)
+        enrolled_ids = CourseService.get_enrolled_course_ids(
+            current_user.id, [course.id for course in courses]
+        )
+        user_enrolled = {course.id: course.id in enrolled_ids for course in courses}
     
     return render_template('courses/list.html', 
                          courses=courses, 
@@ -159,6 +189,7 @@ def unenroll(course_id):
 
 @bp.route('/<int:course_id>/my-progress')
 @login_required
+@enrollment_required
 def my_progress(course_id):
     """View user progress in a course"""
     course = CourseService.get_course_by_id(course_id)
@@ -167,12 +198,6 @@ def my_progress(course_id):
         flash('Kursus tidak ditemukan', 'danger')
         return redirect(url_for('courses.list'))
     
-    is_enrolled = CourseService.is_student_enrolled(current_user.id, course_id)
-    
-    if not is_enrolled:
-        flash('Anda belum mendaftar kursus ini', 'danger')
-        return redirect(url_for('courses.detail', course_id=course_id))
-    
     progress_data, _ = ProgressService.get_user_progress(current_user.id, course_id)
     
     return render_template('courses/progress.html', course=course, progress_data=progress_data)
@@ -191,35 +216,31 @@ def view_lesson(lesson_id):
     course = topic.course
     
     # Check access: enrolled OR trial active OR first lesson preview
-    is_enrolled = CourseService.is_student_enrolled(current_user.id, course.id)
-    is_trial_active = CourseService.is_trial_active(current_user.id, course.id)
-    
-    # Get all lessons in course to check if this is first lesson
-    all_lessons = []
-    for t in course.topics.order_by('order'):
-        for l in t.lessons.order_by('order'):
-            all_lessons.append(l)
+    access = AccessService.resolve(current_user.id, course.id, lesson_id)
+    is_enrolled = access.enrolled
+    is_trial_active = access.trial_active
+    is_first_lesson = access.is_preview_lesson
     
-    is_first_lesson = len(all_lessons) > 0 and all_lessons[0].id == lesson_id
+    # Index navigasi kursus (cache): posisi, prev/next lintas topic
+    navigation = CourseService.get_lesson_navigation(course.id, lesson_id)
     
     # Access control
-    if not (is_enrolled or is_trial_active or is_first_lesson):
+    if not access.has_access:
         flash('Anda belum memiliki akses ke pelajaran ini', 'danger')
         return redirect(url_for('courses.detail', course_id=course.id))
     
     # Get lesson progress
     progress, _ = ProgressService.get_lesson_progress(current_user.id, lesson_id)
     
-    # Get next and previous lessons
-    lessons_in_topic = CourseService.get_lessons_in_topic(topic.id)
-    current_index = next((i for i, l in enumerate(lessons_in_topic) if l.id == lesson_id), None)
-    
-    prev_lesson = lessons_in_topic[current_index - 1] if current_index and current_index > 0 else None
-    next_lesson = lessons_in_topic[current_index + 1] if current_index is not None and current_index < len(lessons_in_topic) - 1 else None
+    # Get next and previous lessons (tanpa query tambahan)
+    prev_lesson = navigation.prev if navigation else None
+    next_lesson = navigation.next if navigation else None
+    lesson_number = navigation.position + 1 if navigation else None
     
     # Prepare video sources for quality selector
+    # Lesson dengan HLS cukup diputar lewat master playlist (ABR); MP4 hanya untuk lesson lama
     video_sources = []
-    if lesson.content_type == 'video' and lesson.compressed_video_versions:
+    if lesson.content_type == 'video' and lesson.compressed_video_versions and not lesson.hls_path:
         # Build sources array from compressed versions
         versions_map = lesson.compressed_video_versions
         
@@ -241,19 +262,35 @@ def view_lesson(lesson_id):
                 })
     
     # Get trial expiry if user is in trial
-    trial_expiry = None
-    if is_trial_active:
-        trial_expiry = CourseService.get_trial_expiry(current_user.id, course.id)
+    trial_expiry = access.trial_expiry if is_trial_active else None
     
     # Calculate actual progress for course
     progress_data, _ = ProgressService.get_user_progress(current_user.id, course.id)
     
     # Quiz Data
     quiz_questions = []
+    quiz_attempt = None
+    quiz_needs_start = False
+    quiz_question_count = 0
     last_attempt = None
     if lesson.content_type == 'quiz':
-        quiz_questions = lesson.quiz_questions.all()
-        last_attempt = QuizAttempt.query.filter_by(user_id=current_user.id, lesson_id=lesson.id).order_by(QuizAttempt.completed_at.desc()).first()
+        if lesson.uses_question_pool and current_user.role == 'student':
+            # GET tidak membuat attempt (prefetch/crawler); soal diundi lewat POST start_quiz
+            quiz_attempt = QuizService.find_reusable_attempt(current_user.id, lesson)
+            if quiz_attempt is not None:
+                quiz_questions = QuizService.get_attempt_questions(quiz_attempt)
+            else:
+                quiz_needs_start = True
+            quiz_question_count = QuizService.attempt_size(lesson)
+        else:
+            # Tanpa bank soal, atau pratinjau admin/guru: semua soal tanpa attempt
+            quiz_questions = lesson.quiz_questions.all()
+            quiz_question_count = len(quiz_questions)
+        last_attempt = QuizAttempt.query.filter(
+            QuizAttempt.user_id == current_user.id,
+            QuizAttempt.lesson_id == lesson.id,
+            QuizAttempt.score.isnot(None)
+        ).order_by(QuizAttempt.completed_at.desc()).first()
 
     return render_template('courses/lesson.html', 
                          lesson=lesson, 
@@ -262,6 +299,7 @@ def view_lesson(lesson_id):
                          progress=progress, 
                          prev_lesson=prev_lesson, 
                          next_lesson=next_lesson,
+                         lesson_number=lesson_number,
                          video_sources=video_sources, 
                          is_trial_active=is_trial_active,
                          trial_expiry=trial_expiry, 
@@ -269,6 +307,9 @@ def view_lesson(lesson_id):
                          progress_data=progress_data,
                          is_enrolled=is_enrolled,
                          quiz_questions=quiz_questions,
+                         quiz_attempt=quiz_attempt,
+                         quiz_needs_start=quiz_needs_start,
+                         quiz_question_count=quiz_question_count,
                          last_attempt=last_attempt)
 
 @bp.route('/<int:course_id>/preview')
@@ -281,25 +322,33 @@ def course_preview(course_id):
         return redirect(url_for('courses.list'))
     
     # Get all lessons to show preview (first 2-3 lessons or 20-30% of course)
-    all_topics = course.topics.order_by('order').all()
-    
-    # Materialize topics with their lessons as lists for template usage
-    topics_with_lessons = []
-    all_lessons = []
-    for topic in all_topics:
-        lessons_list = topic.lessons.order_by('order').all()
-        topics_with_lessons.append({
-            'id': topic.id,
-            'title': topic.title,
-            'order': topic.order,
-            'lessons': lessons_list
-        })
-        for lesson in lessons_list:
-            all_lessons.append({'lesson': lesson, 'topic': topic})
+    outline = CourseService.get_course_outline(course_id)
+    topics_by_id = {topic.id: topic for topic in outline.topics}
+    
+    # Outline sudah berisi topic beserta lesson terurut untuk template
+    topics_with_lessons = [{
+        'id': topic.id,
+        'title': topic.title,
+        'order': topic.order,
+        'lessons': topic.lessons
+    } for topic in outline.topics]
     
     # Show first 3 lessons or 30% of course, whichever is greater
-    preview_count = max(3, int(len(all_lessons) * 0.3))
-    preview_lessons = all_lessons[:preview_count]
+    preview_count = max(3, int(outline.total_lessons * 0.3))
+    preview_outline = outline.lessons[:preview_count]
+    
+    # Konten lengkap hanya dimuat untuk lesson preview, dalam satu query
+    lessons_by_id = {}
+    if preview_outline:
+        lessons_by_id = {
+            lesson.id: lesson for lesson in Lesson.query.filter(
+                Lesson.id.in_([item.id for item in preview_outline])
+            ).all()
+        }
+    preview_lessons = [
+        {'lesson': lessons_by_id[item.id], 'topic': topics_by_id[item.topic_id]}
+        for item in preview_outline if item.id in lessons_by_id
+    ]
     
     # Get enrollment and trial status
     is_enrolled = False
@@ -307,14 +356,15 @@ def course_preview(course_id):
     trial_expiry = None
     
     if current_user.is_authenticated:
-        is_enrolled = CourseService.is_student_enrolled(current_user.id, course_id)
-        is_trial_active = CourseService.is_trial_active(current_user.id, course_id)
+        access = AccessService.resolve(current_user.id, course_id)
+        is_enrolled = access.enrolled
+        is_trial_active = access.trial_active
         if is_trial_active:
-            trial_expiry = CourseService.get_trial_expiry(current_user.id, course_id)
+            trial_expiry = access.trial_expiry
     
     # Calculate course stats
-    total_lessons = len(all_lessons)
-    total_topics = len(all_topics)
+    total_lessons = outline.total_lessons
+    total_topics = len(outline.topics)
     
     return render_template('courses/preview.html', 
                          course=course,
@@ -333,16 +383,12 @@ def course_preview_modal(course_id):
     if not course:
         return "<p class='p-4 text-center text-red-600'>Kursus tidak ditemukan</p>", 404
     
-    all_topics = course.topics.order_by('order').all()
-    topics_with_lessons = []
-    total_lessons = 0
-    for topic in all_topics:
-        lessons_list = topic.lessons.order_by('order').all()
-        topics_with_lessons.append({
-            'title': topic.title,
-            'lessons': lessons_list
-        })
-        total_lessons += len(lessons_list)
+    outline = CourseService.get_course_outline(course_id)
+    topics_with_lessons = [{
+        'title': topic.title,
+        'lessons': topic.lessons
+    } for topic in outline.topics]
+    total_lessons = outline.total_lessons
     
     is_enrolled = False
     if current_user.is_authenticated:
@@ -369,14 +415,10 @@ def start_trial(course_id):
     if success:
         flash(message, 'success')
         # Redirect to first lesson
-        first_lesson = None
-        for topic in course.topics.order_by('order'):
-            first_lesson = topic.lessons.order_by('order').first()
-            if first_lesson:
-                break
+        first_lesson_id = CourseService.get_course_outline(course_id).first_lesson_id
         
-        if first_lesson:
-            return redirect(url_for('courses.view_lesson', lesson_id=first_lesson.id))
+        if first_lesson_id:
+            return redirect(url_for('courses.view_lesson', lesson_id=first_lesson_id))
     else:
         flash(message, 'warning')
     
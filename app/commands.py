@@ -0,0 +1,261 @@
+import click
+from flask.cli import AppGroup
+
+progress_summary_cli = AppGroup('progress-summary', help='Kelola tabel course_progress_summary')
+
+
+@progress_summary_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None, help='Batasi ke satu user')
+@click.option('--course-id', type=int, default=None, help='Batasi ke satu kursus')
+def rebuild_progress_summary(user_id, course_id):
+    """Backfill/rebuild summary dari lesson_progress"""
+    from app import db
+    from app.models.course import Course
+    from app.services.progress_summary_service import ProgressSummaryService
+
+    if course_id is not None:
+        course_ids = [course_id]
+    else:
+        course_ids = [row[0] for row in db.session.query(Course.id).order_by(Course.id).all()]
+
+    # Diproses per kursus agar memori tetap kecil pada backfill besar
+    total_rows = 0
+    for cid in course_ids:
+        total_rows += ProgressSummaryService.rebuild(user_id=user_id, course_id=cid)
+
+    click.echo(f'{total_rows} baris summary ditulis untuk {len(course_ids)} kursus')
+
+
+@progress_summary_cli.command('check')
+@click.option('--user-id', type=int, default=None, help='Batasi ke satu user')
+@click.option('--course-id', type=int, default=None, help='Batasi ke satu kursus')
+@click.option('--fix', is_flag=True, help='Rebuild baris yang tidak konsisten')
+def check_progress_summary(user_id, course_id, fix):
+    """Cek konsistensi summary terhadap lesson_progress"""
+    from app.services.progress_summary_service import ProgressSummaryService
+
+    problems = ProgressSummaryService.check_consistency(user_id=user_id, course_id=course_id)
+
+    for problem in problems:
+        click.echo(
+            f"[{problem['problem']}] user={problem['user_id']} course={problem['course_id']} "
+            f"stored={problem['stored']} expected={problem['expected']}"
+        )
+
+    if not problems:
+        click.echo('Summary konsisten')
+        return
+
+    if fix:
+        for pair in sorted({(p['user_id'], p['course_id']) for p in problems}):
+            ProgressSummaryService.rebuild(user_id=pair[0], course_id=pair[1])
+        click.echo(f'{len(problems)} baris diperbaiki')
+    else:
+        raise SystemExit(1)
+
+
+trials_cli = AppGroup('trials', help='Kelola trial kursus')
+
+
+@trials_cli.command('sweep')
+def sweep_trials():
+    """Tandai trial kedaluwarsa sebagai expired (untuk cron)"""
+    from app.services.trial_sweeper import trial_sweeper
+
+    expired = trial_sweeper.sweep()
+    click.echo(f'{expired} trial ditandai expired')
+
+
+quiz_cli = AppGroup('quiz', help='Analitik quiz')
+
+
+@quiz_cli.command('item-analysis')
+@click.argument('lesson_id', type=int)
+@click.option('--chunk-size', type=int, default=None, help='Jumlah attempt per chunk')
+def quiz_item_analysis(lesson_id, chunk_size):
+    """Tampilkan difficulty, point-biserial, distraktor dan Cronbach alpha"""
+    from app.services.quiz_analytics import QuizAnalyticsService
+
+    report = QuizAnalyticsService.analyze_lesson(lesson_id, chunk_size=chunk_size)
+    alpha = report['cronbach_alpha']
+    click.echo(f"Lesson {lesson_id}: {report['attempts']} attempt, alpha={alpha if alpha is None else round(alpha, 3)}")
+
+    def fmt(value):
+        return '-' if value is None else f'{value:.3f}'
+
+    for item in report['items']:
+        distractors = ' '.join(str(option['count']) for option in item['options'])
+        click.echo(
+            f"  Q{item['question_id']}: n={item['attempts']} p={fmt(item['difficulty'])} "
+            f"r_pb={fmt(item['point_biserial'])} r_pb_rest={fmt(item['point_biserial_corrected'])} "
+            f"pilihan=[{distractors}] kosong={item['unanswered']}"
+        )
+
+
+@quiz_cli.command('bench-item-analysis')
+@click.option('--items', type=int, default=50, help='Jumlah soal')
+@click.option('--choices', type=int, default=4, help='Jumlah option per soal')
+@click.option('--start', type=int, default=25000, help='Jumlah attempt awal')
+@click.option('--steps', type=int, default=4, help='Berapa kali jumlah attempt digandakan')
+@click.option('--chunk-size', type=int, default=5000, help='Jumlah attempt per chunk')
+def bench_item_analysis(items, choices, start, steps, chunk_size):
+    """Benchmark engine item analysis pada data sintetis (tanpa database)"""
+    import time
+    import numpy as np
+    from app.services.quiz_analytics import ItemAnalysisAccumulator
+
+    rng = np.random.default_rng(42)
+    difficulty = rng.uniform(-1.5, 1.5, items)
+    chunk_ability = rng.normal(size=chunk_size)
+
+    # Satu chunk sintetis (model Rasch) dipakai ulang agar yang diukur hanya engine-nya
+    prob = 1 / (1 + np.exp(-(chunk_ability[:, None] - difficulty[None, :])))
+    correct = (rng.random((chunk_size, items)) < prob).astype(np.int8)
+    choices_matrix = np.where(correct == 1, 0, rng.integers(1, choices, (chunk_size, items))).astype(np.int16)
+
+    click.echo(f"{'attempts':>10} {'detik':>9} {'us/attempt':>11}")
+    attempts = start
+    for _ in range(steps):
+        accumulator = ItemAnalysisAccumulator(items, choices)
+        started = time.perf_counter()
+        remaining = attempts
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            accumulator.update(correct[:size], choices_matrix[:size])
+            remaining -= size
+        accumulator.result()
+        elapsed = time.perf_counter() - started
+        click.echo(f"{attempts:>10} {elapsed:>9.4f} {elapsed / attempts * 1e6:>11.3f}")
+        attempts *= 2
+
+
+media_jobs_cli = AppGroup('media-jobs', help='Antrian pemrosesan video')
+
+
+@media_jobs_cli.command('work')
+@click.option('--concurrency', type=int, default=None, help='Jumlah proses encoder')
+@click.option('--until-idle', is_flag=True, help='Berhenti setelah antrian kosong')
+def media_jobs_work(concurrency, until_idle):
+    """Jalankan worker antrian video di foreground"""
+    import time
+    from flask import current_app
+    from app.services.media_jobs import media_job_runner
+
+    if concurrency:
+        media_job_runner.concurrency = concurrency
+    click.echo(f'Worker {media_job_runner.worker_id} ({media_job_runner.concurrency} proses)')
+    try:
+        if until_idle:
+            media_job_runner.run_until_idle()
+        else:
+            while True:
+                media_job_runner.tick()
+                time.sleep(current_app.config.get('MEDIA_JOB_POLL_INTERVAL', 2))
+    finally:
+        media_job_runner.stop()
+    click.echo(str(media_job_runner.stats()))
+
+
+@media_jobs_cli.command('recover')
+def media_jobs_recover():
+    """Jadwalkan ulang job running yang heartbeat-nya berhenti"""
+    from app.services.media_jobs import MediaJobService, media_job_runner
+
+    recovered = MediaJobService.recover_stale(media_job_runner.stale_timeout, media_job_runner.backoff)
+    click.echo(f'{recovered} job dipulihkan')
+
+
+@media_jobs_cli.command('status')
+def media_jobs_status():
+    """Jumlah job per status"""
+    from app.services.media_jobs import MediaJobService
+
+    for status, count in sorted(MediaJobService.stats().items()):
+        click.echo(f'{status:>8}: {count}')
+
+
+media_cli = AppGroup('media', help='Tools encode video')
+
+
+@media_cli.command('bench-encode')
+@click.option('--duration', type=int, default=20, help='Durasi clip uji (detik)')
+@click.option('--size', default='1920x1080', help='Resolusi clip uji')
+@click.option('--input', 'input_path', type=click.Path(exists=True), default=None, help='Pakai video sendiri')
+@click.option('--outputs', type=click.Choice(['matched', 'production']), default='matched',
+              help='matched: single-pass menulis MP4 di resolusi yang sama dengan multi-pass; '
+                   'production: single-pass hanya MP4 720p seperti worker')
+def bench_encode(duration, size, input_path, outputs):
+    """
+    Bandingkan encode multi-pass (decode per output) dengan single-pass filter_complex split (1 decode).
+    Setiap baris mencantumkan output yang ditulis (MP4, remux, varian HLS) agar waktunya sebanding.
+    """
+    import os
+    import shutil
+    import subprocess
+    import tempfile
+    from app.services.media_compression_service import MediaCompressionService
+    from app.services.ffmpeg_capabilities import ffmpeg_capabilities
+    from app.services.video_pipeline import VideoPipeline, DEFAULT_RENDITIONS, HLS_LADDER
+
+    if not ffmpeg_capabilities.available:
+        raise click.ClickException('ffmpeg/ffprobe tidak ditemukan di PATH')
+
+    if outputs == 'matched':
+        # Rendition ladder yang setinggi kualitas MP4 multi-pass (low/medium/high -> 270p/720p/1080p)
+        heights = {rendition.height for rendition in DEFAULT_RENDITIONS}
+        mp4_renditions = tuple(rendition.name for rendition in HLS_LADDER if rendition.height in heights)
+    else:
+        mp4_renditions = ('720p',)
+
+    workdir = tempfile.mkdtemp(prefix='cendrawasih_bench_')
+    try:
+        if input_path is None:
+            input_path = os.path.join(workdir, 'clip.mp4')
+            subprocess.run([
+                'ffmpeg', '-hide_banner', '-y',
+                '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30',
+                '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=48000',
+                '-t', str(duration), '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+                '-c:a', 'aac', input_path
+            ], capture_output=True, check=True)
+            click.echo(f'Clip uji {size} {duration}s: {input_path}')
+
+        runs = (
+            ('multi-pass', MediaCompressionService.encode_multi_pass),
+            ('single-pass', lambda lesson_id, path, compressed, hls: VideoPipeline.encode(
+                path, compressed, hls, lesson_id, mp4_renditions=mp4_renditions
+            ))
+        )
+        for name, encode in runs:
+            out = os.path.join(workdir, name)
+            result = encode(1, input_path, os.path.join(out, 'compressed'), os.path.join(out, 'hls'))
+            stages = ' '.join(f'{stage}={seconds:.2f}s' for stage, seconds in result['timings'].items())
+            compress_result = result.get('compress') or {}
+            mp4 = ','.join(sorted(compress_result.get('versions') or {})) or '-'
+            remux = ','.join(compress_result.get('remuxed') or []) or '-'
+            hls = ','.join((result.get('hls') or {}).get('variants') or []) or '-'
+            click.echo(f'{name:>12}: {stages}')
+            click.echo(f'{"":>12}  mp4={mp4} remux={remux} hls={hls}')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+@media_cli.command('capabilities')
+@click.option('--refresh', is_flag=True, help='Probe ulang ffmpeg/ffprobe')
+def media_capabilities(refresh):
+    """Tampilkan versi ffmpeg, encoder dan muxer yang terdeteksi"""
+    from app.services.ffmpeg_capabilities import ffmpeg_capabilities
+
+    if refresh:
+        ffmpeg_capabilities.refresh()
+    for key, value in ffmpeg_capabilities.to_dict().items():
+        click.echo(f'{key}: {value}')
+
+
+def register_commands(app):
+    """Register CLI commands ke Flask app"""
+    app.cli.add_command(progress_summary_cli)
+    app.cli.add_command(trials_cli)
+    app.cli.add_command(quiz_cli)
+    app.cli.add_command(media_jobs_cli)
+    app.cli.add_command(media_cli)
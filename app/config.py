@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -16,15 +17,85 @@ class Config:
     COMPRESSED_FOLDER = os.path.join(UPLOAD_FOLDER, 'compressed')
     HLS_FOLDER = os.path.join(UPLOAD_FOLDER, 'hls')
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # Limit 100MB for video
+    HLS_SEGMENT_TYPE = os.environ.get('HLS_SEGMENT_TYPE', 'mpegts') # mpegts, fmp4
+    # Probe versi/encoder/muxer ffmpeg saat create_app; jika 0, probe saat pertama dipakai
+    FFMPEG_PROBE_ON_STARTUP = os.environ.get('FFMPEG_PROBE_ON_STARTUP', '1') == '1'
+
+    # Buffer heartbeat posisi video (lihat app/services/progress_buffer.py); jika 0 heartbeat ditulis langsung.
+    # Aktifkan hanya di proses web: buffer menjalankan thread flush dan flush saat proses berhenti
+    PROGRESS_BUFFER_ENABLED = os.environ.get('PROGRESS_BUFFER_ENABLED', '0') == '1'
+    PROGRESS_BUFFER_FLUSH_INTERVAL = float(os.environ.get('PROGRESS_BUFFER_FLUSH_INTERVAL', 5))
+    PROGRESS_BUFFER_MAX_PENDING = int(os.environ.get('PROGRESS_BUFFER_MAX_PENDING', 10000))
+
+    # Cache aplikasi (lihat app/extensions/cache.py): memory, filesystem, redis, null
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'memory')
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'cendrawasih:')
+    CACHE_THRESHOLD = int(os.environ.get('CACHE_THRESHOLD', 10000))
+    CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'cendrawasih_cache')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+    # Sweeper trial kedaluwarsa (atau jalankan lewat cron: flask trials sweep)
+    TRIAL_SWEEPER_ENABLED = os.environ.get('TRIAL_SWEEPER_ENABLED', '0') == '1'
+    TRIAL_SWEEPER_INTERVAL = float(os.environ.get('TRIAL_SWEEPER_INTERVAL', 300))
+    TRIAL_SWEEPER_BATCH_SIZE = int(os.environ.get('TRIAL_SWEEPER_BATCH_SIZE', 500))
+
+    # Hitung query per request + deteksi N+1 (lihat app/extensions/query_profiler.py)
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', '0') == '1'
+    QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5))
+
+    # TTL outline kursus (topic/lesson terurut) di cache
+    COURSE_OUTLINE_CACHE_TTL = int(os.environ.get('COURSE_OUTLINE_CACHE_TTL', 300))
+
+    # Push notifikasi (SSE). Tanpa PUBSUB_REDIS_URL pub/sub hanya in-process (satu worker)
+    PUBSUB_REDIS_URL = os.environ.get('PUBSUB_REDIS_URL')
+    PUBSUB_QUEUE_SIZE = int(os.environ.get('PUBSUB_QUEUE_SIZE', 100))
+    NOTIFICATION_STREAM_TIMEOUT = float(os.environ.get('NOTIFICATION_STREAM_TIMEOUT', 300))
+    NOTIFICATION_STREAM_KEEPALIVE = float(os.environ.get('NOTIFICATION_STREAM_KEEPALIVE', 15))
+    NOTIFICATION_UNREAD_CACHE_TTL = int(os.environ.get('NOTIFICATION_UNREAD_CACHE_TTL', 300))
+
+    # Antrian pemrosesan video (lihat app/services/media_jobs.py).
+    # Default (semua config) hanya satu proses `flask media-jobs work` yang meng-encode, sehingga
+    # jumlah ffmpeg per server = MEDIA_JOB_CONCURRENCY, bukan kelipatan jumlah web worker.
+    # Server development `python run.py` / `python app/run.py` menyalakan dispatcher di prosesnya sendiri
+    MEDIA_JOB_WORKER_ENABLED = os.environ.get('MEDIA_JOB_WORKER_ENABLED', '0') == '1'
+    MEDIA_JOB_CONCURRENCY = int(os.environ.get('MEDIA_JOB_CONCURRENCY', 2))
+    MEDIA_JOB_EXECUTOR = os.environ.get('MEDIA_JOB_EXECUTOR', 'process') # process, thread
+    MEDIA_JOB_ENCODER = os.environ.get('MEDIA_JOB_ENCODER')
+    MEDIA_JOB_POLL_INTERVAL = float(os.environ.get('MEDIA_JOB_POLL_INTERVAL', 2))
+    MEDIA_JOB_HEARTBEAT_INTERVAL = float(os.environ.get('MEDIA_JOB_HEARTBEAT_INTERVAL', 10))
+    MEDIA_JOB_STALE_TIMEOUT = float(os.environ.get('MEDIA_JOB_STALE_TIMEOUT', 120))
+    MEDIA_JOB_MAX_ATTEMPTS = int(os.environ.get('MEDIA_JOB_MAX_ATTEMPTS', 3))
+    MEDIA_JOB_RETRY_BACKOFF = float(os.environ.get('MEDIA_JOB_RETRY_BACKOFF', 30))
+
+    # TTL kunci jawaban quiz di cache (diinvalidasi saat soal berubah)
+    QUIZ_ANSWER_KEY_CACHE_TTL = int(os.environ.get('QUIZ_ANSWER_KEY_CACHE_TTL', 600))
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    QUERY_PROFILER_ENABLED = True
 
 class ProductionConfig(Config):
     DEBUG = False
 
+class TestingConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    # Default SQLite file agar test concurrency bisa memakai banyak koneksi
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
+        'sqlite:///' + os.path.join(tempfile.gettempdir(), 'cendrawasih_test.db')
+    PROGRESS_BUFFER_ENABLED = False
+    CACHE_TYPE = 'memory'
+    QUERY_PROFILER_ENABLED = True
+    QUERY_PROFILER_HEADER = True
+    TRIAL_SWEEPER_ENABLED = False
+    MEDIA_JOB_WORKER_ENABLED = False
+    MEDIA_JOB_EXECUTOR = 'thread'
+    FFMPEG_PROBE_ON_STARTUP = False
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
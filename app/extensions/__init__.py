@@ -1,4 +1,6 @@
 from .database import db, init_db
 from .auth import login_manager, init_login
+from .cache import cache
+from .pubsub import pubsub
 
-__all__ = ['db', 'login_manager', 'init_db', 'init_login']
+__all__ = ['db', 'login_manager', 'init_db', 'init_login', 'cache', 'pubsub']
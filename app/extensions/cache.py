@@ -0,0 +1,582 @@
+import fnmatch
+import functools
+import hashlib
+import os
+import pickle
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class NullBackend:
+    """Backend yang tidak menyimpan apa pun (CACHE_TYPE='null')"""
+
+    def get(self, key):
+        return _MISSING
+
+    def get_many(self, keys):
+        return [_MISSING] * len(keys)
+
+    def set(self, key, value, timeout=None):
+        return True
+
+    def add(self, key, value, timeout=None):
+        return True
+
+    def delete(self, key):
+        return True
+
+    def incr(self, key):
+        return 1
+
+    def clear(self):
+        return True
+
+
+class MemoryBackend(NullBackend):
+    """LRU + TTL in-process"""
+
+    def __init__(self, threshold=10000, on_evict=None):
+        self.threshold = threshold
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_locked(self, key, value, timeout):
+        expires_at = time.monotonic() + timeout if timeout else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.threshold:
+            evicted_key, _ = self._entries.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(evicted_key)
+
+    def get(self, key):
+        with self._lock:
+            return self._get_locked(key)
+
+    def get_many(self, keys):
+        with self._lock:
+            return [self._get_locked(key) for key in keys]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._set_locked(key, value, timeout)
+        return True
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._get_locked(key) is not _MISSING:
+                return False
+            self._set_locked(key, value, timeout)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        return True
+
+    def incr(self, key):
+        with self._lock:
+            value = self._get_locked(key)
+            value = 1 if value is _MISSING else int(value) + 1
+            self._set_locked(key, value, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        return True
+
+
+class FileSystemBackend(NullBackend):
+    """Satu file pickle per key di CACHE_DIR, dibagi antar proses di host yang sama"""
+
+    def __init__(self, cache_dir, threshold=10000, on_evict=None):
+        self.cache_dir = cache_dir
+        self.threshold = threshold
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires_at, stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return _MISSING
+        if stored_key != key:
+            return _MISSING
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return _MISSING
+        return value
+
+    def _write(self, key, value, timeout):
+        expires_at = time.time() + timeout if timeout else None
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((expires_at, key, value), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self):
+        """Buang file tertua jika jumlah entry melebihi threshold"""
+        try:
+            names = [name for name in os.listdir(self.cache_dir) if not name.endswith('.tmp')]
+        except OSError:
+            return
+        overflow = len(names) - self.threshold
+        if overflow <= 0:
+            return
+
+        paths = sorted(
+            (os.path.join(self.cache_dir, name) for name in names),
+            key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0
+        )
+        for path in paths[:overflow]:
+            evicted_key = None
+            if self.on_evict is not None:
+                try:
+                    with open(path, 'rb') as f:
+                        evicted_key = pickle.load(f)[1]
+                except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+                    pass
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            if evicted_key is not None:
+                self.on_evict(evicted_key)
+
+    def get(self, key):
+        return self._read(key)
+
+    def get_many(self, keys):
+        return [self._read(key) for key in keys]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._write(key, value, timeout)
+        return True
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._read(key) is not _MISSING:
+                return False
+            self._write(key, value, timeout)
+        return True
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+        return True
+
+    def incr(self, key):
+        # Atomik per proses; antar proses cukup untuk version counter (nilai hanya naik)
+        with self._lock:
+            value = self._read(key)
+            value = 1 if value is _MISSING else int(value) + 1
+            self._write(key, value, None)
+        return value
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+        return True
+
+
+class FakeRedis:
+    """
+    Pengganti lokal untuk client Redis (get/set/mget/incr/delete/scan_iter/publish/pubsub),
+    dipakai untuk test dan development tanpa server Redis (CACHE_REDIS_URL='fakeredis://').
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._pubsubs = []
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._alive(key)
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._alive(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key) is not None:
+                return None
+            if isinstance(value, int):
+                value = str(value).encode()
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+            return True
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._alive(key) or 0) + 1
+            expires_at = self._data[key][1] if key in self._data else None
+            self._data[key] = (str(value).encode(), expires_at)
+            return value
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def scan_iter(self, match=None):
+        prefix = match[:-1] if match and match.endswith('*') else match
+        with self._lock:
+            keys = [key for key in self._data if prefix is None or key.startswith(prefix)]
+        return iter(keys)
+
+    def publish(self, channel, message):
+        """Kirim ke semua pubsub() yang pattern-nya cocok; Returns: jumlah penerima"""
+        if isinstance(channel, str):
+            channel = channel.encode()
+        if isinstance(message, str):
+            message = message.encode()
+        with self._lock:
+            subscribers = list(self._pubsubs)
+        return sum(1 for pubsub in subscribers if pubsub._deliver(channel, message))
+
+    def pubsub(self):
+        pubsub = _FakePubSub(self)
+        with self._lock:
+            self._pubsubs.append(pubsub)
+        return pubsub
+
+
+class _FakePubSub:
+    """Subset API redis-py PubSub: psubscribe, get_message, close"""
+
+    def __init__(self, owner):
+        self._owner = owner
+        self._patterns = []
+        self._messages = queue.Queue()
+
+    def psubscribe(self, *patterns):
+        self._patterns.extend(pattern.encode() if isinstance(pattern, str) else pattern for pattern in patterns)
+
+    def _deliver(self, channel, message):
+        for pattern in self._patterns:
+            if fnmatch.fnmatchcase(channel, pattern):
+                self._messages.put({'type': 'pmessage', 'pattern': pattern, 'channel': channel, 'data': message})
+                return True
+        return False
+
+    def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return self._messages.get(timeout=timeout) if timeout else self._messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        with self._owner._lock:
+            if self in self._owner._pubsubs:
+                self._owner._pubsubs.remove(self)
+
+
+class RedisBackend(NullBackend):
+    """Backend untuk server yang berbicara protokol Redis"""
+
+    def __init__(self, client, key_prefix=''):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    @staticmethod
+    def from_url(url, key_prefix=''):
+        if url.startswith('fakeredis://'):
+            return RedisBackend(FakeRedis(), key_prefix)
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_TYPE='redis' membutuhkan paket redis (pip install redis)")
+        return RedisBackend(redis.Redis.from_url(url), key_prefix)
+
+    @staticmethod
+    def _load(raw):
+        if raw is None:
+            return _MISSING
+        if raw.isdigit():
+            return int(raw)
+        return pickle.loads(raw)
+
+    @staticmethod
+    def _dump(value):
+        # Integer disimpan apa adanya agar INCR tetap bekerja
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def get(self, key):
+        return self._load(self.client.get(key))
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return [self._load(raw) for raw in self.client.mget(keys)]
+
+    def set(self, key, value, timeout=None):
+        return bool(self.client.set(key, self._dump(value), ex=int(timeout) if timeout else None))
+
+    def add(self, key, value, timeout=None):
+        return bool(self.client.set(key, self._dump(value), ex=int(timeout) if timeout else None, nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+        return True
+
+    def incr(self, key):
+        return int(self.client.incr(key))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f"{self.key_prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+        return True
+
+
+class Cache:
+    """
+    Extension cache dengan backend yang bisa diganti lewat config:
+    namespace + version bump untuk invalidasi, memoize untuk method service,
+    single-flight saat miss, dan metrik hit/miss/eviction per namespace.
+    """
+
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        self.default_timeout = 300
+        self.key_prefix = 'cendrawasih:'
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Pilih backend dari CACHE_TYPE dan daftarkan ke app.extensions"""
+        cache_type = app.config.get('CACHE_TYPE', 'memory')
+        self.default_timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        self.key_prefix = app.config.get('CACHE_KEY_PREFIX', 'cendrawasih:')
+        threshold = app.config.get('CACHE_THRESHOLD', 10000)
+
+        if cache_type == 'memory':
+            self.backend = MemoryBackend(threshold, on_evict=self._record_eviction)
+        elif cache_type == 'filesystem':
+            self.backend = FileSystemBackend(app.config['CACHE_DIR'], threshold, on_evict=self._record_eviction)
+        elif cache_type == 'redis':
+            self.backend = RedisBackend.from_url(app.config['CACHE_REDIS_URL'], self.key_prefix)
+        elif cache_type == 'null':
+            self.backend = NullBackend()
+        else:
+            raise ValueError(f"CACHE_TYPE tidak dikenal: {cache_type}")
+
+        with self._stats_lock:
+            self._stats = {}
+        app.extensions['cache'] = self
+
+    # ---- key & metrik ----
+
+    def _version_key(self, namespace):
+        return f"{self.key_prefix}{namespace}:__version__"
+
+    def _version(self, namespace):
+        key = self._version_key(namespace)
+        version = self._safe(namespace, self.backend.get, key)
+        if version is _MISSING or version is None:
+            # Seed berbasis waktu: jika version key hilang (eviction/restart), entry lama tidak hidup lagi
+            self._safe(namespace, self.backend.add, key, time.time_ns() // 1000, None)
+            version = self._safe(namespace, self.backend.get, key)
+        return 0 if version is _MISSING or version is None else version
+
+    def _make_key(self, namespace, key, version):
+        return f"{self.key_prefix}{namespace}:v{version}:{key}"
+
+    def _counter(self, namespace):
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats.setdefault(namespace, {
+                'hits': 0, 'misses': 0, 'sets': 0, 'deletes': 0,
+                'evictions': 0, 'invalidations': 0, 'errors': 0
+            })
+        return stats
+
+    def _incr_stat(self, namespace, name, amount=1):
+        with self._stats_lock:
+            self._counter(namespace)[name] += amount
+
+    def _record_eviction(self, full_key):
+        if not full_key.startswith(self.key_prefix):
+            return
+        namespace = full_key[len(self.key_prefix):].split(':', 1)[0]
+        self._incr_stat(namespace, 'evictions')
+
+    def _safe(self, namespace, operation, *args):
+        """Kegagalan backend tidak boleh menggagalkan request"""
+        try:
+            return operation(*args)
+        except Exception as e:
+            self._incr_stat(namespace, 'errors')
+            print(f"Cache Backend Error ({namespace}): {str(e)}")
+            return _MISSING
+
+    # ---- API ----
+
+    def get(self, namespace, key, default=None):
+        full_key = self._make_key(namespace, key, self._version(namespace))
+        value = self._safe(namespace, self.backend.get, full_key)
+        if value is _MISSING:
+            self._incr_stat(namespace, 'misses')
+            return default
+        self._incr_stat(namespace, 'hits')
+        return value
+
+    def get_many(self, namespace, keys):
+        """Returns: {key: value} hanya untuk key yang ada di cache"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        version = self._version(namespace)
+        values = self._safe(namespace, self.backend.get_many, [self._make_key(namespace, k, version) for k in keys])
+        if values is _MISSING:
+            values = [_MISSING] * len(keys)
+
+        found = {key: value for key, value in zip(keys, values) if value is not _MISSING}
+        self._incr_stat(namespace, 'hits', len(found))
+        self._incr_stat(namespace, 'misses', len(keys) - len(found))
+        return found
+
+    def set(self, namespace, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        full_key = self._make_key(namespace, key, self._version(namespace))
+        self._safe(namespace, self.backend.set, full_key, value, timeout)
+        self._incr_stat(namespace, 'sets')
+
+    def delete(self, namespace, key):
+        full_key = self._make_key(namespace, key, self._version(namespace))
+        self._safe(namespace, self.backend.delete, full_key)
+        self._incr_stat(namespace, 'deletes')
+
+    def bump(self, namespace):
+        """Invalidasi seluruh namespace dengan menaikkan version-nya"""
+        key = self._version_key(namespace)
+        self._version(namespace)
+        self._safe(namespace, self.backend.incr, key)
+        self._incr_stat(namespace, 'invalidations')
+
+    def get_or_set(self, namespace, key, factory, timeout=None, cache_none=False):
+        """
+        Ambil dari cache atau hitung dengan factory(). Hanya satu thread per key
+        yang menjalankan factory saat miss (single-flight); thread lain menunggu hasilnya.
+        """
+        value = self.get(namespace, key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        flight_key = (namespace, key)
+        with self._flights_lock:
+            lock = self._flights.get(flight_key)
+            if lock is None:
+                lock = self._flights[flight_key] = [threading.Lock(), 0]
+            lock[1] += 1
+
+        try:
+            with lock[0]:
+                # Thread yang menunggu mendapatkan hasil dari thread pertama
+                value = self._safe(
+                    namespace, self.backend.get,
+                    self._make_key(namespace, key, self._version(namespace))
+                )
+                if value is not _MISSING:
+                    return value
+
+                value = factory()
+                if value is not None or cache_none:
+                    self.set(namespace, key, value, timeout)
+                return value
+        finally:
+            with self._flights_lock:
+                lock[1] -= 1
+                if lock[1] == 0:
+                    self._flights.pop(flight_key, None)
+
+    def memoize(self, namespace, timeout=None, cache_none=False):
+        """
+        Decorator untuk method service (staticmethod/fungsi biasa).
+        Gunakan fn.invalidate() atau cache.bump(namespace) untuk invalidasi.
+        """
+        def decorator(f):
+            qualname = f"{f.__module__}.{f.__qualname__}"
+
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                arg_hash = hashlib.sha1(repr((args, sorted(kwargs.items()))).encode('utf-8')).hexdigest()
+                return self.get_or_set(
+                    namespace, f"{qualname}:{arg_hash}",
+                    lambda: f(*args, **kwargs),
+                    timeout=timeout, cache_none=cache_none
+                )
+
+            wrapper.invalidate = lambda: self.bump(namespace)
+            wrapper.uncached = f
+            return wrapper
+        return decorator
+
+    def clear(self):
+        self._safe('__all__', self.backend.clear)
+
+    def stats(self, namespace=None):
+        """Metrik per namespace (hit_rate dihitung dari hits/misses)"""
+        with self._stats_lock:
+            snapshot = {name: dict(values) for name, values in self._stats.items()}
+
+        for values in snapshot.values():
+            lookups = values['hits'] + values['misses']
+            values['hit_rate'] = round(values['hits'] / lookups, 4) if lookups else 0
+
+        if namespace is not None:
+            return snapshot.get(namespace, {
+                'hits': 0, 'misses': 0, 'sets': 0, 'deletes': 0,
+                'evictions': 0, 'invalidations': 0, 'errors': 0, 'hit_rate': 0
+            })
+        return snapshot
+
+
+cache = Cache()
@@ -0,0 +1,176 @@
+import json
+import queue
+import threading
+
+# Pesan None = "ada perubahan, sinkronkan ulang dari sumber data"
+RESYNC = None
+
+
+class Subscription:
+    """Antrian pesan untuk satu subscriber (satu koneksi SSE)"""
+
+    def __init__(self, owner, channel, maxsize):
+        self._owner = owner
+        self.channel = channel
+        self._queue = queue.Queue(maxsize)
+        self._overflowed = False
+
+    def _put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            # Subscriber lambat: buang antrian, subscriber cukup sinkron ulang sekali
+            self._overflowed = True
+
+    def get(self, timeout=None):
+        """
+        Tunggu pesan berikutnya.
+        Returns: pesan (dict) | RESYNC | raise queue.Empty jika timeout
+        """
+        if self._overflowed:
+            self._overflowed = False
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    return RESYNC
+        return self._queue.get(timeout=timeout)
+
+    def close(self):
+        self._owner._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PubSub:
+    """
+    Pub/sub per channel. Default in-process (satu worker); dengan PUBSUB_REDIS_URL pesan
+    di-publish lewat Redis dan satu thread listener per proses meneruskannya ke subscriber lokal,
+    sehingga publisher dan koneksi SSE boleh berada di worker/proses berbeda.
+    """
+
+    def __init__(self, app=None):
+        self.client = None
+        self.key_prefix = 'cendrawasih:pubsub:'
+        self.queue_size = 100
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self._stop_event = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        url = app.config.get('PUBSUB_REDIS_URL')
+        self.key_prefix = app.config.get('CACHE_KEY_PREFIX', 'cendrawasih:') + 'pubsub:'
+        self.queue_size = app.config.get('PUBSUB_QUEUE_SIZE', self.queue_size)
+
+        self.stop()
+        self.client = None
+        if url:
+            if url.startswith('fakeredis://'):
+                from app.extensions.cache import FakeRedis
+                self.client = FakeRedis()
+            else:
+                try:
+                    import redis
+                except ImportError:
+                    raise RuntimeError("PUBSUB_REDIS_URL membutuhkan paket redis (pip install redis)")
+                self.client = redis.Redis.from_url(url)
+        app.extensions['pubsub'] = self
+
+    # ---- subscriber lokal ----
+
+    def subscribe(self, channel):
+        if self.client is not None:
+            self._ensure_listener()
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _dispatch(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription._put(message)
+        return len(subscribers)
+
+    # ---- publish ----
+
+    def publish(self, channel, message=RESYNC):
+        """message harus bisa di-serialize JSON; RESYNC memberi tahu subscriber untuk sinkron ulang"""
+        if self.client is None:
+            return self._dispatch(channel, message)
+        try:
+            self.client.publish(self.key_prefix + channel, json.dumps(message))
+        except Exception as e:
+            # Redis mati: minimal subscriber di proses ini tetap menerima
+            print(f"PubSub Publish Error: {str(e)}")
+            return self._dispatch(channel, message)
+        return 0
+
+    # ---- listener Redis ----
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._stop_event.clear()
+            pubsub = self.client.pubsub()
+            pubsub.psubscribe(self.key_prefix + '*')
+            self._listener = threading.Thread(target=self._listen, args=(pubsub,), name='pubsub-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self, pubsub):
+        prefix = self.key_prefix.encode()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                except Exception as e:
+                    print(f"PubSub Listener Error: {str(e)}")
+                    self._stop_event.wait(1.0)
+                    continue
+                if not message or message.get('type') not in ('message', 'pmessage'):
+                    continue
+                channel = message['channel']
+                if isinstance(channel, str):
+                    channel = channel.encode()
+                if not channel.startswith(prefix):
+                    continue
+                try:
+                    data = json.loads(message['data'])
+                except ValueError:
+                    continue
+                self._dispatch(channel[len(prefix):].decode(), data)
+        finally:
+            pubsub.close()
+
+    def stop(self):
+        """Hentikan thread listener (dipanggil ulang saat init_app)"""
+        self._stop_event.set()
+        if self._listener is not None:
+            self._listener.join(timeout=5)
+            self._listener = None
+
+
+pubsub = PubSub()
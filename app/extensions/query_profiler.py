@@ -0,0 +1,157 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_local = threading.local()
+_listening = False
+_listen_lock = threading.Lock()
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'(\?|%s|%\(\w+\)s|:\w+)(\s*,\s*(\?|%s|%\(\w+\)s|:\w+))+')
+_NUMBER = re.compile(r'\b\d+\b')
+
+
+def statement_shape(statement):
+    """Normalisasi SQL: IN (?, ?, ?) dan literal angka diringkas agar query sejenis punya shape sama"""
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _PLACEHOLDER_LIST.sub('?', shape)
+    return _NUMBER.sub('N', shape)
+
+
+class QueryRecorder:
+    """Kumpulan statement yang dieksekusi selama satu request/blok kode"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.statements = []
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+        self.statements.append(statement)
+
+    def repeated(self, threshold):
+        """Shape yang dieksekusi >= threshold kali (kandidat N+1)"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+def _recorders():
+    stack = getattr(_local, 'recorders', None)
+    if stack is None:
+        stack = _local.recorders = []
+    return stack
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _recorders():
+        conn.info.setdefault('query_profiler_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = _recorders()
+    if not stack:
+        return
+    starts = conn.info.get('query_profiler_start')
+    duration = time.perf_counter() - starts.pop() if starts else 0.0
+    for recorder in stack:
+        recorder.record(statement, duration)
+
+
+def _ensure_listening():
+    global _listening
+    with _listen_lock:
+        if _listening:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening = True
+
+
+@contextmanager
+def record_queries():
+    """Rekam semua query di thread ini selama blok berjalan"""
+    _ensure_listening()
+    recorder = QueryRecorder()
+    stack = _recorders()
+    stack.append(recorder)
+    try:
+        yield recorder
+    finally:
+        stack.remove(recorder)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Helper test: gagal jika blok mengeksekusi lebih dari `limit` query"""
+    with record_queries() as recorder:
+        yield recorder
+    if recorder.count > limit:
+        details = '\n'.join(f"  {count}x {shape}" for shape, count in recorder.shapes.most_common())
+        raise AssertionError(f"Expected at most {limit} queries, got {recorder.count}:\n{details}")
+
+
+class QueryProfiler:
+    """
+    Hitung jumlah statement dan total waktu DB per request Flask.
+    Shape yang berulang di atas threshold dicatat sebagai dugaan N+1.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.threshold = 5
+        self.expose_header = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('QUERY_PROFILER_ENABLED', app.debug)
+        self.threshold = app.config.get('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', self.threshold)
+        self.expose_header = app.config.get('QUERY_PROFILER_HEADER', app.debug)
+        app.extensions['query_profiler'] = self
+
+        if not self.enabled:
+            return
+
+        _ensure_listening()
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+
+    def _start(self):
+        recorder = QueryRecorder()
+        _recorders().append(recorder)
+        g.query_recorder = recorder
+
+    def _finish(self, response):
+        recorder = g.get('query_recorder')
+        if recorder is None:
+            return response
+
+        from flask import current_app
+        offenders = recorder.repeated(self.threshold)
+        for shape, count in offenders:
+            current_app.logger.warning(
+                "Possible N+1 on %s: %d x %s", request.endpoint or request.path, count, shape
+            )
+
+        if self.expose_header:
+            response.headers['X-Query-Count'] = str(recorder.count)
+            response.headers['X-Query-Time-Ms'] = f"{recorder.duration * 1000:.2f}"
+        return response
+
+    def _teardown(self, exc=None):
+        recorder = g.pop('query_recorder', None)
+        stack = _recorders()
+        if recorder is not None and recorder in stack:
+            stack.remove(recorder)
+
+
+query_profiler = QueryProfiler()
@@ -1,6 +1,8 @@
 from .user import User, enrollments
 from .course import Course, Topic
 from .lesson import Lesson
-from .progress import LessonProgress
-from .quiz import QuizQuestion, QuizOption, QuizAttempt
-from .notification import Notification
\ No newline at end of file
+from .progress import LessonProgress, CourseProgressSummary
+from .quiz import QuizQuestion, QuizOption, QuizAttempt, QuizAnswer, QuizItemStatistic
+from .notification import Notification
+from .trial import CourseTrial
+from .media_job import MediaJob
@@ -15,6 +15,10 @@ class Lesson(db.Model):
     compression_status = db.Column(db.String(20), default='pending') # pending, processing, completed, failed
     compression_metadata = db.Column(db.JSON, nullable=True)       # Store compression ratio, sizes, etc
     
+    # Bank soal quiz: ambil N soal acak per attempt (None = semua soal)
+    quiz_pool_size = db.Column(db.Integer, nullable=True)
+    quiz_shuffle_options = db.Column(db.Boolean, default=False)
+    
     topic_id = db.Column(db.Integer, db.ForeignKey('topic.id'))
     
     # Relasi untuk melihat siapa saja yang sudah menyelesaikan lesson ini
@@ -24,5 +28,10 @@ class Lesson(db.Model):
     quiz_questions = db.relationship('QuizQuestion', backref='lesson', lazy='dynamic', cascade='all, delete-orphan')
     quiz_attempts = db.relationship('QuizAttempt', backref='lesson', lazy='dynamic', cascade='all, delete-orphan')
 
+    @property
+    def uses_question_pool(self):
+        """Soal/urutan option ditentukan per attempt (disimpan di QuizAttempt)"""
+        return bool(self.quiz_pool_size) or bool(self.quiz_shuffle_options)
+
     def __repr__(self):
         return f'<Lesson {self.title}>'
\ No newline at end of file
@@ -0,0 +1,35 @@
+from app import db
+from datetime import datetime
+
+class MediaJob(db.Model):
+    """Antrian pemrosesan video lesson (lihat app/services/media_jobs.py)"""
+    __tablename__ = 'media_job'
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True) # Penerima notifikasi
+    payload = db.Column(db.JSON, nullable=False) # input_path, compressed_folder, hls_folder, hls_segment_type
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    priority = db.Column(db.Integer, nullable=False, default=0) # Lebih besar diproses lebih dulu
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) # Backoff retry
+    locked_by = db.Column(db.String(100), nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_media_job_claim', 'status', 'priority', 'run_after'),
+        db.Index('idx_media_job_lesson_id', 'lesson_id'),
+    )
+
+    def __repr__(self):
+        return f'<MediaJob {self.id} Lesson:{self.lesson_id} {self.status}>'
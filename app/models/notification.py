@@ -10,5 +10,10 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     link = db.Column(db.String(255), nullable=True) # Link to specific page
 
+    __table_args__ = (
+        # Daftar/hitung notifikasi belum dibaca per user
+        db.Index('idx_notification_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<Notification {self.message[:20]}>'
@@ -12,10 +12,17 @@ class LessonProgress(db.Model):
     # Opsional: Jika ingin menyimpan posisi video terakhir ditonton (detik ke-berapa)
     video_timestamp = db.Column(db.Integer, default=0) 
     
-    # Trial Fields
+    # Trial Fields (lama; status trial sekarang disimpan di course_trial)
     trial_started_at = db.Column(db.DateTime, nullable=True) # Kapan trial dimulai
     trial_expires_at = db.Column(db.DateTime, nullable=True) # Kapan trial berakhir
     trial_cancelled = db.Column(db.Boolean, default=False) # Trial sudah dibatalkan
+    
+    # Sama dengan index dari migration database_performance_indexes
+    __table_args__ = (
+        db.Index('idx_progress_user_id', 'user_id'),
+        db.Index('idx_progress_lesson_id', 'lesson_id'),
+        db.Index('idx_progress_user_lesson', 'user_id', 'lesson_id', unique=True),
+    )
  
 
     def mark_complete(self):
@@ -24,4 +31,22 @@ class LessonProgress(db.Model):
         db.session.commit()
 
     def __repr__(self):
-        return f'<Progress User:{self.user_id} Lesson:{self.lesson_id} Done:{self.is_completed}>'
\ No newline at end of file
+        return f'<Progress User:{self.user_id} Lesson:{self.lesson_id} Done:{self.is_completed}>'
+
+class CourseProgressSummary(db.Model):
+    """Ringkasan progress per (user, course) yang dipelihara secara incremental"""
+    __tablename__ = 'course_progress_summary'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    
+    completed_lessons = db.Column(db.Integer, nullable=False, default=0)
+    total_lessons = db.Column(db.Integer, nullable=False, default=0)
+    percent = db.Column(db.Integer, nullable=False, default=0) # Persentase (0-100)
+    last_activity = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('idx_summary_course_id', 'course_id'),
+    )
+
+    def __repr__(self):
+        return f'<Summary User:{self.user_id} Course:{self.course_id} {self.percent}%>'
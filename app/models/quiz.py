@@ -1,3 +1,4 @@
+import math
 from app import db
 from datetime import datetime
 
@@ -29,8 +30,78 @@ class QuizAttempt(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id'))
-    score = db.Column(db.Float) # Persentase skor (0-100)
+    score = db.Column(db.Float) # Persentase skor (0-100), NULL selama attempt belum dikirim
     completed_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Bank soal: soal terpilih (urut tampil) dan urutan option per soal untuk attempt ini
+    started_at = db.Column(db.DateTime, nullable=True)
+    question_ids = db.Column(db.JSON, nullable=True)
+    option_order = db.Column(db.JSON, nullable=True) # {"<question_id>": [option_id, ...]}
+    
+    __table_args__ = (
+        db.Index('idx_attempt_user_lesson', 'user_id', 'lesson_id'),
+    )
+    
     def __repr__(self):
         return f'<Attempt User:{self.user_id} Score:{self.score}>'
+
+
+class QuizAnswer(db.Model):
+    """Jawaban per soal untuk satu attempt (option_id NULL jika tidak dijawab/tidak valid)"""
+    __tablename__ = 'quiz_answer'
+    id = db.Column(db.Integer, primary_key=True)
+    attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempt.id', ondelete='CASCADE'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('quiz_question.id', ondelete='CASCADE'), nullable=False)
+    option_id = db.Column(db.Integer, db.ForeignKey('quiz_option.id', ondelete='SET NULL'), nullable=True)
+    correct = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        db.Index('idx_answer_attempt_id', 'attempt_id'),
+        db.Index('idx_answer_question_option', 'question_id', 'option_id'),
+    )
+
+    def __repr__(self):
+        return f'<Answer Attempt:{self.attempt_id} Question:{self.question_id} Correct:{self.correct}>'
+
+class QuizItemStatistic(db.Model):
+    """
+    Agregat per soal yang dipelihara incremental setiap submit:
+    cukup untuk difficulty (p) dan point-biserial tanpa membaca riwayat attempt
+    """
+    __tablename__ = 'quiz_item_statistic'
+    question_id = db.Column(db.Integer, db.ForeignKey('quiz_question.id', ondelete='CASCADE'), primary_key=True)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id'), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)  # jumlah skor total attempt
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)  # jumlah kuadrat skor total
+    correct_score_sum = db.Column(db.Float, nullable=False, default=0)  # jumlah skor attempt yang menjawab benar
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_item_stat_lesson_id', 'lesson_id'),
+    )
+
+    @property
+    def difficulty(self):
+        """Proporsi attempt yang menjawab benar (0-1), None jika belum ada attempt"""
+        if not self.attempts:
+            return None
+        return self.correct_count / self.attempts
+
+    @property
+    def discrimination(self):
+        """Point-biserial antara benar/salah di soal ini dan skor total attempt"""
+        n = self.attempts
+        if not n or self.correct_count in (0, n):
+            return None
+        mean = self.score_sum / n
+        variance = self.score_sq_sum / n - mean * mean
+        if variance <= 0:
+            return None
+        p = self.correct_count / n
+        mean_correct = self.correct_score_sum / self.correct_count
+        return (mean_correct - mean) / math.sqrt(variance) * math.sqrt(p / (1 - p))
+
+    def __repr__(self):
+        return f'<ItemStatistic Question:{self.question_id} n={self.attempts}>'
@@ -0,0 +1,29 @@
+from app import db
+from datetime import datetime
+
+class CourseTrial(db.Model):
+    """Status trial per (user, course); menggantikan kolom trial di LessonProgress"""
+    __tablename__ = 'course_trial'
+
+    STATUS_ACTIVE = 'active'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_EXPIRED = 'expired'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_ACTIVE)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    cancelled_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('idx_trial_course_id', 'course_id'),
+        db.Index('idx_trial_status_expires', 'status', 'expires_at'),
+    )
+
+    @property
+    def is_active(self):
+        return self.status == self.STATUS_ACTIVE and self.expires_at > datetime.utcnow()
+
+    def __repr__(self):
+        return f'<CourseTrial User:{self.user_id} Course:{self.course_id} {self.status}>'
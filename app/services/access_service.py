@@ -0,0 +1,100 @@
+from collections import namedtuple
+from datetime import datetime
+from flask import g, has_request_context
+from app import db
+from app.models.user import enrollments
+from app.models.trial import CourseTrial
+from app.services.course_outline import CourseOutlineService
+
+
+class CourseAccess(namedtuple('CourseAccess', ['enrolled', 'trial_active', 'trial_expiry', 'is_preview_lesson'])):
+    """Keputusan akses satu user ke kursus (dan opsional satu lesson)"""
+    __slots__ = ()
+
+    @property
+    def has_access(self):
+        return self.enrolled or self.trial_active or self.is_preview_lesson
+
+
+NO_ACCESS = CourseAccess(False, False, None, False)
+
+
+class AccessService:
+    """Resolver akses kursus/lesson: maksimal dua query, di-memoize per request"""
+
+    @staticmethod
+    def _memo():
+        if not has_request_context():
+            return None
+        return g.setdefault('course_access', {})
+
+    @staticmethod
+    def _load(user_id, course_id):
+        """Satu query: status enrollment + baris trial (keduanya lookup primary key)"""
+        enrolled = db.session.query(enrollments.c.course_id).filter(
+            enrollments.c.user_id == user_id,
+            enrollments.c.course_id == course_id
+        ).exists()
+        trial = db.select(CourseTrial.status, CourseTrial.expires_at).where(
+            CourseTrial.user_id == user_id,
+            CourseTrial.course_id == course_id
+        )
+        return db.session.query(
+            enrolled,
+            trial.with_only_columns(CourseTrial.status).scalar_subquery(),
+            trial.with_only_columns(CourseTrial.expires_at).scalar_subquery()
+        ).one()
+
+    @staticmethod
+    def resolve(user_id, course_id, lesson_id=None):
+        """
+        Hitung (enrolled, trial_active, trial_expiry, is_preview_lesson)
+        Query: satu untuk enrollment + trial, satu lagi hanya jika outline belum di cache
+        """
+        memo = AccessService._memo()
+        key = (user_id, course_id, lesson_id)
+        if memo is not None and key in memo:
+            return memo[key]
+
+        base = memo.get((user_id, course_id, None)) if memo is not None else None
+        if base is None:
+            enrolled, status, expires_at = AccessService._load(user_id, course_id)
+            enrolled = bool(enrolled)
+            trial_active = (
+                status == CourseTrial.STATUS_ACTIVE
+                and expires_at is not None
+                and expires_at > datetime.utcnow()
+            )
+            trial_expiry = expires_at if status is not None and status != CourseTrial.STATUS_CANCELLED else None
+            base = CourseAccess(enrolled, trial_active, trial_expiry, False)
+
+            from app.services.course_service import CourseService
+            CourseService.remember_enrollment(user_id, course_id, enrolled)
+            if memo is not None:
+                memo[(user_id, course_id, None)] = base
+
+        access = base
+        if lesson_id is not None:
+            outline = CourseOutlineService.get_outline(course_id)
+            navigation = outline.get_navigation(lesson_id) if outline is not None else None
+            access = base._replace(is_preview_lesson=navigation is not None and navigation.is_first)
+            if memo is not None:
+                memo[key] = access
+
+        return access
+
+    @staticmethod
+    def resolve_current(course_id, lesson_id=None):
+        """Resolver untuk current_user (dipakai template/decorator)"""
+        from flask_login import current_user
+        if not current_user.is_authenticated:
+            return NO_ACCESS
+        return AccessService.resolve(current_user.id, course_id, lesson_id)
+
+    @staticmethod
+    def clear(user_id):
+        """Buang keputusan akses user ini dari memo request (setelah enroll/trial berubah)"""
+        memo = AccessService._memo()
+        if memo:
+            for key in [key for key in memo if key[0] == user_id]:
+                del memo[key]
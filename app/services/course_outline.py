@@ -0,0 +1,131 @@
+from collections import namedtuple
+from types import MappingProxyType
+from flask import current_app
+from app import db
+from app.extensions.cache import cache
+from app.models.course import Course, Topic
+from app.models.lesson import Lesson
+
+LessonOutline = namedtuple('LessonOutline', ['id', 'title', 'content_type', 'order', 'topic_id'])
+TopicOutline = namedtuple('TopicOutline', ['id', 'title', 'order', 'lessons'])
+LessonNavigation = namedtuple(
+    'LessonNavigation', ['lesson_id', 'topic_id', 'position', 'prev', 'next', 'is_first', 'is_last']
+)
+
+
+def build_navigation(lessons):
+    """Index lesson_id -> posisi, prev/next lintas topic, is_first/is_last"""
+    last_index = len(lessons) - 1
+    navigation = {}
+    for index, lesson in enumerate(lessons):
+        navigation[lesson.id] = LessonNavigation(
+            lesson_id=lesson.id,
+            topic_id=lesson.topic_id,
+            position=index,
+            prev=lessons[index - 1] if index > 0 else None,
+            next=lessons[index + 1] if index < last_index else None,
+            is_first=index == 0,
+            is_last=index == last_index
+        )
+    return MappingProxyType(navigation)
+
+
+class CourseOutline(namedtuple('CourseOutline', ['course_id', 'topics', 'lessons', 'navigation'])):
+    """Skeleton topic/lesson terurut satu kursus (immutable, aman dibagi antar request)"""
+    __slots__ = ()
+
+    @property
+    def total_lessons(self):
+        return len(self.lessons)
+
+    @property
+    def lesson_ids(self):
+        return tuple(lesson.id for lesson in self.lessons)
+
+    @property
+    def first_lesson_id(self):
+        return self.lessons[0].id if self.lessons else None
+
+    def get_navigation(self, lesson_id):
+        """O(1) lookup posisi lesson dalam kursus, None jika bukan milik kursus ini"""
+        return self.navigation.get(lesson_id)
+
+    @classmethod
+    def from_topics(cls, course_id, topics):
+        lessons = tuple(lesson for topic in topics for lesson in topic.lessons)
+        return cls(course_id, topics, lessons, build_navigation(lessons))
+
+    def __reduce__(self):
+        # MappingProxyType tidak bisa di-pickle; index navigasi dibangun ulang saat load
+        return (CourseOutline.from_topics, (self.course_id, self.topics))
+
+
+class CourseOutlineService:
+    """Akses outline kursus lewat cache, dibangun dengan satu join saat miss"""
+
+    CACHE_NAMESPACE = 'course_outline'
+
+    @staticmethod
+    def _build(course_ids):
+        """Bangun outline untuk course_ids yang ada di database"""
+        rows = db.session.query(
+            Course.id, Topic.id, Topic.title, Topic.order,
+            Lesson.id, Lesson.title, Lesson.content_type, Lesson.order
+        ).outerjoin(
+            Topic, Topic.course_id == Course.id
+        ).outerjoin(
+            Lesson, Lesson.topic_id == Topic.id
+        ).filter(
+            Course.id.in_(course_ids)
+        ).order_by(
+            Course.id, Topic.order, Topic.id, Lesson.order, Lesson.id
+        ).all()
+
+        # Kursus tanpa topic tetap muncul sebagai satu baris dengan kolom topic NULL
+        grouped = {}
+        for course_id, topic_id, topic_title, topic_order, lesson_id, lesson_title, content_type, lesson_order in rows:
+            topics = grouped.setdefault(course_id, [])
+            if topic_id is None:
+                continue
+            if not topics or topics[-1][0] != topic_id:
+                topics.append((topic_id, topic_title, topic_order, []))
+            if lesson_id is not None:
+                topics[-1][3].append(LessonOutline(lesson_id, lesson_title, content_type, lesson_order, topic_id))
+
+        outlines = {}
+        for course_id, topics in grouped.items():
+            outlines[course_id] = CourseOutline.from_topics(course_id, tuple(
+                TopicOutline(topic_id, title, order, tuple(lessons))
+                for topic_id, title, order, lessons in topics
+            ))
+
+        return outlines
+
+    @staticmethod
+    def get_outline(course_id):
+        """Get outline kursus, None jika kursus tidak ada"""
+        return CourseOutlineService.get_outlines([course_id]).get(course_id)
+
+    @staticmethod
+    def get_outlines(course_ids):
+        """Get outline banyak kursus; semua miss dibangun dalam satu query"""
+        course_ids = list(dict.fromkeys(course_ids))
+        outlines = cache.get_many(CourseOutlineService.CACHE_NAMESPACE, course_ids)
+        missing = [course_id for course_id in course_ids if course_id not in outlines]
+
+        if missing:
+            timeout = current_app.config.get('COURSE_OUTLINE_CACHE_TTL')
+            for course_id, outline in CourseOutlineService._build(missing).items():
+                cache.set(CourseOutlineService.CACHE_NAMESPACE, course_id, outline, timeout)
+                outlines[course_id] = outline
+
+        return outlines
+
+    @staticmethod
+    def invalidate(course_id):
+        """Hapus outline dari cache setelah topic/lesson berubah"""
+        cache.delete(CourseOutlineService.CACHE_NAMESPACE, course_id)
+
+    @staticmethod
+    def stats():
+        return cache.stats(CourseOutlineService.CACHE_NAMESPACE)
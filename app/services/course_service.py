@@ -1,13 +1,20 @@
+from flask import g, has_request_context
 from app import db
+from app.extensions.cache import cache
 from app.models.course import Course, Topic
 from app.models.lesson import Lesson
 from app.models.user import enrollments
-from app.models.progress import LessonProgress
+from app.models.progress import LessonProgress, CourseProgressSummary
+from app.models.trial import CourseTrial
+from app.services.progress_summary_service import ProgressSummaryService
+from app.services.course_outline import CourseOutlineService
 from datetime import datetime, timedelta
 
 class CourseService:
     """Service layer for course management"""
 
+    CATALOG_CACHE_NAMESPACE = 'course_catalog'
+
     @staticmethod
     def create_course(title, description, grade_level, instructor_id, icon_class='fa-book', color_theme='emerald'):
         """Create a new course"""
@@ -23,6 +30,7 @@ class CourseService:
         try:
             db.session.add(course)
             db.session.commit()
+            cache.bump(CourseService.CATALOG_CACHE_NAMESPACE)
             return course, "Kursus berhasil dibuat"
         except Exception as e:
             db.session.rollback()
@@ -105,6 +113,7 @@ class CourseService:
         return courses, total_count, page_info
 
     @staticmethod
+    @cache.memoize(CATALOG_CACHE_NAMESPACE)
     def get_available_categories():
         """Get all unique categories from courses"""
         from sqlalchemy import func
@@ -112,6 +121,7 @@ class CourseService:
         return [cat[0] for cat in categories if cat[0]]
     
     @staticmethod
+    @cache.memoize(CATALOG_CACHE_NAMESPACE)
     def get_available_levels():
         """Get all unique grade levels from courses"""
         from sqlalchemy import func
@@ -144,12 +154,13 @@ class CourseService:
             return False, "User atau Course tidak ditemukan"
         
         # Check if already enrolled
-        if course in user.enrolled_courses:
+        if CourseService.is_student_enrolled(user_id, course_id):
             return False, "Anda sudah mendaftar kursus ini"
         
         try:
             user.enrolled_courses.append(course)
             db.session.commit()
+            CourseService.clear_enrollment_cache(user_id)
             return True, "Berhasil mendaftar kursus"
         except Exception as e:
             db.session.rollback()
@@ -169,6 +180,7 @@ class CourseService:
         try:
             user.enrolled_courses.remove(course)
             db.session.commit()
+            CourseService.clear_enrollment_cache(user_id)
             return True, "Berhasil keluar dari kursus"
         except Exception as e:
             db.session.rollback()
@@ -182,17 +194,71 @@ class CourseService:
             return course.students.all()
         return []
 
+    @staticmethod
+    def _enrollment_cache(user_id):
+        """Cache enrollment per request: {'complete': bool, 'enrolled': set, 'checked': set}"""
+        if not has_request_context():
+            return None
+        caches = g.setdefault('enrollment_cache', {})
+        return caches.setdefault(user_id, {'complete': False, 'enrolled': set(), 'checked': set()})
+
+    @staticmethod
+    def clear_enrollment_cache(user_id):
+        """Buang cache enrollment (dan keputusan akses) request ini setelah enroll/unenroll/trial"""
+        if has_request_context():
+            g.get('enrollment_cache', {}).pop(user_id, None)
+            from app.services.access_service import AccessService
+            AccessService.clear(user_id)
+
+    @staticmethod
+    def remember_enrollment(user_id, course_id, enrolled):
+        """Catat status enrollment yang sudah diketahui ke cache request"""
+        request_cache = CourseService._enrollment_cache(user_id)
+        if request_cache is not None:
+            request_cache['checked'].add(course_id)
+            if enrolled:
+                request_cache['enrolled'].add(course_id)
+
+    @staticmethod
+    def get_enrolled_course_ids(user_id, course_ids=None):
+        """
+        Get set course_id yang diikuti user (opsional dibatasi ke course_ids)
+        dengan satu query pada enrollments (PK user_id, course_id), di-cache per request
+        """
+        if course_ids is not None:
+            course_ids = set(course_ids)
+            if not course_ids:
+                return frozenset()
+
+        request_cache = CourseService._enrollment_cache(user_id)
+        if request_cache is not None:
+            if request_cache['complete']:
+                enrolled = request_cache['enrolled']
+                return frozenset(enrolled if course_ids is None else enrolled & course_ids)
+            if course_ids is not None and course_ids <= request_cache['checked']:
+                return frozenset(request_cache['enrolled'] & course_ids)
+
+        query = db.session.query(enrollments.c.course_id).filter(enrollments.c.user_id == user_id)
+        unknown = None
+        if course_ids is not None:
+            unknown = course_ids - request_cache['checked'] if request_cache is not None else course_ids
+            query = query.filter(enrollments.c.course_id.in_(unknown))
+        found = {row[0] for row in query.all()}
+
+        if request_cache is None:
+            return frozenset(found)
+
+        request_cache['enrolled'] |= found
+        if course_ids is None:
+            request_cache['complete'] = True
+            return frozenset(request_cache['enrolled'])
+        request_cache['checked'] |= unknown
+        return frozenset(request_cache['enrolled'] & course_ids)
+
     @staticmethod
     def is_student_enrolled(user_id, course_id):
         """Check if student is enrolled in course"""
-        from app.models.user import User
-        
-        user = User.query.get(user_id)
-        if user:
-            return Course.query.filter_by(id=course_id).filter(
-                Course.students.any(id=user_id)
-            ).first() is not None
-        return False
+        return course_id in CourseService.get_enrolled_course_ids(user_id, [course_id])
 
     # Trial methods
     @staticmethod
@@ -210,33 +276,28 @@ class CourseService:
             return False, "Trial tidak tersedia untuk kursus ini"
         
         # Check if already enrolled
-        if course in user.enrolled_courses:
+        if CourseService.is_student_enrolled(user_id, course_id):
             return False, "Anda sudah mendaftar kursus ini"
         
         try:
             # Enroll user to course with trial data
             user.enrolled_courses.append(course)
             
-            # Create progress record with trial dates
             trial_started = datetime.utcnow()
             trial_expires = trial_started + timedelta(days=course.trial_days)
             
-            # Get first lesson for trial tracking
-            first_lesson = Lesson.query.join(Topic).filter(
-                Topic.course_id == course_id
-            ).order_by(Topic.order, Lesson.order).first()
-            
-            if first_lesson:
-                progress = LessonProgress(
-                    user_id=user_id,
-                    lesson_id=first_lesson.id,
-                    trial_started_at=trial_started,
-                    trial_expires_at=trial_expires,
-                    trial_cancelled=False
-                )
-                db.session.add(progress)
+            # Satu baris trial per (user, course); trial lama yang sudah dibatalkan/berakhir ditimpa
+            trial = CourseTrial.query.get((user_id, course_id))
+            if trial is None:
+                trial = CourseTrial(user_id=user_id, course_id=course_id)
+                db.session.add(trial)
+            trial.status = CourseTrial.STATUS_ACTIVE
+            trial.started_at = trial_started
+            trial.expires_at = trial_expires
+            trial.cancelled_at = None
             
             db.session.commit()
+            CourseService.clear_enrollment_cache(user_id)
             return True, f"Trial berhasil dimulai! Berlaku selama {course.trial_days} hari"
         except Exception as e:
             db.session.rollback()
@@ -255,58 +316,45 @@ class CourseService:
         
         try:
             # Mark trial as cancelled
-            progress_records = LessonProgress.query.join(Lesson).join(Topic).filter(
-                Topic.course_id == course_id,
-                LessonProgress.user_id == user_id,
-                LessonProgress.trial_started_at.isnot(None)
-            ).all()
-            
-            for progress in progress_records:
-                progress.trial_cancelled = True
+            trial = CourseTrial.query.get((user_id, course_id))
+            if trial is not None and trial.status == CourseTrial.STATUS_ACTIVE:
+                trial.status = CourseTrial.STATUS_CANCELLED
+                trial.cancelled_at = datetime.utcnow()
             
             # Remove enrollment
-            user.enrolled_courses.remove(course)
+            if CourseService.is_student_enrolled(user_id, course_id):
+                user.enrolled_courses.remove(course)
             db.session.commit()
+            CourseService.clear_enrollment_cache(user_id)
             return True, "Trial berhasil dibatalkan"
         except Exception as e:
             db.session.rollback()
             return False, f"Error: {str(e)}"
 
+    @staticmethod
+    def get_trial(user_id, course_id):
+        """Get baris trial (lookup primary key, di-cache identity map session)"""
+        return CourseTrial.query.get((user_id, course_id))
+
     @staticmethod
     def is_trial_active(user_id, course_id):
         """Check if user has an active trial for a course"""
-        progress = LessonProgress.query.join(Lesson).join(Topic).filter(
-            Topic.course_id == course_id,
-            LessonProgress.user_id == user_id,
-            LessonProgress.trial_started_at.isnot(None),
-            LessonProgress.trial_cancelled == False,
-            LessonProgress.trial_expires_at > datetime.utcnow()
-        ).first()
-        
-        return progress is not None
+        trial = CourseService.get_trial(user_id, course_id)
+        return trial is not None and trial.is_active
 
     @staticmethod
     def has_trial_access(user_id, course_id):
         """Check if user has trial OR full enrollment access"""
-        # Check full enrollment
-        if CourseService.is_student_enrolled(user_id, course_id):
-            return True
-        
-        # Check active trial
-        return CourseService.is_trial_active(user_id, course_id)
+        from app.services.access_service import AccessService
+        access = AccessService.resolve(user_id, course_id)
+        return access.enrolled or access.trial_active
 
     @staticmethod
     def get_trial_expiry(user_id, course_id):
         """Get trial expiry datetime for a user in a course"""
-        progress = LessonProgress.query.join(Lesson).join(Topic).filter(
-            Topic.course_id == course_id,
-            LessonProgress.user_id == user_id,
-            LessonProgress.trial_started_at.isnot(None),
-            LessonProgress.trial_cancelled == False
-        ).first()
-        
-        if progress:
-            return progress.trial_expires_at
+        trial = CourseService.get_trial(user_id, course_id)
+        if trial is not None and trial.status != CourseTrial.STATUS_CANCELLED:
+            return trial.expires_at
         return None
 
     @staticmethod
@@ -325,6 +373,7 @@ class CourseService:
                     setattr(course, key, value)
             
             db.session.commit()
+            cache.bump(CourseService.CATALOG_CACHE_NAMESPACE)
             return course, "Kursus berhasil diupdate"
         except Exception as e:
             db.session.rollback()
@@ -339,8 +388,12 @@ class CourseService:
             return False, "Kursus tidak ditemukan"
         
         try:
+            CourseProgressSummary.query.filter_by(course_id=course_id).delete()
+            CourseTrial.query.filter_by(course_id=course_id).delete()
             db.session.delete(course)
             db.session.commit()
+            CourseOutlineService.invalidate(course_id)
+            cache.bump(CourseService.CATALOG_CACHE_NAMESPACE)
             return True, "Kursus berhasil dihapus"
         except Exception as e:
             db.session.rollback()
@@ -360,11 +413,51 @@ class CourseService:
         try:
             db.session.add(topic)
             db.session.commit()
+            CourseOutlineService.invalidate(course_id)
             return topic, "Topik berhasil dibuat"
         except Exception as e:
             db.session.rollback()
             return None, f"Error: {str(e)}"
 
+    @staticmethod
+    def delete_topic(topic_id):
+        """Delete a topic and its lessons"""
+        topic = Topic.query.get(topic_id)
+        
+        if not topic:
+            return False, "Topik tidak ditemukan"
+        
+        course_id = topic.course_id
+        
+        try:
+            db.session.delete(topic)
+            db.session.flush()
+            ProgressSummaryService.refresh_course(course_id)
+            db.session.commit()
+            CourseOutlineService.invalidate(course_id)
+            return True, "Topik berhasil dihapus"
+        except Exception as e:
+            db.session.rollback()
+            return False, f"Error: {str(e)}"
+
+    @staticmethod
+    def update_topic(topic_id, title, order):
+        """Update topic title/order"""
+        topic = Topic.query.get(topic_id)
+        
+        if not topic:
+            return None, "Topik tidak ditemukan"
+        
+        try:
+            topic.title = title
+            topic.order = order
+            db.session.commit()
+            CourseOutlineService.invalidate(topic.course_id)
+            return topic, "Topik berhasil diupdate"
+        except Exception as e:
+            db.session.rollback()
+            return None, f"Error: {str(e)}"
+
     @staticmethod
     def get_topics_in_course(course_id):
         """Get all topics in a course"""
@@ -390,12 +483,57 @@ class CourseService:
         
         try:
             db.session.add(lesson)
+            db.session.flush()
+            ProgressSummaryService.refresh_course(topic.course_id)
             db.session.commit()
+            CourseOutlineService.invalidate(topic.course_id)
             return lesson, "Pembelajaran berhasil dibuat"
         except Exception as e:
             db.session.rollback()
             return None, f"Error: {str(e)}"
 
+    @staticmethod
+    def delete_lesson(lesson_id):
+        """Delete a lesson"""
+        lesson = Lesson.query.get(lesson_id)
+        
+        if not lesson:
+            return False, "Pembelajaran tidak ditemukan"
+        
+        course_id = lesson.topic.course_id
+        
+        try:
+            db.session.delete(lesson)
+            db.session.flush()
+            ProgressSummaryService.refresh_course(course_id)
+            db.session.commit()
+            CourseOutlineService.invalidate(course_id)
+            return True, "Pembelajaran berhasil dihapus"
+        except Exception as e:
+            db.session.rollback()
+            return False, f"Error: {str(e)}"
+
+    @staticmethod
+    def get_course_outline(course_id):
+        """Get cached ordered topic/lesson skeleton of a course"""
+        return CourseOutlineService.get_outline(course_id)
+
+    @staticmethod
+    def get_lesson_navigation(course_id, lesson_id):
+        """
+        Get posisi lesson, prev/next lintas topic dan is_first dari index navigasi
+        yang dibangun bersama outline (ikut diinvalidasi saat urutan berubah)
+        """
+        outline = CourseOutlineService.get_outline(course_id)
+        if outline is None:
+            return None
+        return outline.get_navigation(lesson_id)
+
+    @staticmethod
+    def invalidate_course_outline(course_id):
+        """Invalidate cached outline after topic/lesson edits outside this service"""
+        CourseOutlineService.invalidate(course_id)
+
     @staticmethod
     def get_lessons_in_topic(topic_id):
         """Get all lessons in a topic"""
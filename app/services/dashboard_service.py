@@ -0,0 +1,110 @@
+from app import db
+from app.models.course import Course
+from app.models.progress import CourseProgressSummary
+from app.models.user import enrollments
+from app.services.progress_summary_service import ProgressSummaryService
+from app.services.course_outline import CourseOutlineService
+
+class DashboardService:
+    """Loader data dashboard siswa dengan jumlah query tetap"""
+
+    @staticmethod
+    def get_enrolled_courses_page(user_id, page=1, per_page=12):
+        """
+        Get satu halaman kursus yang diikuti user
+        Returns: (courses_list, total_count)
+        """
+        query = Course.query.join(
+            enrollments, enrollments.c.course_id == Course.id
+        ).filter(enrollments.c.user_id == user_id)
+
+        total_count = query.order_by(None).count()
+        courses = query.order_by(Course.created_at.desc(), Course.id.desc()).offset(
+            (page - 1) * per_page
+        ).limit(per_page).all()
+
+        return courses, total_count
+
+    @staticmethod
+    def get_first_lesson_ids(course_ids):
+        """Get lesson pertama per kursus dari outline (cache, satu query untuk semua miss)"""
+        outlines = CourseOutlineService.get_outlines(course_ids)
+        return {course_id: outline.first_lesson_id for course_id, outline in outlines.items()}
+
+    @staticmethod
+    def get_quick_stats(user_id):
+        """
+        Statistik ringkas semua kursus yang diikuti, dihitung dengan agregat SQL.
+        Kursus tanpa baris summary (belum di-backfill) dihitung di memori tanpa menulis.
+        Returns: (total_lessons_completed, total_lessons, avg_progress)
+        """
+        completed, total = db.session.query(
+            db.func.coalesce(db.func.sum(CourseProgressSummary.completed_lessons), 0),
+            db.func.coalesce(db.func.sum(CourseProgressSummary.total_lessons), 0)
+        ).join(
+            enrollments,
+            db.and_(
+                enrollments.c.user_id == CourseProgressSummary.user_id,
+                enrollments.c.course_id == CourseProgressSummary.course_id
+            )
+        ).filter(CourseProgressSummary.user_id == user_id).one()
+
+        completed, total = int(completed), int(total)
+
+        missing = [row[0] for row in db.session.query(enrollments.c.course_id).outerjoin(
+            CourseProgressSummary,
+            db.and_(
+                CourseProgressSummary.user_id == enrollments.c.user_id,
+                CourseProgressSummary.course_id == enrollments.c.course_id
+            )
+        ).filter(
+            enrollments.c.user_id == user_id,
+            CourseProgressSummary.course_id.is_(None)
+        ).all()]
+        for summary in ProgressSummaryService.compute_summaries(user_id, missing).values():
+            completed += summary.completed_lessons
+            total += summary.total_lessons
+
+        avg_progress = round((completed / total) * 100) if total > 0 else 0
+        return completed, total, avg_progress
+
+    @staticmethod
+    def load_dashboard(user_id, page=1, per_page=12):
+        """Kumpulkan semua data untuk main.dashboard"""
+        courses, total_courses = DashboardService.get_enrolled_courses_page(user_id, page, per_page)
+        course_ids = [course.id for course in courses]
+
+        summaries = ProgressSummaryService.get_summaries(user_id, course_ids)
+        first_lessons = DashboardService.get_first_lesson_ids(course_ids)
+
+        courses_with_progress = []
+        for course in courses:
+            summary = summaries.get(course.id)
+            progress = None
+            if summary is not None:
+                progress = {
+                    'course_id': course.id,
+                    'total_lessons': summary.total_lessons,
+                    'completed_lessons': summary.completed_lessons,
+                    'progress_percent': summary.percent,
+                    'first_lesson_id': first_lessons.get(course.id)
+                }
+            courses_with_progress.append({
+                'course': course,
+                'progress': progress
+            })
+
+        total_lessons_completed, total_lessons, avg_progress = DashboardService.get_quick_stats(user_id)
+        total_pages = (total_courses + per_page - 1) // per_page
+
+        return {
+            'courses_with_progress': courses_with_progress,
+            'total_enrolled': total_courses,
+            'total_lessons_completed': total_lessons_completed,
+            'total_lessons': total_lessons,
+            'avg_progress': avg_progress,
+            'current_page': page,
+            'total_pages': total_pages,
+            'has_prev': page > 1,
+            'has_next': page < total_pages
+        }
@@ -0,0 +1,142 @@
+from collections import namedtuple
+from app.services.ffmpeg_capabilities import ffmpeg_capabilities, H264_ENCODERS
+from app.services.video_pipeline import HLS_LADDER, _bits
+
+SourceInfo = namedtuple('SourceInfo', [
+    'width', 'height', 'fps', 'video_codec', 'pix_fmt', 'video_bitrate', 'audio_codec', 'duration'
+])
+
+# renditions: hasil fit() per rendition yang dipakai; remux: nama rendition yang cukup di-copy (-c copy)
+# video_encoder: encoder H.264 yang tersedia di build ffmpeg ini (registry kemampuan)
+EncodePlan = namedtuple('EncodePlan', ['source', 'renditions', 'remux', 'video_encoder'])
+
+EMPTY_SOURCE = SourceInfo(None, None, None, None, None, None, None, None)
+
+# Source yang boleh di-remux apa adanya: diputar semua browser tanpa re-encode
+REMUX_VIDEO_CODECS = {'h264'}
+REMUX_PIX_FMTS = {'yuv420p', 'yuvj420p'}
+REMUX_AUDIO_CODECS = {'aac'}
+
+
+def _number(value, cast=float):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _even(value, down=False):
+    """Ukuran genap (libx264 yuv420p menolak lebar/tinggi ganjil); down=True tidak pernah membesar"""
+    half = int(value // 2) if down else int(round(value / 2.0))
+    return max(half * 2, 2)
+
+
+class EncodePlanner:
+    """
+    Rencana encode berdasarkan source: satu kali ffprobe, hanya rendition yang tidak melebihi
+    resolusi source (aspect ratio dipertahankan), dan remux -c copy jika source sudah H.264/AAC.
+    """
+
+    @staticmethod
+    def source_from_metadata(metadata):
+        """Output ffprobe (MediaCompressionService.get_video_metadata) -> SourceInfo"""
+        video = audio = None
+        for stream in (metadata or {}).get('streams', []):
+            if stream.get('codec_type') == 'audio':
+                audio = audio or stream
+            elif stream.get('width') and video is None:
+                video = stream
+        if video is None:
+            return EMPTY_SOURCE._replace(audio_codec=audio.get('codec_name') if audio else None)
+
+        fmt = (metadata or {}).get('format') or {}
+        num, _, den = (video.get('r_frame_rate') or '').partition('/')
+        fps = _number(num)
+        if fps and den:
+            fps = fps / _number(den) if _number(den) else None
+
+        # Bitrate stream video tidak selalu ada (mis. MKV); pakai bitrate container sebagai perkiraan
+        bitrate = _number(video.get('bit_rate'), int) or _number(fmt.get('bit_rate'), int)
+
+        return SourceInfo(
+            width=int(video['width']),
+            height=int(video['height']),
+            fps=fps or None,
+            video_codec=video.get('codec_name'),
+            pix_fmt=video.get('pix_fmt'),
+            video_bitrate=bitrate,
+            audio_codec=audio.get('codec_name') if audio else None,
+            duration=_number(fmt.get('duration')) or _number(video.get('duration'))
+        )
+
+    @staticmethod
+    def probe(input_path):
+        from app.services.media_compression_service import MediaCompressionService
+        return EncodePlanner.source_from_metadata(MediaCompressionService.get_video_metadata(input_path))
+
+    @staticmethod
+    def fit(rendition, source):
+        """
+        Sesuaikan ukuran rendition ke aspect ratio source. rendition.height dibaca sebagai sisi pendek
+        (720p = sisi pendek 720, juga untuk video portrait); bitrate tidak melebihi bitrate source.
+        """
+        if not source.width or not source.height:
+            return rendition
+        short_side = min(source.width, source.height)
+        if rendition.height >= short_side:
+            # Ukuran source dibulatkan ke bawah ke genap (mis. 853x480 -> 852x480)
+            width, height = _even(source.width, down=True), _even(source.height, down=True)
+        else:
+            scale = rendition.height / float(short_side)
+            width, height = _even(source.width * scale), _even(source.height * scale)
+
+        video_bitrate = rendition.video_bitrate
+        if source.video_bitrate and source.video_bitrate < _bits(video_bitrate):
+            video_bitrate = str(source.video_bitrate)
+        return rendition._replace(width=width, height=height, video_bitrate=video_bitrate)
+
+    @staticmethod
+    def can_remux(source, rendition):
+        """Rendition setara source (ukuran genap sama, codec kompatibel, bitrate dalam batas) -> cukup -c copy"""
+        return (
+            source.video_codec in REMUX_VIDEO_CODECS
+            and source.width % 2 == 0 and source.height % 2 == 0
+            and (source.pix_fmt is None or source.pix_fmt in REMUX_PIX_FMTS)
+            and (source.audio_codec is None or source.audio_codec in REMUX_AUDIO_CODECS)
+            and (rendition.width, rendition.height) == (source.width, source.height)
+            and source.video_bitrate is not None
+            and source.video_bitrate <= _bits(rendition.video_bitrate)
+        )
+
+    @staticmethod
+    def video_encoder():
+        """Encoder H.264 software pertama yang tersedia; libx264 jika registry tidak tahu"""
+        return ffmpeg_capabilities.pick_encoder(H264_ENCODERS) or H264_ENCODERS[0]
+
+    @staticmethod
+    def plan(source, ladder=HLS_LADDER, allow_remux=True):
+        """
+        Rendition dari ladder dengan sisi pendek <= source; jika source lebih kecil dari semua
+        rendition, satu rendition di resolusi source (tidak pernah upscale).
+        Resolusi source tidak diketahui -> seluruh ladder apa adanya.
+        """
+        video_encoder = EncodePlanner.video_encoder()
+        if not source.width or not source.height:
+            return EncodePlan(source, tuple(ladder), frozenset(), video_encoder)
+
+        short_side = min(source.width, source.height)
+        selected = [rendition for rendition in ladder if rendition.height <= short_side] or list(ladder[:1])
+
+        renditions = []
+        for rendition in selected:
+            fitted = EncodePlanner.fit(rendition, source)
+            # Dua rendition yang berakhir di ukuran sama cukup satu
+            if renditions and (fitted.width, fitted.height) == (renditions[-1].width, renditions[-1].height):
+                continue
+            renditions.append(fitted)
+
+        remux = frozenset(
+            rendition.name for rendition in renditions
+            if allow_remux and ffmpeg_capabilities.has_muxer('mp4') and EncodePlanner.can_remux(source, rendition)
+        )
+        return EncodePlan(source, tuple(renditions), remux, video_encoder)
@@ -0,0 +1,140 @@
+import re
+import subprocess
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+Capabilities = namedtuple('Capabilities', [
+    'available', 'ffmpeg_version', 'ffprobe_version', 'encoders', 'muxers', 'probed_at', 'error'
+])
+
+# Urutan preferensi encoder software (tanpa akselerasi hardware) per codec
+H264_ENCODERS = ('libx264', 'libopenh264')
+VP9_ENCODERS = ('libvpx-vp9', 'libvpx')
+AAC_ENCODERS = ('aac', 'libfdk_aac')
+
+_VERSION = re.compile(r'^\S+ version (\S+)')
+
+
+def _run(cmd):
+    return subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+
+
+def parse_version(output):
+    """Baris pertama `ffmpeg -version` -> '6.1.1' (None jika tidak dikenali)"""
+    match = _VERSION.match((output or '').strip())
+    return match.group(1) if match else None
+
+
+def _listing(output):
+    """Baris (flags, nama) setelah baris pemisah legenda ('------' / '--') pada output -encoders/-muxers"""
+    listing = False
+    for line in (output or '').splitlines():
+        parts = line.split()
+        if not listing:
+            listing = bool(parts) and set(parts[0]) == {'-'}
+            continue
+        if len(parts) >= 2:
+            yield parts[0], parts[1]
+
+
+def parse_encoders(output):
+    """Output `ffmpeg -encoders` -> frozenset nama encoder"""
+    return frozenset(name for _, name in _listing(output))
+
+
+def parse_muxers(output):
+    """Output `ffmpeg -muxers` -> frozenset nama muxer ('mp4', 'hls', ...; alias dipisah koma)"""
+    names = set()
+    for flags, name in _listing(output):
+        if 'E' in flags:
+            names.update(name.split(','))
+    return frozenset(names)
+
+
+UNAVAILABLE = Capabilities(False, None, None, frozenset(), frozenset(), None, None)
+
+
+class FFmpegCapabilities:
+    """
+    Registry kemampuan ffmpeg/ffprobe per proses: versi, encoder dan muxer di-probe sekali
+    (saat startup jika FFMPEG_PROBE_ON_STARTUP, atau saat pertama dipakai) lalu dipakai ulang
+    oleh MediaCompressionService, EncodePlanner dan halaman status admin.
+    """
+
+    def __init__(self, app=None):
+        self._snapshot = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Snapshot tetap dipakai ulang antar init_app; proses worker (spawn) mem-probe sendiri saat pertama dipakai"""
+        app.extensions['ffmpeg_capabilities'] = self
+
+        if app.config.get('FFMPEG_PROBE_ON_STARTUP', False):
+            self.get()
+
+    def probe(self):
+        """Jalankan ffmpeg/ffprobe sekarang (tanpa cache). Returns: Capabilities"""
+        now = datetime.utcnow()
+        try:
+            ffmpeg_version = parse_version(_run(['ffmpeg', '-hide_banner', '-version']))
+            ffprobe_version = parse_version(_run(['ffprobe', '-hide_banner', '-version']))
+            encoders = parse_encoders(_run(['ffmpeg', '-hide_banner', '-encoders']))
+            muxers = parse_muxers(_run(['ffmpeg', '-hide_banner', '-muxers']))
+        except (subprocess.CalledProcessError, OSError) as e:
+            return UNAVAILABLE._replace(probed_at=now, error=str(e))
+        return Capabilities(True, ffmpeg_version, ffprobe_version, encoders, muxers, now, None)
+
+    def get(self):
+        """Snapshot ter-cache; probe hanya sekali per proses"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self.probe()
+                snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self):
+        """Probe ulang (mis. setelah ffmpeg di-install tanpa restart)"""
+        snapshot = self.probe()
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    @property
+    def available(self):
+        return self.get().available
+
+    def has_encoder(self, name):
+        return name in self.get().encoders
+
+    def has_muxer(self, name):
+        return name in self.get().muxers
+
+    def pick_encoder(self, candidates):
+        """Encoder pertama dari candidates yang tersedia (None jika tidak ada)"""
+        encoders = self.get().encoders
+        return next((name for name in candidates if name in encoders), None)
+
+    def to_dict(self):
+        snapshot = self.get()
+        return {
+            'available': snapshot.available,
+            'ffmpeg_version': snapshot.ffmpeg_version,
+            'ffprobe_version': snapshot.ffprobe_version,
+            'h264_encoder': self.pick_encoder(H264_ENCODERS),
+            'vp9_encoder': self.pick_encoder(VP9_ENCODERS),
+            'aac_encoder': self.pick_encoder(AAC_ENCODERS),
+            'hls': 'hls' in snapshot.muxers,
+            'mp4': 'mp4' in snapshot.muxers,
+            'encoders': len(snapshot.encoders),
+            'muxers': len(snapshot.muxers),
+            'probed_at': snapshot.probed_at.isoformat() if snapshot.probed_at else None,
+            'error': snapshot.error
+        }
+
+
+ffmpeg_capabilities = FFmpegCapabilities()
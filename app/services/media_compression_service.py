@@ -1,11 +1,12 @@
 import os
 import subprocess
-import threading
+import time
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from PIL import Image
 import json
 from flask import current_app
+from app.services.ffmpeg_capabilities import ffmpeg_capabilities
 
 class MediaCompressionService:
     """Service untuk kompresi media (video/gambar) dengan HLS dan Background Processing"""
@@ -24,23 +25,129 @@ class MediaCompressionService:
         return ext in allowed, f"File type .{ext} not allowed. Allowed: {allowed}"
     
     @staticmethod
-    def is_ffmpeg_available():
-        """Check if ffmpeg and ffprobe are installed and accessible"""
-        try:
-            subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-            subprocess.run(['ffprobe', '-version'], capture_output=True, check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+    def video_result_error(result):
+        """Pesan error jika HLS dan MP4 sama-sama gagal (video tidak bisa diputar), selain itu None"""
+        hls_result = (result or {}).get('hls') or {}
+        compress_result = (result or {}).get('compress') or {}
+        if hls_result.get('success') or compress_result.get('success'):
+            return None
+        messages = [r.get('message') for r in (hls_result, compress_result) if r.get('message')]
+        return '; '.join(dict.fromkeys(messages)) or 'Encode video gagal'
+
+    @staticmethod
+    def encode_lesson_video(lesson_id, input_path, compressed_folder, hls_folder, hls_segment_type='mpegts'):
+        """
+        Thumbnail + ladder HLS (+ satu MP4 fallback) tanpa akses DB, sehingga bisa dijalankan
+        di proses worker (lihat app/services/media_jobs.py).
+        Returns: dict hasil tiap tahap (thumbnail, compress, hls, timings);
+        raise RuntimeError jika HLS dan MP4 gagal, agar job dijadwalkan ulang/ditandai gagal
+        """
+        result = None
+        if ffmpeg_capabilities.available:
+            # Satu decode untuk semua output; jalur multi-pass hanya sebagai fallback
+            from app.services.video_pipeline import VideoPipeline
+            from app.services.encode_planner import EncodePlanner
+            try:
+                result = VideoPipeline.encode(
+                    input_path, compressed_folder, hls_folder, lesson_id, segment_type=hls_segment_type,
+                    plan=EncodePlanner.plan(EncodePlanner.probe(input_path))
+                )
+            except Exception as e:
+                print(f"Single-pass Encode Error: {str(e)}")
+        if result is None:
+            result = MediaCompressionService.encode_multi_pass(
+                lesson_id, input_path, compressed_folder, hls_folder, hls_segment_type
+            )
+
+        error = MediaCompressionService.video_result_error(result)
+        if error:
+            raise RuntimeError(error)
+        return result
+
+    @staticmethod
+    def encode_multi_pass(lesson_id, input_path, compressed_folder, hls_folder, hls_segment_type='mpegts'):
+        """Jalur lama: thumbnail, tiap kualitas MP4 dan HLS masing-masing men-decode source"""
+        from app.services.encode_planner import EncodePlanner
+
+        timings = {}
+        result = {}
+        started = time.perf_counter()
+        source = EncodePlanner.probe(input_path)
+        timings['probe'] = time.perf_counter() - started
+        for stage, run in (
+            ('thumbnail', lambda: MediaCompressionService.generate_video_thumbnail(input_path, compressed_folder, lesson_id)),
+            ('compress', lambda: MediaCompressionService.compress_video(input_path, compressed_folder, source=source)),
+            ('hls', lambda: MediaCompressionService.generate_hls(
+                input_path, hls_folder, lesson_id, hls_segment_type, source=source
+            ))
+        ):
+            started = time.perf_counter()
+            result[stage] = run()
+            timings[stage] = time.perf_counter() - started
+        timings['total'] = sum(timings.values())
+        result['timings'] = timings
+        return result
+
+    @staticmethod
+    def apply_video_result(lesson, result, user_id):
+        """Simpan hasil encode_lesson_video ke lesson dan tambahkan notifikasi (tanpa commit)"""
+        from app.models.notification import Notification
+        from app import db
+
+        thumb_result = result.get('thumbnail') or {}
+        if thumb_result.get('success'):
+            lesson.compressed_image = thumb_result['thumbnail_path']
+
+        compress_result = result.get('compress') or {}
+        if compress_result.get('success'):
+            lesson.compressed_video_versions = compress_result['versions']
+            lesson.compression_metadata = {
+                'original_size': compress_result['original_size'],
+                'total_compressed_size': compress_result['total_compressed_size'],
+                'compression_ratio': compress_result['compression_ratio']
+            }
+
+        hls_result = result.get('hls') or {}
+        if hls_result.get('success'):
+            lesson.hls_path = hls_result['playlist_path']
+
+        if result.get('timings'):
+            lesson.compression_metadata = dict(lesson.compression_metadata or {}, timings={
+                stage: round(seconds, 3) for stage, seconds in result['timings'].items()
+            })
+
+        lesson.compression_status = 'completed'
+
+        # Add notification (di-push ke stream SSE setelah commit, lihat NotificationService)
+        db.session.add(Notification(
+            user_id=user_id,
+            message=f"Video untuk pelajaran '{lesson.title}' berhasil diproses!",
+            type='success',
+            link=f"/admin/course/{lesson.topic.course_id}"
+        ))
+
+    @staticmethod
+    def apply_video_failure(lesson, error, user_id):
+        """Tandai lesson gagal diproses dan tambahkan notifikasi (tanpa commit)"""
+        from app.models.notification import Notification
+        from app import db
+
+        lesson.compression_status = 'failed'
+        lesson.compression_metadata = {'error': str(error)}
+        db.session.add(Notification(
+            user_id=user_id,
+            message=f"Gagal memproses video '{lesson.title}': {str(error)}",
+            type='danger'
+        ))
 
     @staticmethod
     def process_video_background(app, lesson_id, input_path, compressed_folder, hls_folder, user_id):
         """
-        Background task untuk memproses video (Compression + HLS + Thumbnail)
+        Proses video secara sinkron di thread pemanggil (Compression + HLS + Thumbnail).
+        Upload dari admin memakai antrian media_job; fungsi ini untuk pemrosesan manual.
         """
         with app.app_context():
             from app.models.lesson import Lesson
-            from app.models.notification import Notification
             from app import db
             
             lesson = Lesson.query.get(lesson_id)
@@ -51,57 +158,22 @@ class MediaCompressionService:
                 lesson.compression_status = 'processing'
                 db.session.commit()
                 
-                # 1. Generate Thumbnail
-                thumb_result = MediaCompressionService.generate_video_thumbnail(input_path, compressed_folder, lesson_id)
-                if thumb_result['success']:
-                    lesson.compressed_image = thumb_result['thumbnail_path']
-                    db.session.commit()
-                
-                # 2. Standard Compression (Multiple Qualities)
-                compress_result = MediaCompressionService.compress_video(input_path, compressed_folder)
-                
-                if compress_result['success']:
-                    lesson.compressed_video_versions = compress_result['versions']
-                    lesson.compression_metadata = {
-                        'original_size': compress_result['original_size'],
-                        'total_compressed_size': compress_result['total_compressed_size'],
-                        'compression_ratio': compress_result['compression_ratio']
-                    }
-                
-                # 3. HLS Generation (Adaptive Streaming)
-                hls_result = MediaCompressionService.generate_hls(input_path, hls_folder, lesson_id)
-                if hls_result['success']:
-                    lesson.hls_path = hls_result['playlist_path']
-                
-                lesson.compression_status = 'completed'
-                
-                # Add notification
-                notif = Notification(
-                    user_id=user_id,
-                    message=f"Video untuk pelajaran '{lesson.title}' berhasil diproses!",
-                    type='success',
-                    link=f"/admin/course/{lesson.topic.course_id}"
+                result = MediaCompressionService.encode_lesson_video(
+                    lesson_id, input_path, compressed_folder, hls_folder
                 )
-                db.session.add(notif)
+                MediaCompressionService.apply_video_result(lesson, result, user_id)
                 db.session.commit()
                 
             except Exception as e:
-                lesson.compression_status = 'failed'
-                lesson.compression_metadata = {'error': str(e)}
-                
-                notif = Notification(
-                    user_id=user_id,
-                    message=f"Gagal memproses video '{lesson.title}': {str(e)}",
-                    type='danger'
-                )
-                db.session.add(notif)
+                db.session.rollback()
+                MediaCompressionService.apply_video_failure(lesson, e, user_id)
                 db.session.commit()
                 print(f"Background Video Processing Error: {str(e)}")
 
     @staticmethod
     def generate_video_thumbnail(input_path, output_folder, lesson_id):
         """Ambil 1 frame dari video sebagai thumbnail (poster)"""
-        if not MediaCompressionService.is_ffmpeg_available():
+        if not ffmpeg_capabilities.available:
             return {'success': False, 'message': 'FFmpeg not available'}
             
         try:
@@ -126,38 +198,48 @@ class MediaCompressionService:
             return {'success': False, 'message': str(e)}
 
     @staticmethod
-    def compress_video(input_path, output_folder):
-        """Compress video ke berbagai kualitas (MP4)"""
-        if not MediaCompressionService.is_ffmpeg_available():
+    def compress_video(input_path, output_folder, source=None):
+        """
+        Compress video ke berbagai kualitas (MP4), hanya kualitas yang tidak melebihi resolusi source.
+        Kualitas yang setara source H.264/AAC di-remux (-c copy) tanpa re-encode.
+        source: SourceInfo dari EncodePlanner.probe (di-probe jika None)
+        """
+        from app.services.encode_planner import EncodePlanner
+        from app.services.video_pipeline import DEFAULT_RENDITIONS, video_encoder_args
+
+        if not ffmpeg_capabilities.available:
             return {'success': False, 'message': 'FFmpeg tidak ditemukan.'}
         
         try:
             original_size = os.path.getsize(input_path)
             base_name = os.path.splitext(os.path.basename(input_path))[0]
             versions = {}
+
+            if source is None:
+                source = EncodePlanner.probe(input_path)
+            plan = EncodePlanner.plan(source, DEFAULT_RENDITIONS)
             
-            # Quality presets
-            presets = {
-                'low': {'bitrate': '500k', 'scale': '480:270', 'crf': 28},
-                'medium': {'bitrate': '1500k', 'scale': '1280:720', 'crf': 23},
-                'high': {'bitrate': '3000k', 'scale': '1920:1080', 'crf': 20}
-            }
-            
-            for quality_name, settings in presets.items():
-                output_file = os.path.join(output_folder, f"{base_name}_{quality_name}.mp4")
+            for rendition in plan.renditions:
+                output_file = os.path.join(output_folder, f"{base_name}_{rendition.name}.mp4")
                 
-                cmd = [
-                    'ffmpeg', '-i', input_path,
-                    '-vf', f"scale={settings['scale']}",
-                    '-c:v', 'libx264', '-b:v', settings['bitrate'],
-                    '-crf', str(settings['crf']), '-preset', 'veryfast',
-                    '-c:a', 'aac', '-b:a', '128k', '-y', output_file
-                ]
+                if rendition.name in plan.remux:
+                    cmd = [
+                        'ffmpeg', '-i', input_path,
+                        '-map', '0:v:0', '-map', '0:a:0?', '-c', 'copy',
+                        '-movflags', '+faststart', '-y', output_file
+                    ]
+                else:
+                    cmd = [
+                        'ffmpeg', '-i', input_path,
+                        '-vf', f"scale={rendition.width}:{rendition.height}"
+                    ] + video_encoder_args(plan.video_encoder, rendition) + [
+                        '-c:a', 'aac', '-b:a', rendition.audio_bitrate, '-y', output_file
+                    ]
                 
                 subprocess.run(cmd, capture_output=True, check=True)
                 
                 if os.path.exists(output_file):
-                    versions[quality_name] = f"uploads/compressed/{os.path.basename(output_file)}"
+                    versions[rendition.name] = f"uploads/compressed/{os.path.basename(output_file)}"
             
             total_compressed = sum(os.path.getsize(os.path.join(output_folder, os.path.basename(v))) for v in versions.values()) if versions else 0
             
@@ -166,36 +248,89 @@ class MediaCompressionService:
                 'original_size': original_size,
                 'total_compressed_size': total_compressed,
                 'compression_ratio': round((1 - total_compressed/original_size) * 100, 2) if original_size > 0 else 0,
-                'versions': versions
+                'versions': versions,
+                'remuxed': sorted(plan.remux),
+                'message': f"{len(versions)} versi video dibuat" if versions else 'Tidak ada versi video yang dibuat.'
             }
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
     @staticmethod
-    def generate_hls(input_path, output_root, lesson_id):
-        """Generate HLS (m3u8) dengan adaptive bitrate"""
-        if not MediaCompressionService.is_ffmpeg_available():
+    def generate_hls(input_path, output_root, lesson_id, segment_type='mpegts', source=None):
+        """
+        Generate HLS adaptive bitrate: ladder 270p-1080p (tanpa rendition di atas resolusi source)
+        dalam satu invocation ffmpeg, keyframe sejajar antar varian, plus master playlist.
+        segment_type: 'mpegts' atau 'fmp4' (CMAF, .m4s + init.mp4)
+        source: SourceInfo dari EncodePlanner.probe (di-probe jika None)
+        """
+        from app.services.encode_planner import EncodePlanner
+        from app.services.video_pipeline import VideoPipeline, SEGMENT_TYPES, keyframe_args, video_encoder_args
+
+        if not ffmpeg_capabilities.available:
             return {'success': False, 'message': 'FFmpeg not available'}
-            
+        if segment_type not in SEGMENT_TYPES:
+            return {'success': False, 'message': f'segment_type tidak dikenal: {segment_type}'}
+
         try:
+            if source is None:
+                source = EncodePlanner.probe(input_path)
+            # Semua varian di-encode (tanpa remux) agar keyframe sejajar
+            plan = EncodePlanner.plan(source, allow_remux=False)
+            renditions = plan.renditions
+            fps = source.fps
+            # Probe gagal (source tidak dikenal): anggap ada audio seperti perilaku lama
+            has_audio = source.audio_codec is not None or source.width is None
+
             hls_dir = os.path.join(output_root, f"lesson_{lesson_id}")
-            os.makedirs(hls_dir, exist_ok=True)
-            
+            for rendition in renditions:
+                os.makedirs(os.path.join(hls_dir, rendition.name), exist_ok=True)
+
             playlist_name = "playlist.m3u8"
-            output_path = os.path.join(hls_dir, playlist_name)
-            
-            cmd = [
-                'ffmpeg', '-i', input_path,
-                '-profile:v', 'baseline', '-level', '3.0',
-                '-s', '1280x720', '-start_number', '0',
-                '-hls_time', '10', '-hls_list_size', '0',
-                '-f', 'hls', '-y', output_path
+            hls_time = VideoPipeline.HLS_TIME
+            extension = 'm4s' if segment_type == 'fmp4' else 'ts'
+
+            graph = [f"[0:v]split={len(renditions)}" + ''.join(f'[s{i}]' for i in range(len(renditions)))]
+            graph += [f'[s{i}]scale={r.width}:{r.height}[v{i}]' for i, r in enumerate(renditions)]
+
+            cmd = ['ffmpeg', '-y', '-i', input_path, '-filter_complex', ';'.join(graph)]
+            for i in range(len(renditions)):
+                cmd += ['-map', f'[v{i}]']
+            if has_audio:
+                for _ in renditions:
+                    cmd += ['-map', '0:a:0']
+
+            cmd += keyframe_args(hls_time, fps)
+            for i, rendition in enumerate(renditions):
+                cmd += video_encoder_args(plan.video_encoder, rendition, f':v:{i}')
+                if has_audio:
+                    cmd += [f'-b:a:{i}', rendition.audio_bitrate]
+            if has_audio:
+                cmd += ['-c:a', 'aac']
+
+            stream_map = ' '.join(
+                f'v:{i},a:{i},name:{r.name}' if has_audio else f'v:{i},name:{r.name}'
+                for i, r in enumerate(renditions)
+            )
+            cmd += [
+                '-f', 'hls', '-hls_time', str(hls_time), '-hls_playlist_type', 'vod', '-hls_list_size', '0',
+                '-hls_segment_type', segment_type,
+                '-hls_segment_filename', os.path.join(hls_dir, '%v', f'segment_%03d.{extension}'),
+                '-master_pl_name', playlist_name,
+                '-var_stream_map', stream_map
             ]
-            
+            if segment_type == 'fmp4':
+                cmd += ['-hls_fmp4_init_filename', 'init.mp4']
+            cmd.append(os.path.join(hls_dir, '%v', 'index.m3u8'))
+
             subprocess.run(cmd, capture_output=True, check=True)
-            
+
             relative_path = f"uploads/hls/lesson_{lesson_id}/{playlist_name}"
-            return {'success': True, 'playlist_path': relative_path}
+            return {
+                'success': True,
+                'playlist_path': relative_path,
+                'variants': [r.name for r in renditions],
+                'segment_type': segment_type
+            }
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
@@ -224,10 +359,10 @@ class MediaCompressionService:
 
     @staticmethod
     def get_video_metadata(video_path):
-        if not MediaCompressionService.is_ffmpeg_available():
+        if not ffmpeg_capabilities.available:
             return {}
         try:
-            cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration : stream=width,height', '-of', 'json', video_path]
+            cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration,bit_rate:stream=codec_type,codec_name,pix_fmt,width,height,r_frame_rate,bit_rate,duration', '-of', 'json', video_path]
             result = subprocess.run(cmd, capture_output=True, text=True)
             return json.loads(result.stdout) if result.stdout else {}
         except:
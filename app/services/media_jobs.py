@@ -0,0 +1,382 @@
+import atexit
+import importlib
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.lesson import Lesson
+from app.models.media_job import MediaJob
+from app.services.media_compression_service import MediaCompressionService
+
+DEFAULT_ENCODER = 'app.services.media_compression_service:MediaCompressionService.encode_lesson_video'
+
+
+def load_encoder(path):
+    """'modul:Atribut.atribut' -> callable"""
+    module_name, _, attr = path.partition(':')
+    target = importlib.import_module(module_name)
+    for name in attr.split('.'):
+        target = getattr(target, name)
+    return target
+
+
+def run_encoder(encoder_path, lesson_id, payload):
+    """Dijalankan di proses worker: tidak menyentuh DB, hanya mengembalikan hasil encode"""
+    return load_encoder(encoder_path)(lesson_id=lesson_id, **payload)
+
+
+class MediaJobService:
+    """Operasi antrian media_job: enqueue, claim, heartbeat, selesai/gagal, pemulihan job macet"""
+
+    MAX_BACKOFF = 3600
+
+    @staticmethod
+    def enqueue(lesson_id, user_id, input_path, compressed_folder, hls_folder, priority=0, max_attempts=None,
+                hls_segment_type=None):
+        """
+        Masukkan video lesson ke antrian; job lama lesson yang sama yang belum selesai dibatalkan.
+        Tidak melakukan commit.
+        """
+        now = datetime.utcnow()
+        MediaJob.query.filter(
+            MediaJob.lesson_id == lesson_id,
+            MediaJob.status.in_([MediaJob.STATUS_QUEUED, MediaJob.STATUS_RUNNING])
+        ).update({
+            MediaJob.status: MediaJob.STATUS_FAILED,
+            MediaJob.finished_at: now,
+            MediaJob.last_error: 'Digantikan upload baru'
+        }, synchronize_session=False)
+
+        job = MediaJob(
+            lesson_id=lesson_id,
+            user_id=user_id,
+            payload={
+                'input_path': input_path,
+                'compressed_folder': compressed_folder,
+                'hls_folder': hls_folder,
+                'hls_segment_type': hls_segment_type or current_app.config.get('HLS_SEGMENT_TYPE', 'mpegts')
+            },
+            status=MediaJob.STATUS_QUEUED,
+            priority=priority,
+            max_attempts=max_attempts or current_app.config.get('MEDIA_JOB_MAX_ATTEMPTS', 3),
+            run_after=now,
+            created_at=now
+        )
+        db.session.add(job)
+        db.session.flush()
+        return job
+
+    @staticmethod
+    def claim(worker_id, now=None):
+        """
+        Ambil satu job siap jalan (prioritas tertinggi, lalu terlama).
+        SKIP LOCKED agar beberapa worker tidak mengambil job yang sama.
+        Returns: (job_id, lesson_id, payload) | None
+        """
+        now = now or datetime.utcnow()
+        try:
+            job = MediaJob.query.filter(
+                MediaJob.status == MediaJob.STATUS_QUEUED,
+                MediaJob.run_after <= now
+            ).order_by(
+                MediaJob.priority.desc(), MediaJob.id
+            ).with_for_update(skip_locked=True).first()
+            if job is None:
+                db.session.commit()
+                return None
+
+            job.status = MediaJob.STATUS_RUNNING
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.started_at = job.heartbeat_at = now
+            claimed = (job.id, job.lesson_id, dict(job.payload))
+
+            db.session.query(Lesson).filter(Lesson.id == job.lesson_id).update(
+                {Lesson.compression_status: 'processing'}, synchronize_session=False
+            )
+            db.session.commit()
+            return claimed
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def heartbeat(worker_id, job_ids, now=None):
+        """Perbarui heartbeat semua job yang sedang dikerjakan worker ini (satu UPDATE)"""
+        if not job_ids:
+            return 0
+        updated = MediaJob.query.filter(
+            MediaJob.id.in_(list(job_ids)),
+            MediaJob.status == MediaJob.STATUS_RUNNING,
+            MediaJob.locked_by == worker_id
+        ).update({MediaJob.heartbeat_at: now or datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        return updated
+
+    @staticmethod
+    def _locked_job(job_id, worker_id):
+        return MediaJob.query.filter(
+            MediaJob.id == job_id,
+            MediaJob.status == MediaJob.STATUS_RUNNING,
+            MediaJob.locked_by == worker_id
+        ).with_for_update().first()
+
+    @staticmethod
+    def complete(job_id, worker_id, result, now=None):
+        """
+        Tandai selesai dan simpan hasil ke lesson dalam satu transaksi.
+        Hasil dibuang jika job sudah dibatalkan/diambil alih worker lain. Returns: bool
+        """
+        now = now or datetime.utcnow()
+        try:
+            job = MediaJobService._locked_job(job_id, worker_id)
+            if job is None:
+                db.session.commit()
+                return False
+
+            job.status = MediaJob.STATUS_DONE
+            job.finished_at = job.heartbeat_at = now
+            job.last_error = None
+            lesson = Lesson.query.get(job.lesson_id)
+            if lesson is not None:
+                MediaCompressionService.apply_video_result(lesson, result, job.user_id)
+            db.session.commit()
+            return True
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def fail(job_id, worker_id, error, backoff=30, now=None):
+        """Catat kegagalan; dijadwalkan ulang dengan backoff eksponensial sampai max_attempts. Returns: bool"""
+        try:
+            job = MediaJobService._locked_job(job_id, worker_id)
+            if job is None:
+                db.session.commit()
+                return False
+            MediaJobService._retry_or_fail(job, error, backoff, now or datetime.utcnow())
+            db.session.commit()
+            return True
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def recover_stale(stale_timeout, backoff=30, now=None):
+        """
+        Job running yang heartbeat-nya berhenti (worker crash/restart) dijadwalkan ulang
+        atau digagalkan jika percobaan habis. Returns: jumlah job yang dipulihkan
+        """
+        now = now or datetime.utcnow()
+        try:
+            jobs = MediaJob.query.filter(
+                MediaJob.status == MediaJob.STATUS_RUNNING,
+                MediaJob.heartbeat_at < now - timedelta(seconds=stale_timeout)
+            ).with_for_update(skip_locked=True).all()
+            for job in jobs:
+                MediaJobService._retry_or_fail(job, f'Heartbeat worker {job.locked_by} berhenti', backoff, now)
+            db.session.commit()
+            return len(jobs)
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def _retry_or_fail(job, error, backoff, now):
+        job.last_error = str(error)
+        job.locked_by = None
+        lesson = Lesson.query.get(job.lesson_id)
+
+        if job.attempts < job.max_attempts:
+            delay = min(backoff * 2 ** max(job.attempts - 1, 0), MediaJobService.MAX_BACKOFF)
+            job.status = MediaJob.STATUS_QUEUED
+            job.run_after = now + timedelta(seconds=delay)
+            if lesson is not None:
+                lesson.compression_status = 'pending'
+        else:
+            job.status = MediaJob.STATUS_FAILED
+            job.finished_at = now
+            if lesson is not None:
+                MediaCompressionService.apply_video_failure(lesson, error, job.user_id)
+
+    @staticmethod
+    def stats():
+        """Jumlah job per status"""
+        rows = db.session.query(MediaJob.status, db.func.count(MediaJob.id)).group_by(MediaJob.status).all()
+        return {status: count for status, count in rows}
+
+
+class MediaJobRunner:
+    """
+    Dispatcher antrian media_job: claim job sebanyak slot kosong, jalankan encoder di
+    process pool (dibatasi MEDIA_JOB_CONCURRENCY), kirim heartbeat, dan pulihkan job
+    yang macet. Semua akses DB terjadi di proses ini; proses worker hanya menjalankan ffmpeg.
+    """
+
+    def __init__(self, app=None, concurrency=2, executor='process'):
+        self.app = None
+        self.enabled = False
+        self.concurrency = concurrency
+        self.executor_type = executor
+        self.encoder = DEFAULT_ENCODER
+        self.poll_interval = 2.0
+        self.heartbeat_interval = 10.0
+        self.stale_timeout = 120.0
+        self.backoff = 30.0
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{id(self):x}'
+
+        self._executor = None
+        self._running = {}  # job_id -> Future
+        self._last_heartbeat = 0.0
+        self._last_recovery = 0.0
+        self._lock = threading.Lock()
+        self._tick_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = {'claimed': 0, 'done': 0, 'failed': 0, 'recovered': 0}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Baca konfigurasi; dispatcher dimulai saat request pertama jika MEDIA_JOB_WORKER_ENABLED"""
+        self.app = app
+        self.enabled = app.config.get('MEDIA_JOB_WORKER_ENABLED', False)
+        self.concurrency = app.config.get('MEDIA_JOB_CONCURRENCY', self.concurrency)
+        self.executor_type = app.config.get('MEDIA_JOB_EXECUTOR', self.executor_type)
+        self.encoder = app.config.get('MEDIA_JOB_ENCODER') or DEFAULT_ENCODER
+        self.poll_interval = app.config.get('MEDIA_JOB_POLL_INTERVAL', self.poll_interval)
+        self.heartbeat_interval = app.config.get('MEDIA_JOB_HEARTBEAT_INTERVAL', self.heartbeat_interval)
+        self.stale_timeout = app.config.get('MEDIA_JOB_STALE_TIMEOUT', self.stale_timeout)
+        self.backoff = app.config.get('MEDIA_JOB_RETRY_BACKOFF', self.backoff)
+        app.extensions['media_jobs'] = self
+
+        if self.enabled:
+            # Tidak start saat import/CLI (flask db upgrade), hanya di proses yang melayani request
+            app.before_request(self.start)
+            atexit.register(self.stop)
+
+    # ---- eksekusi ----
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.executor_type == 'process':
+                # spawn: aman dari thread lain yang sedang memegang lock saat fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.concurrency, mp_context=multiprocessing.get_context('spawn')
+                )
+            elif self.executor_type == 'thread':
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='media-job')
+            else:
+                raise ValueError(f"MEDIA_JOB_EXECUTOR tidak dikenal: {self.executor_type}")
+        return self._executor
+
+    def _finish(self, job_id, future):
+        try:
+            result = future.result()
+            # Encoder yang melaporkan kegagalan lewat hasil (tanpa raise) tetap masuk jalur retry
+            error = MediaCompressionService.video_result_error(result)
+            if error:
+                raise RuntimeError(error)
+        except Exception as e:
+            if MediaJobService.fail(job_id, self.worker_id, e, self.backoff):
+                with self._lock:
+                    self._stats['failed'] += 1
+            if isinstance(e, BrokenProcessPool):
+                # Proses worker mati (misal OOM): buat pool baru untuk job berikutnya
+                self._executor = None
+            return
+        if MediaJobService.complete(job_id, self.worker_id, result):
+            with self._lock:
+                self._stats['done'] += 1
+
+    def tick(self):
+        """
+        Satu putaran dispatcher (butuh app context): selesaikan job yang sudah jadi,
+        heartbeat, pulihkan job macet, lalu claim job baru sampai slot penuh.
+        Returns: jumlah job yang diklaim
+        """
+        with self._tick_lock:
+            for job_id, future in list(self._running.items()):
+                if future.done():
+                    del self._running[job_id]
+                    self._finish(job_id, future)
+
+            now = time.monotonic()
+            if self._running and now - self._last_heartbeat >= self.heartbeat_interval:
+                MediaJobService.heartbeat(self.worker_id, self._running.keys())
+                self._last_heartbeat = now
+            if now - self._last_recovery >= self.stale_timeout / 2:
+                recovered = MediaJobService.recover_stale(self.stale_timeout, self.backoff)
+                self._last_recovery = now
+                with self._lock:
+                    self._stats['recovered'] += recovered
+
+            claimed = 0
+            while len(self._running) < self.concurrency:
+                job = MediaJobService.claim(self.worker_id)
+                if job is None:
+                    break
+                job_id, lesson_id, payload = job
+                self._running[job_id] = self._get_executor().submit(run_encoder, self.encoder, lesson_id, payload)
+                claimed += 1
+            with self._lock:
+                self._stats['claimed'] += claimed
+            return claimed
+
+    def run_until_idle(self, timeout=None):
+        """Proses antrian sampai kosong (CLI/test). Job dengan backoff di masa depan tidak ditunggu"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            self.tick()
+            if not self._running:
+                return
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError('Antrian media_job belum selesai')
+            time.sleep(min(self.poll_interval, 0.05))
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+        data['running'] = len(self._running)
+        data['dispatcher_alive'] = self._thread is not None and self._thread.is_alive()
+        return data
+
+    # ---- thread dispatcher ----
+
+    def start(self):
+        """Jalankan thread dispatcher (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='media-job-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Hentikan dispatcher; job yang sedang jalan dipulihkan runner lain lewat heartbeat timeout"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                with self.app.app_context():
+                    self.tick()
+            except Exception as e:
+                print(f"Media Job Dispatcher Error: {str(e)}")
+            self._stop_event.wait(self.poll_interval)
+
+
+media_job_runner = MediaJobRunner()
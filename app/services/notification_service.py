@@ -0,0 +1,157 @@
+import threading
+from sqlalchemy import event
+from flask import current_app
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.extensions.cache import cache
+from app.extensions.pubsub import pubsub, RESYNC
+from app.models.notification import Notification
+
+_listening = False
+_listen_lock = threading.Lock()
+
+
+class NotificationService:
+    """Query notifikasi, unread count ter-cache, dan push ke subscriber (SSE) setelah commit"""
+
+    STREAM_BATCH_SIZE = 100
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    UNREAD_COUNT_NAMESPACE = 'notification_unread'
+
+    @staticmethod
+    def channel(user_id):
+        return f'notifications:{user_id}'
+
+    @staticmethod
+    def to_dict(notification):
+        return {
+            'id': notification.id,
+            'message': notification.message,
+            'type': notification.type,
+            'link': notification.link,
+            'created_at': notification.created_at.isoformat() if notification.created_at else None
+        }
+
+    @staticmethod
+    def get_unread_since(user_id, since_id=0, limit=None):
+        """Notifikasi belum dibaca dengan id > since_id, urut naik (delta untuk resume SSE)"""
+        return Notification.query.filter(
+            Notification.user_id == user_id,
+            Notification.is_read == False,
+            Notification.id > (since_id or 0)
+        ).order_by(Notification.id).limit(limit or NotificationService.STREAM_BATCH_SIZE).all()
+
+    @staticmethod
+    def get_notifications(user_id, since_id=None, before_id=None, limit=None, unread_only=True):
+        """
+        Satu halaman notifikasi, terbaru dulu (keyset pada id).
+        since_id: hanya yang lebih baru dari id ini (polling delta)
+        before_id: halaman berikutnya, lebih lama dari id ini
+        Returns: (list Notification, next_before_id | None)
+        """
+        limit = min(max(limit or NotificationService.DEFAULT_PAGE_SIZE, 1), NotificationService.MAX_PAGE_SIZE)
+        query = Notification.query.filter(Notification.user_id == user_id)
+        if unread_only:
+            query = query.filter(Notification.is_read == False)
+        if since_id:
+            query = query.filter(Notification.id > since_id)
+        if before_id:
+            query = query.filter(Notification.id < before_id)
+
+        # Ambil satu baris lebih untuk tahu apakah masih ada halaman berikutnya
+        rows = query.order_by(Notification.id.desc()).limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, rows[-1].id
+        return rows, None
+
+    @staticmethod
+    def _count_unread(user_id):
+        return db.session.query(db.func.count(Notification.id)).filter(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        ).scalar() or 0
+
+    @staticmethod
+    def get_unread_count(user_id):
+        return cache.get_or_set(
+            NotificationService.UNREAD_COUNT_NAMESPACE, user_id,
+            lambda: NotificationService._count_unread(user_id),
+            timeout=current_app.config.get('NOTIFICATION_UNREAD_CACHE_TTL')
+        )
+
+    @staticmethod
+    def invalidate_unread_count(user_ids):
+        for user_id in set(user_ids):
+            cache.delete(NotificationService.UNREAD_COUNT_NAMESPACE, user_id)
+
+    @staticmethod
+    def mark_read(user_id, ids=None, before_id=None):
+        """
+        Tandai dibaca dalam satu UPDATE: daftar ids, atau semua yang id < before_id.
+        Notifikasi milik user lain diabaikan. Returns: jumlah baris yang berubah
+        """
+        if ids is None and before_id is None:
+            return 0
+        query = Notification.query.filter(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        )
+        if ids is not None:
+            if not ids:
+                return 0
+            query = query.filter(Notification.id.in_(ids))
+        if before_id is not None:
+            query = query.filter(Notification.id < before_id)
+
+        try:
+            updated = query.update({Notification.is_read: True}, synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if updated:
+            NotificationService.invalidate_unread_count([user_id])
+        return updated
+
+    @staticmethod
+    def publish_resync(user_ids):
+        """Untuk insert bulk tanpa ORM: subscriber mengambil delta sendiri dari DB"""
+        user_ids = set(user_ids)
+        NotificationService.invalidate_unread_count(user_ids)
+        for user_id in user_ids:
+            pubsub.publish(NotificationService.channel(user_id), RESYNC)
+
+    @staticmethod
+    def init_app(app):
+        """Daftarkan event ORM: Notification yang di-insert di-publish setelah transaksi commit"""
+        global _listening
+        with _listen_lock:
+            if _listening:
+                return
+            event.listen(Notification, 'after_insert', _collect_notification)
+            event.listen(Session, 'after_commit', _publish_pending)
+            event.listen(Session, 'after_rollback', _discard_pending)
+            _listening = True
+
+
+def _collect_notification(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.user_id is not None:
+        session.info.setdefault('pending_notifications', []).append(
+            (target.user_id, NotificationService.to_dict(target))
+        )
+
+
+def _publish_pending(session):
+    pending = session.info.pop('pending_notifications', None)
+    if not pending:
+        return
+    NotificationService.invalidate_unread_count(user_id for user_id, _ in pending)
+    for user_id, payload in pending:
+        pubsub.publish(NotificationService.channel(user_id), payload)
+
+
+def _discard_pending(session):
+    session.info.pop('pending_notifications', None)
@@ -1,35 +1,45 @@
 from app import db
-from app.models.progress import LessonProgress
+from app.models.progress import LessonProgress, CourseProgressSummary
 from app.models.lesson import Lesson
+from app.services.progress_engine import ProgressEngine
+from app.services.progress_summary_service import ProgressSummaryService
+from app.services.progress_buffer import progress_buffer
+from app.utils.db_upsert import upsert
 from datetime import datetime
 
 class ProgressService:
     """Service layer for tracking user progress"""
 
+    @staticmethod
+    def _upsert_progress(user_id, lesson_id, **values):
+        """Tulis lesson_progress dengan satu statement upsert (tanpa SELECT dulu)"""
+        row = {
+            'user_id': user_id,
+            'lesson_id': lesson_id,
+            'is_completed': False,
+            'video_timestamp': 0,
+            'trial_cancelled': False,
+            'last_accessed': datetime.utcnow()
+        }
+        row.update(values)
+        upsert(
+            LessonProgress, row,
+            index_elements=('user_id', 'lesson_id'),
+            update_columns=tuple(values) + ('last_accessed',)
+        )
+
     @staticmethod
     def track_lesson_progress(user_id, lesson_id, is_completed=False, video_timestamp=0):
         """Track or update lesson progress for a user"""
-        
-        # Check if progress record exists
-        progress = LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson_id).first()
-        
-        if progress:
-            # Update existing progress
-            progress.is_completed = is_completed
-            progress.video_timestamp = video_timestamp
-            progress.last_accessed = datetime.utcnow()
-        else:
-            # Create new progress record
-            progress = LessonProgress(
-                user_id=user_id,
-                lesson_id=lesson_id,
+        try:
+            ProgressService._upsert_progress(
+                user_id, lesson_id,
                 is_completed=is_completed,
                 video_timestamp=video_timestamp
             )
-            db.session.add(progress)
-        
-        try:
+            ProgressSummaryService.record_lesson_activity(user_id, lesson_id)
             db.session.commit()
+            progress = LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson_id).first()
             return progress, "Progress berhasil disimpan"
         except Exception as e:
             db.session.rollback()
@@ -38,16 +48,9 @@ class ProgressService:
     @staticmethod
     def mark_lesson_complete(user_id, lesson_id):
         """Mark a lesson as completed"""
-        progress = LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson_id).first()
-        
-        if not progress:
-            progress = LessonProgress(user_id=user_id, lesson_id=lesson_id, is_completed=True)
-            db.session.add(progress)
-        else:
-            progress.is_completed = True
-            progress.last_accessed = datetime.utcnow()
-        
         try:
+            ProgressService._upsert_progress(user_id, lesson_id, is_completed=True)
+            ProgressSummaryService.record_lesson_activity(user_id, lesson_id)
             db.session.commit()
             return True, "Pembelajaran berhasil diselesaikan"
         except Exception as e:
@@ -57,56 +60,17 @@ class ProgressService:
     @staticmethod
     def get_user_progress(user_id, course_id):
         """Get user's progress in a course"""
-        from app.models.course import Course, Topic
-        
-        course = Course.query.get(course_id)
-        if not course:
+        progress_data = ProgressEngine.build_course_progress(user_id, course_id)
+        if progress_data is None:
             return None, "Kursus tidak ditemukan"
         
-        topics = Topic.query.filter_by(course_id=course_id).all()
-        
-        progress_data = {
-            'course_id': course_id,
-            'total_lessons': 0,
-            'completed_lessons': 0,
-            'progress_percent': 0,
-            'topics': []
-        }
-        
-        for topic in topics:
-            lessons = Lesson.query.filter_by(topic_id=topic.id).all()
-            topic_data = {
-                'topic_id': topic.id,
-                'topic_title': topic.title,
-                'total': len(lessons),
-                'completed': 0,
-                'lessons': []
-            }
-            
-            for lesson in lessons:
-                progress = LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson.id).first()
-                is_completed = progress.is_completed if progress else False
-                
-                topic_data['lessons'].append({
-                    'lesson_id': lesson.id,
-                    'lesson_title': lesson.title,
-                    'completed': is_completed
-                })
-                
-                progress_data['total_lessons'] += 1
-                topic_data['completed'] += 1 if is_completed else 0
-                if is_completed:
-                    progress_data['completed_lessons'] += 1
-            
-            progress_data['topics'].append(topic_data)
-        
-        if progress_data['total_lessons'] > 0:
-            progress_data['progress_percent'] = round(
-                (progress_data['completed_lessons'] / progress_data['total_lessons']) * 100
-            )
-        
         return progress_data, "Progress berhasil diambil"
 
+    @staticmethod
+    def get_bulk_user_progress(user_id, course_ids):
+        """Get user's progress for many courses at once, keyed by course_id"""
+        return ProgressEngine.build_bulk_progress(user_id, course_ids)
+
     @staticmethod
     def get_lesson_progress(user_id, lesson_id):
         """Get specific lesson progress for a user"""
@@ -118,18 +82,16 @@ class ProgressService:
         return progress, "Progress berhasil diambil"
 
     @staticmethod
-    def update_video_timestamp(user_id, lesson_id, timestamp):
+    def update_video_timestamp(user_id, lesson_id, timestamp, buffered=True):
         """Update the video watch timestamp"""
-        progress = LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson_id).first()
-        
-        if not progress:
-            progress = LessonProgress(user_id=user_id, lesson_id=lesson_id, video_timestamp=timestamp)
-            db.session.add(progress)
-        else:
-            progress.video_timestamp = timestamp
-            progress.last_accessed = datetime.utcnow()
+        # Heartbeat player ditampung di buffer dan di-flush berkala
+        if buffered and progress_buffer.enabled:
+            if progress_buffer.record(user_id, lesson_id, timestamp):
+                return True, "Timestamp berhasil disimpan"
+            return False, "Buffer progress penuh, coba lagi nanti"
         
         try:
+            ProgressService._upsert_progress(user_id, lesson_id, video_timestamp=timestamp)
             db.session.commit()
             return True, "Timestamp berhasil disimpan"
         except Exception as e:
@@ -139,29 +101,11 @@ class ProgressService:
     @staticmethod
     def get_course_completion_percent(user_id, course_id):
         """Get completion percentage for a course"""
-        from app.models.course import Course, Topic
-        
-        course = Course.query.get(course_id)
-        if not course:
-            return 0
-        
-        topics = Topic.query.filter_by(course_id=course_id).all()
-        total_lessons = 0
-        completed_lessons = 0
-        
-        for topic in topics:
-            lessons = Lesson.query.filter_by(topic_id=topic.id).all()
-            total_lessons += len(lessons)
-            
-            for lesson in lessons:
-                progress = LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson.id).first()
-                if progress and progress.is_completed:
-                    completed_lessons += 1
-        
-        if total_lessons == 0:
+        progress_data = ProgressEngine.build_course_progress(user_id, course_id)
+        if progress_data is None:
             return 0
         
-        return round((completed_lessons / total_lessons) * 100)
+        return progress_data['progress_percent']
 
     @staticmethod
     def get_user_completed_courses(user_id):
@@ -175,28 +119,29 @@ class ProgressService:
         if not user:
             return []
         
-        enrolled_courses = user.enrolled_courses.all()
-        completed_courses = []
-        
-        for course in enrolled_courses:
-            completion_percent = ProgressService.get_course_completion_percent(user_id, course.id)
-            if completion_percent == 100:
-                completed_courses.append(course)
+        # Satu read terindeks ke course_progress_summary
+        completed_courses = user.enrolled_courses.join(
+            CourseProgressSummary,
+            db.and_(
+                CourseProgressSummary.course_id == Course.id,
+                CourseProgressSummary.user_id == user_id
+            )
+        ).filter(CourseProgressSummary.percent == 100).all()
         
         return completed_courses
 
     @staticmethod
     def reset_lesson_progress(user_id, lesson_id):
         """Reset progress for a lesson"""
-        progress = LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson_id).first()
-        
-        if progress:
-            db.session.delete(progress)
-            try:
-                db.session.commit()
-                return True, "Progress berhasil direset"
-            except Exception as e:
+        try:
+            deleted = LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson_id).delete()
+            if not deleted:
                 db.session.rollback()
-                return False, f"Error: {str(e)}"
-        
-        return False, "Progress tidak ditemukan"
+                return False, "Progress tidak ditemukan"
+            
+            ProgressSummaryService.record_lesson_activity(user_id, lesson_id)
+            db.session.commit()
+            return True, "Progress berhasil direset"
+        except Exception as e:
+            db.session.rollback()
+            return False, f"Error: {str(e)}"
@@ -0,0 +1,168 @@
+import atexit
+import threading
+from datetime import datetime
+
+class ProgressWriteBuffer:
+    """
+    Buffer tulis untuk heartbeat posisi video.
+
+    Hanya timestamp terakhir per (user_id, lesson_id) yang disimpan di memori,
+    lalu di-flush berkala dengan satu multi-row upsert ke lesson_progress.
+    """
+
+    FLUSH_CHUNK_SIZE = 500
+
+    def __init__(self, app=None, flush_interval=5.0, max_pending=10000):
+        self.app = None
+        self.enabled = False
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = {
+            'recorded': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'flushes': 0,
+            'flushed_rows': 0,
+            'failed_flushes': 0
+        }
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Baca konfigurasi dan daftarkan flush saat proses berhenti"""
+        self.app = app
+        self.enabled = app.config.get('PROGRESS_BUFFER_ENABLED', False)
+        self.flush_interval = app.config.get('PROGRESS_BUFFER_FLUSH_INTERVAL', self.flush_interval)
+        self.max_pending = app.config.get('PROGRESS_BUFFER_MAX_PENDING', self.max_pending)
+        app.extensions['progress_buffer'] = self
+
+        if self.enabled:
+            atexit.register(self.stop)
+
+    def record(self, user_id, lesson_id, timestamp):
+        """
+        Simpan posisi terbaru ke buffer.
+        Returns: False jika buffer penuh dan heartbeat dibuang
+        """
+        key = (user_id, lesson_id)
+        with self._lock:
+            if key in self._pending:
+                self._stats['coalesced'] += 1
+            elif len(self._pending) >= self.max_pending:
+                self._stats['dropped'] += 1
+                return False
+
+            self._pending[key] = (timestamp, datetime.utcnow())
+            self._stats['recorded'] += 1
+
+        self._ensure_worker()
+        return True
+
+    def flush(self):
+        """Tulis semua entri yang tertunda. Returns: jumlah baris yang di-flush"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        self._write(batch)
+                else:
+                    self._write(batch)
+            except Exception as e:
+                self._requeue(batch)
+                with self._lock:
+                    self._stats['failed_flushes'] += 1
+                print(f"Progress Buffer Flush Error: {str(e)}")
+                return 0
+
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['flushed_rows'] += len(batch)
+            return len(batch)
+
+    def stats(self):
+        """Counter buffer untuk monitoring"""
+        with self._lock:
+            data = dict(self._stats)
+            data['pending'] = len(self._pending)
+        data['running'] = self._thread is not None and self._thread.is_alive()
+        return data
+
+    def start(self):
+        """Jalankan thread flush periodik"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='progress-buffer-flush', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Hentikan thread flush lalu flush sisa buffer"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def _ensure_worker(self):
+        if self.enabled and (self._thread is None or not self._thread.is_alive()):
+            self.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def _requeue(self, batch):
+        """Kembalikan batch gagal tanpa menimpa heartbeat yang lebih baru"""
+        with self._lock:
+            for key, value in batch.items():
+                if key in self._pending:
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    self._stats['dropped'] += 1
+                    continue
+                self._pending[key] = value
+
+    def _write(self, batch):
+        from app import db
+        from app.models.progress import LessonProgress
+        from app.utils.db_upsert import upsert
+
+        rows = [
+            {
+                'user_id': user_id,
+                'lesson_id': lesson_id,
+                'video_timestamp': timestamp,
+                'last_accessed': accessed_at,
+                'is_completed': False,
+                'trial_cancelled': False
+            }
+            for (user_id, lesson_id), (timestamp, accessed_at) in batch.items()
+        ]
+
+        try:
+            upsert(
+                LessonProgress, rows,
+                index_elements=('user_id', 'lesson_id'),
+                update_columns=('video_timestamp', 'last_accessed'),
+                chunk_size=self.FLUSH_CHUNK_SIZE
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+progress_buffer = ProgressWriteBuffer()
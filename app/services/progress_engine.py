@@ -0,0 +1,97 @@
+from app import db
+from app.models.progress import LessonProgress
+from app.services.course_outline import CourseOutlineService
+
+
+class ProgressEngine:
+    """Set-based builder untuk pohon progress topic/lesson/completion"""
+
+    @staticmethod
+    def calculate_percent(completed, total):
+        """Persentase bulat (0-100), 0 jika kursus belum punya lesson"""
+        if not total:
+            return 0
+        return round((completed / total) * 100)
+
+    @staticmethod
+    def _completed_lesson_ids(user_id, lesson_ids):
+        """Satu query: lesson mana saja yang sudah diselesaikan user"""
+        if not lesson_ids:
+            return set()
+
+        rows = db.session.query(LessonProgress.lesson_id).filter(
+            LessonProgress.user_id == user_id,
+            LessonProgress.lesson_id.in_(lesson_ids),
+            LessonProgress.is_completed == True
+        ).all()
+        return {row[0] for row in rows}
+
+    @staticmethod
+    def _assemble(outline, completed_ids):
+        """Susun outline + set lesson selesai menjadi dict progress"""
+        progress_data = {
+            'course_id': outline.course_id,
+            'total_lessons': 0,
+            'completed_lessons': 0,
+            'progress_percent': 0,
+            'topics': []
+        }
+
+        for topic in outline.topics:
+            topic_data = {
+                'topic_id': topic.id,
+                'topic_title': topic.title,
+                'total': len(topic.lessons),
+                'completed': 0,
+                'lessons': []
+            }
+
+            for lesson in topic.lessons:
+                completed = lesson.id in completed_ids
+                topic_data['lessons'].append({
+                    'lesson_id': lesson.id,
+                    'lesson_title': lesson.title,
+                    'completed': completed
+                })
+                if completed:
+                    topic_data['completed'] += 1
+
+            progress_data['total_lessons'] += topic_data['total']
+            progress_data['completed_lessons'] += topic_data['completed']
+            progress_data['topics'].append(topic_data)
+
+        progress_data['progress_percent'] = ProgressEngine.calculate_percent(
+            progress_data['completed_lessons'], progress_data['total_lessons']
+        )
+        return progress_data
+
+    @staticmethod
+    def build_course_progress(user_id, course_id):
+        """
+        Bangun progress satu kursus dari outline (cache) + satu query completion
+        Returns: dict progress atau None jika kursus tidak ada
+        """
+        outline = CourseOutlineService.get_outline(course_id)
+        if outline is None:
+            return None
+
+        completed_ids = ProgressEngine._completed_lesson_ids(user_id, outline.lesson_ids)
+        return ProgressEngine._assemble(outline, completed_ids)
+
+    @staticmethod
+    def build_bulk_progress(user_id, course_ids):
+        """
+        Bangun progress banyak kursus sekaligus untuk satu user
+        Returns: {course_id: progress_dict}, kursus yang tidak ada dilewati
+        """
+        outlines = CourseOutlineService.get_outlines(course_ids)
+        if not outlines:
+            return {}
+
+        lesson_ids = [lesson_id for outline in outlines.values() for lesson_id in outline.lesson_ids]
+        completed_ids = ProgressEngine._completed_lesson_ids(user_id, lesson_ids)
+
+        return {
+            course_id: ProgressEngine._assemble(outline, completed_ids)
+            for course_id, outline in outlines.items()
+        }
@@ -0,0 +1,266 @@
+from app import db
+from app.models.course import Topic
+from app.models.lesson import Lesson
+from app.models.progress import LessonProgress, CourseProgressSummary
+from app.models.user import enrollments
+from app.services.progress_engine import ProgressEngine
+from app.utils.db_upsert import upsert
+from datetime import datetime
+
+class ProgressSummaryService:
+    """Pemeliharaan tabel course_progress_summary (materialized progress)"""
+
+    @staticmethod
+    def get_lesson_course_id(lesson_id):
+        """Get course_id yang memiliki lesson"""
+        row = db.session.query(Topic.course_id).join(
+            Lesson, Lesson.topic_id == Topic.id
+        ).filter(Lesson.id == lesson_id).first()
+        return row[0] if row else None
+
+    @staticmethod
+    def _count_course_lessons(course_id):
+        return db.session.query(db.func.count(Lesson.id)).join(
+            Topic, Lesson.topic_id == Topic.id
+        ).filter(Topic.course_id == course_id).scalar() or 0
+
+    @staticmethod
+    def _compute(user_id=None, course_id=None, course_ids=None):
+        """
+        Hitung ulang summary dari lesson_progress dengan query agregat
+        Returns: {(user_id, course_id): (completed, total, last_activity)}
+        """
+        totals_query = db.session.query(Topic.course_id, db.func.count(Lesson.id)).join(
+            Lesson, Lesson.topic_id == Topic.id
+        )
+        progress_query = db.session.query(
+            LessonProgress.user_id,
+            Topic.course_id,
+            db.func.sum(db.case((LessonProgress.is_completed == True, 1), else_=0)),
+            db.func.max(LessonProgress.last_accessed)
+        ).join(
+            Lesson, LessonProgress.lesson_id == Lesson.id
+        ).join(
+            Topic, Lesson.topic_id == Topic.id
+        )
+        enrollment_query = db.session.query(enrollments.c.user_id, enrollments.c.course_id)
+
+        if course_id is not None:
+            totals_query = totals_query.filter(Topic.course_id == course_id)
+            progress_query = progress_query.filter(Topic.course_id == course_id)
+            enrollment_query = enrollment_query.filter(enrollments.c.course_id == course_id)
+        if course_ids is not None:
+            totals_query = totals_query.filter(Topic.course_id.in_(course_ids))
+            progress_query = progress_query.filter(Topic.course_id.in_(course_ids))
+            enrollment_query = enrollment_query.filter(enrollments.c.course_id.in_(course_ids))
+        if user_id is not None:
+            progress_query = progress_query.filter(LessonProgress.user_id == user_id)
+            enrollment_query = enrollment_query.filter(enrollments.c.user_id == user_id)
+
+        totals = dict(totals_query.group_by(Topic.course_id).all())
+        computed = {}
+
+        for row_user_id, row_course_id, completed, last_activity in progress_query.group_by(
+            LessonProgress.user_id, Topic.course_id
+        ).all():
+            computed[(row_user_id, row_course_id)] = (
+                int(completed or 0), totals.get(row_course_id, 0), last_activity
+            )
+
+        for row_user_id, row_course_id in enrollment_query.all():
+            if (row_user_id, row_course_id) not in computed:
+                computed[(row_user_id, row_course_id)] = (0, totals.get(row_course_id, 0), None)
+
+        return computed
+
+    @staticmethod
+    def _existing(user_id=None, course_id=None):
+        query = CourseProgressSummary.query
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
+        if course_id is not None:
+            query = query.filter_by(course_id=course_id)
+        return {(s.user_id, s.course_id): s for s in query.all()}
+
+    @staticmethod
+    def _apply(summary, completed, total):
+        summary.completed_lessons = completed
+        summary.total_lessons = total
+        summary.percent = ProgressEngine.calculate_percent(completed, total)
+
+    @staticmethod
+    def _count_completed(user_id, course_id):
+        return db.session.query(db.func.count(LessonProgress.id)).join(
+            Lesson, LessonProgress.lesson_id == Lesson.id
+        ).join(
+            Topic, Lesson.topic_id == Topic.id
+        ).filter(
+            Topic.course_id == course_id,
+            LessonProgress.user_id == user_id,
+            LessonProgress.is_completed == True
+        ).scalar() or 0
+
+    @staticmethod
+    def record_lesson_activity(user_id, lesson_id):
+        """
+        Update summary setelah perubahan lesson_progress milik user.
+        Jumlah completed dihitung ulang dari index sehingga aman terhadap
+        penulisan bersamaan. Tidak melakukan commit.
+        """
+        course_id = ProgressSummaryService.get_lesson_course_id(lesson_id)
+        if course_id is None:
+            return None
+
+        summary = CourseProgressSummary.query.get((user_id, course_id))
+        if summary is None:
+            return ProgressSummaryService.refresh(user_id, course_id)
+
+        completed = ProgressSummaryService._count_completed(user_id, course_id)
+        ProgressSummaryService._apply(summary, completed, summary.total_lessons)
+        summary.last_activity = datetime.utcnow()
+        return summary
+
+    @staticmethod
+    def refresh(user_id, course_id):
+        """Hitung ulang satu baris summary (tanpa commit)"""
+        completed, _, last_activity = ProgressSummaryService._compute(user_id, course_id).get(
+            (user_id, course_id), (0, 0, None)
+        )
+        total = ProgressSummaryService._count_course_lessons(course_id)
+
+        summary = CourseProgressSummary.query.get((user_id, course_id))
+        if summary is None:
+            # Upsert agar request bersamaan yang membuat baris pertama tidak bentrok di primary key
+            upsert(
+                CourseProgressSummary,
+                {
+                    'user_id': user_id,
+                    'course_id': course_id,
+                    'completed_lessons': completed,
+                    'total_lessons': total,
+                    'percent': ProgressEngine.calculate_percent(completed, total),
+                    'last_activity': last_activity or datetime.utcnow()
+                },
+                index_elements=('user_id', 'course_id'),
+                update_columns=('completed_lessons', 'total_lessons', 'percent', 'last_activity')
+            )
+            return CourseProgressSummary.query.get((user_id, course_id))
+
+        ProgressSummaryService._apply(summary, completed, total)
+        summary.last_activity = last_activity or summary.last_activity or datetime.utcnow()
+        return summary
+
+    @staticmethod
+    def refresh_course(course_id):
+        """
+        Sinkronkan total lesson semua summary di satu kursus
+        (dipanggil saat lesson dibuat/dihapus). Tidak melakukan commit.
+        """
+        computed = ProgressSummaryService._compute(course_id=course_id)
+        total = ProgressSummaryService._count_course_lessons(course_id)
+
+        for key, summary in ProgressSummaryService._existing(course_id=course_id).items():
+            completed = computed[key][0] if key in computed else 0
+            ProgressSummaryService._apply(summary, completed, total)
+
+    @staticmethod
+    def compute_summaries(user_id, course_ids):
+        """
+        Hitung summary di memori tanpa menulis (untuk baris yang belum di-backfill).
+        Returns: {course_id: CourseProgressSummary} yang tidak ditambahkan ke session
+        """
+        course_ids = list(dict.fromkeys(course_ids))
+        if not course_ids:
+            return {}
+
+        computed = ProgressSummaryService._compute(user_id, course_ids=course_ids)
+        summaries = {}
+        for course_id in course_ids:
+            completed, total, last_activity = computed.get((user_id, course_id), (0, 0, None))
+            summary = CourseProgressSummary(user_id=user_id, course_id=course_id, last_activity=last_activity)
+            ProgressSummaryService._apply(summary, completed, total)
+            summaries[course_id] = summary
+        return summaries
+
+    @staticmethod
+    def get_summaries(user_id, course_ids):
+        """
+        Get summary untuk banyak kursus dalam satu read (read-only).
+        Baris yang belum ada dihitung di memori; pembuatan barisnya diserahkan ke
+        jalur tulis progress atau `flask progress-summary rebuild`.
+        Returns: {course_id: CourseProgressSummary}
+        """
+        course_ids = list(dict.fromkeys(course_ids))
+        if not course_ids:
+            return {}
+
+        summaries = {
+            s.course_id: s for s in CourseProgressSummary.query.filter(
+                CourseProgressSummary.user_id == user_id,
+                CourseProgressSummary.course_id.in_(course_ids)
+            ).all()
+        }
+
+        missing = [course_id for course_id in course_ids if course_id not in summaries]
+        summaries.update(ProgressSummaryService.compute_summaries(user_id, missing))
+        return summaries
+
+    @staticmethod
+    def rebuild(user_id=None, course_id=None):
+        """
+        Backfill/rebuild summary dari data mentah.
+        Returns: jumlah baris yang ditulis
+        """
+        computed = ProgressSummaryService._compute(user_id, course_id)
+        existing = ProgressSummaryService._existing(user_id, course_id)
+
+        for (row_user_id, row_course_id), (completed, total, last_activity) in computed.items():
+            summary = existing.pop((row_user_id, row_course_id), None)
+            if summary is None:
+                summary = CourseProgressSummary(user_id=row_user_id, course_id=row_course_id)
+                db.session.add(summary)
+            ProgressSummaryService._apply(summary, completed, total)
+            summary.last_activity = last_activity or summary.last_activity or datetime.utcnow()
+
+        # Baris tanpa enrollment dan tanpa progress sudah tidak relevan
+        for summary in existing.values():
+            db.session.delete(summary)
+
+        db.session.commit()
+        return len(computed)
+
+    @staticmethod
+    def check_consistency(user_id=None, course_id=None):
+        """
+        Bandingkan summary tersimpan dengan hasil hitung ulang
+        Returns: list of {user_id, course_id, problem, stored, expected}
+        """
+        computed = ProgressSummaryService._compute(user_id, course_id)
+        existing = ProgressSummaryService._existing(user_id, course_id)
+        problems = []
+
+        for key, (completed, total, _) in computed.items():
+            expected = (completed, total, ProgressEngine.calculate_percent(completed, total))
+            summary = existing.pop(key, None)
+            if summary is None:
+                problems.append({
+                    'user_id': key[0], 'course_id': key[1],
+                    'problem': 'missing', 'stored': None, 'expected': expected
+                })
+                continue
+
+            stored = (summary.completed_lessons, summary.total_lessons, summary.percent)
+            if stored != expected:
+                problems.append({
+                    'user_id': key[0], 'course_id': key[1],
+                    'problem': 'mismatch', 'stored': stored, 'expected': expected
+                })
+
+        for key, summary in existing.items():
+            problems.append({
+                'user_id': key[0], 'course_id': key[1], 'problem': 'stale',
+                'stored': (summary.completed_lessons, summary.total_lessons, summary.percent),
+                'expected': None
+            })
+
+        return problems
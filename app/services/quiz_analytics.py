@@ -0,0 +1,249 @@
+import numpy as np
+from app import db
+from app.models.quiz import QuizQuestion, QuizOption, QuizAttempt, QuizAnswer
+
+
+class ItemAnalysisAccumulator:
+    """
+    Statistik item dari matriks respons (attempt x soal) yang diproses per chunk.
+    Hanya sufficient statistics yang disimpan, jadi memori tidak bergantung jumlah attempt.
+
+    Untuk lesson dengan question pool tiap attempt hanya melihat sebagian soal: statistik
+    per soal dihitung atas attempt yang mendapat soal itu (mask presented), dan Cronbach's
+    alpha tidak dihitung (None) karena tidak ada matriks respons yang lengkap.
+    """
+
+    def __init__(self, n_items, n_choices):
+        self.n_items = n_items
+        self.n_choices = n_choices
+        self.n = 0
+        self.complete = True  # semua attempt melihat semua soal
+        self.n_item = np.zeros(n_items, dtype=np.int64)  # jumlah attempt yang mendapat soal
+        self.sum_x = np.zeros(n_items, dtype=np.int64)  # jumlah benar per soal
+        self.sum_xt = np.zeros(n_items, dtype=np.float64)  # sum(x_j * total)
+        self.sum_t_item = np.zeros(n_items, dtype=np.float64)  # sum(total) atas attempt yang mendapat soal
+        self.sum_t2_item = np.zeros(n_items, dtype=np.float64)
+        self.sum_t = 0.0
+        self.sum_t2 = 0.0
+        # Kolom terakhir = tidak dijawab (hanya soal yang ditampilkan)
+        self.choice_counts = np.zeros((n_items, n_choices + 1), dtype=np.int64)
+
+    def update(self, correct, choices, presented=None):
+        """
+        correct: array (attempt, soal) 0/1
+        choices: array (attempt, soal) index option di dalam soal, -1 jika tidak dijawab
+        presented: array (attempt, soal) bool, soal yang ditampilkan ke attempt (None = semua)
+        """
+        if correct.shape[0] == 0:
+            return
+        if presented is None:
+            presented = np.ones(correct.shape, dtype=bool)
+        else:
+            self.complete = self.complete and bool(presented.all())
+        mask = presented.astype(np.float64)
+        x = correct.astype(np.float64, copy=False) * mask
+        totals = x.sum(axis=1)
+
+        self.n += correct.shape[0]
+        self.n_item += presented.sum(axis=0, dtype=np.int64)
+        self.sum_x += (correct * presented).sum(axis=0, dtype=np.int64)
+        self.sum_xt += totals @ x
+        self.sum_t_item += totals @ mask
+        self.sum_t2_item += (totals * totals) @ mask
+        self.sum_t += totals.sum()
+        self.sum_t2 += totals @ totals
+
+        # -1 dipetakan ke kolom "tidak dijawab", soal yang tidak ditampilkan tidak dihitung
+        idx = np.where(choices < 0, self.n_choices, choices)
+        flat = (idx + np.arange(self.n_items) * (self.n_choices + 1))[presented]
+        self.choice_counts += np.bincount(
+            flat, minlength=self.n_items * (self.n_choices + 1)
+        ).reshape(self.n_items, self.n_choices + 1)
+
+    def result(self):
+        """Returns: dict difficulty, point_biserial, point_biserial_corrected, choice_counts, cronbach_alpha"""
+        n, k = self.n, self.n_items
+        if n == 0:
+            empty = np.full(k, np.nan)
+            return {
+                'attempts': 0, 'item_attempts': self.n_item, 'difficulty': empty, 'point_biserial': empty,
+                'point_biserial_corrected': empty, 'choice_counts': self.choice_counts,
+                'cronbach_alpha': None
+            }
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Semua momen per soal atas attempt yang mendapat soal itu
+            n_j = self.n_item
+            p = self.sum_x / n_j
+            var_x = p * (1 - p)
+            mean_t = self.sum_t_item / n_j
+            var_t = self.sum_t2_item / n_j - mean_t ** 2
+
+            cov_xt = self.sum_xt / n_j - p * mean_t
+            r_pb = cov_xt / np.sqrt(var_x * var_t)
+
+            # Korelasi dengan skor total tanpa soal itu sendiri (rest score)
+            mean_r = mean_t - p
+            var_r = var_t - 2 * cov_xt + var_x
+            cov_xr = cov_xt - var_x
+            r_corrected = cov_xr / np.sqrt(var_x * var_r)
+
+        mean_score = self.sum_t / n
+        var_score = self.sum_t2 / n - mean_score ** 2
+        alpha = None
+        if self.complete and k > 1 and var_score > 0:
+            alpha = float(k / (k - 1) * (1 - var_x.sum() / var_score))
+
+        return {
+            'attempts': n,
+            'item_attempts': n_j,
+            'difficulty': p,
+            'point_biserial': r_pb,
+            'point_biserial_corrected': r_corrected,
+            'choice_counts': self.choice_counts,
+            'cronbach_alpha': alpha,
+            'mean_score': mean_score,
+            'mean_rest_score': mean_r
+        }
+
+
+class QuizAnalyticsService:
+    """Analisis item quiz per lesson dari tabel quiz_answer"""
+
+    DEFAULT_CHUNK_SIZE = 5000
+
+    @staticmethod
+    def _load_items(lesson_id):
+        """Satu query: soal lesson dan option-nya; index option dihitung per soal"""
+        rows = db.session.query(
+            QuizQuestion.id, QuizQuestion.question_text, QuizOption.id, QuizOption.option_text, QuizOption.is_correct
+        ).outerjoin(
+            QuizOption, QuizOption.question_id == QuizQuestion.id
+        ).filter(
+            QuizQuestion.lesson_id == lesson_id
+        ).order_by(QuizQuestion.id, QuizOption.id).all()
+
+        questions = []
+        option_index = {}
+        for question_id, question_text, option_id, option_text, is_correct in rows:
+            if not questions or questions[-1]['question_id'] != question_id:
+                questions.append({'question_id': question_id, 'question_text': question_text, 'options': []})
+            if option_id is not None:
+                options = questions[-1]['options']
+                option_index[option_id] = len(options)
+                options.append({'option_id': option_id, 'option_text': option_text, 'is_correct': bool(is_correct)})
+        return questions, option_index
+
+    @staticmethod
+    def _iter_chunks(lesson_id, question_ids, option_index, chunk_size):
+        """
+        Stream matriks respons per chunk attempt (keyset pagination pada quiz_attempt.id).
+        Yields: (correct, choices, presented) array numpy berukuran (attempt chunk, jumlah soal).
+        presented: soal yang ditampilkan ke attempt (QuizAttempt.question_ids untuk question pool,
+        semua soal untuk attempt tanpa pool) atau yang punya baris QuizAnswer
+        """
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        last_id = 0
+        while True:
+            attempt_rows = db.session.query(QuizAttempt.id, QuizAttempt.question_ids).filter(
+                QuizAttempt.lesson_id == lesson_id,
+                QuizAttempt.score.isnot(None),
+                QuizAttempt.id > last_id
+            ).order_by(QuizAttempt.id).limit(chunk_size).all()
+            if not attempt_rows:
+                return
+            attempt_ids = [row[0] for row in attempt_rows]
+            last_id = attempt_ids[-1]
+
+            answers = db.session.query(
+                QuizAnswer.attempt_id, QuizAnswer.question_id, QuizAnswer.option_id, QuizAnswer.correct
+            ).filter(
+                QuizAnswer.attempt_id.in_(attempt_ids)
+            ).all()
+
+            attempts = np.asarray(attempt_ids, dtype=np.int64)
+            correct = np.zeros((len(attempts), len(question_ids)), dtype=np.int8)
+            choices = np.full((len(attempts), len(question_ids)), -1, dtype=np.int16)
+            presented = np.ones((len(attempts), len(question_ids)), dtype=bool)
+
+            for row, (_, drawn) in enumerate(attempt_rows):
+                if drawn is None:
+                    continue
+                presented[row] = False
+                drawn = np.asarray(drawn, dtype=np.int64)
+                cols = np.searchsorted(question_ids, drawn)
+                # Soal pool yang sudah dihapus diabaikan
+                found = (cols < len(question_ids)) & (question_ids[np.minimum(cols, len(question_ids) - 1)] == drawn)
+                presented[row, cols[found]] = True
+
+            if answers:
+                data = np.array(
+                    [(a, q, option_index.get(o, -1) if o is not None else -1, 1 if c else 0)
+                     for a, q, o, c in answers],
+                    dtype=np.int64
+                )
+                rows = np.searchsorted(attempts, data[:, 0])
+                cols = np.searchsorted(question_ids, data[:, 1])
+                # Buang jawaban untuk soal yang sudah dihapus
+                valid = (
+                    (rows < len(attempts)) & (attempts[np.minimum(rows, len(attempts) - 1)] == data[:, 0])
+                    & (cols < len(question_ids)) & (question_ids[np.minimum(cols, len(question_ids) - 1)] == data[:, 1])
+                )
+                rows, cols, data = rows[valid], cols[valid], data[valid]
+                correct[rows, cols] = data[:, 3]
+                choices[rows, cols] = data[:, 2]
+                presented[rows, cols] = True
+
+            yield correct, choices, presented
+
+            if len(attempt_ids) < chunk_size:
+                return
+
+    @staticmethod
+    def analyze_lesson(lesson_id, chunk_size=None):
+        """
+        Item analysis satu quiz lesson. Untuk question pool, statistik tiap soal dihitung atas
+        attempt yang mendapat soal itu (items[].attempts) dan cronbach_alpha None.
+        Returns: dict {'lesson_id','attempts','cronbach_alpha','items': [...]}
+        """
+        chunk_size = chunk_size or QuizAnalyticsService.DEFAULT_CHUNK_SIZE
+        questions, option_index = QuizAnalyticsService._load_items(lesson_id)
+        question_ids = [question['question_id'] for question in questions]
+        n_choices = max((len(question['options']) for question in questions), default=0)
+
+        accumulator = ItemAnalysisAccumulator(len(questions), n_choices)
+        if questions:
+            for correct, choices, presented in QuizAnalyticsService._iter_chunks(
+                lesson_id, question_ids, option_index, chunk_size
+            ):
+                accumulator.update(correct, choices, presented)
+
+        stats = accumulator.result()
+        items = []
+        for j, question in enumerate(questions):
+            items.append({
+                'question_id': question['question_id'],
+                'question_text': question['question_text'],
+                'attempts': int(stats['item_attempts'][j]),
+                'difficulty': _to_float(stats['difficulty'][j]),
+                'point_biserial': _to_float(stats['point_biserial'][j]),
+                'point_biserial_corrected': _to_float(stats['point_biserial_corrected'][j]),
+                'options': [
+                    dict(option, count=int(stats['choice_counts'][j, i]))
+                    for i, option in enumerate(question['options'])
+                ],
+                'unanswered': int(stats['choice_counts'][j, n_choices])
+            })
+
+        return {
+            'lesson_id': lesson_id,
+            'attempts': stats['attempts'],
+            'cronbach_alpha': stats['cronbach_alpha'],
+            'items': items
+        }
+
+
+def _to_float(value):
+    """NaN (misal soal tanpa variasi jawaban) -> None"""
+    value = float(value)
+    return None if np.isnan(value) else value
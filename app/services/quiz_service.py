@@ -0,0 +1,285 @@
+import random
+from collections import namedtuple
+from datetime import datetime
+from types import MappingProxyType
+from flask import current_app
+from app import db
+from app.extensions.cache import cache
+from app.models.quiz import QuizQuestion, QuizOption, QuizAttempt, QuizAnswer, QuizItemStatistic
+from app.utils.db_upsert import upsert
+
+QuizResult = namedtuple('QuizResult', ['correct_answers', 'total_questions', 'score', 'answers'])
+GradedAnswer = namedtuple('GradedAnswer', ['question_id', 'option_id', 'correct'])
+QuestionView = namedtuple('QuestionView', ['id', 'question_text', 'options'])
+OptionView = namedtuple('OptionView', ['id', 'option_text'])
+
+
+class AnswerKey(namedtuple('AnswerKey', [
+    'lesson_id', 'question_ids', 'question_options', 'option_question', 'correct_option_ids'
+])):
+    """
+    Kunci jawaban immutable satu quiz: urutan soal, question_id -> option_id terurut,
+    option_id -> question_id, set option benar
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_rows(cls, lesson_id, rows):
+        """rows: (question_id, option_id | None, is_correct) terurut per soal"""
+        question_options = {}
+        option_question = {}
+        correct = set()
+        for question_id, option_id, is_correct in rows:
+            options = question_options.setdefault(question_id, [])
+            if option_id is not None:
+                options.append(option_id)
+                option_question[option_id] = question_id
+                if is_correct:
+                    correct.add(option_id)
+        return cls(
+            lesson_id, tuple(question_options),
+            MappingProxyType({question_id: tuple(options) for question_id, options in question_options.items()}),
+            MappingProxyType(option_question), frozenset(correct)
+        )
+
+    def __reduce__(self):
+        # MappingProxyType tidak bisa di-pickle (backend filesystem/redis)
+        rows = [(question_id, option_id, option_id in self.correct_option_ids)
+                for question_id in self.question_ids
+                for option_id in self.question_options[question_id] or (None,)]
+        return (AnswerKey.from_rows, (self.lesson_id, rows))
+
+
+class QuizService:
+    """Penilaian quiz dari kunci jawaban yang di-cache"""
+
+    CACHE_NAMESPACE = 'quiz_answer_key'
+
+    @staticmethod
+    def _load_answer_key(lesson_id):
+        """Satu query: semua soal lesson beserta option-nya (soal tanpa option tetap dihitung)"""
+        rows = db.session.query(
+            QuizQuestion.id, QuizOption.id, QuizOption.is_correct
+        ).outerjoin(
+            QuizOption, QuizOption.question_id == QuizQuestion.id
+        ).filter(
+            QuizQuestion.lesson_id == lesson_id
+        ).order_by(QuizQuestion.id, QuizOption.id).all()
+        return AnswerKey.from_rows(lesson_id, rows)
+
+    @staticmethod
+    def get_answer_key(lesson_id):
+        return cache.get_or_set(
+            QuizService.CACHE_NAMESPACE, lesson_id,
+            lambda: QuizService._load_answer_key(lesson_id),
+            timeout=current_app.config.get('QUIZ_ANSWER_KEY_CACHE_TTL')
+        )
+
+    @staticmethod
+    def invalidate_answer_key(lesson_id):
+        """Panggil setelah soal/option lesson berubah"""
+        cache.delete(QuizService.CACHE_NAMESPACE, lesson_id)
+
+    @staticmethod
+    def grade(answer_key, submitted, question_ids=None):
+        """
+        Nilai jawaban di memori.
+        submitted: {question_id: option_id (str/int)}; option yang bukan milik soalnya dianggap salah
+        question_ids: soal yang dinilai (bank soal); default semua soal di kunci jawaban.
+            Soal yang sudah dihapus diabaikan.
+        Returns: QuizResult (answers berisi semua soal, option_id None jika tidak dijawab/tidak valid)
+        """
+        if question_ids is None:
+            question_ids = answer_key.question_ids
+        else:
+            question_ids = [q for q in question_ids if q in answer_key.question_options]
+
+        correct_answers = 0
+        answers = []
+        for question_id in question_ids:
+            option_id = submitted.get(question_id)
+            try:
+                option_id = int(option_id)
+            except (TypeError, ValueError):
+                option_id = None
+            if option_id is not None and answer_key.option_question.get(option_id) != question_id:
+                option_id = None
+
+            correct = option_id is not None and option_id in answer_key.correct_option_ids
+            if correct:
+                correct_answers += 1
+            answers.append(GradedAnswer(question_id, option_id, correct))
+
+        total_questions = len(question_ids)
+        score = (correct_answers / total_questions) * 100 if total_questions else 0
+        return QuizResult(correct_answers, total_questions, score, tuple(answers))
+
+    @staticmethod
+    def grade_form(lesson_id, form, question_ids=None):
+        """Nilai form submit_quiz (field question_<id>)"""
+        answer_key = QuizService.get_answer_key(lesson_id)
+        submitted = {
+            question_id: form.get(f'question_{question_id}')
+            for question_id in (answer_key.question_ids if question_ids is None else question_ids)
+        }
+        return QuizService.grade(answer_key, submitted, question_ids)
+
+    # ---- bank soal ----
+
+    @staticmethod
+    def draw_questions(answer_key, pool_size=None, shuffle_options=False, rng=random):
+        """
+        Pilih soal untuk satu attempt dari id soal di kunci jawaban (tanpa ORDER BY RAND()).
+        Returns: (question_ids, option_order {"<question_id>": [option_id, ...]})
+        """
+        question_ids = list(answer_key.question_ids)
+        if pool_size:
+            question_ids = rng.sample(question_ids, min(pool_size, len(question_ids)))
+
+        option_order = {}
+        for question_id in question_ids:
+            options = list(answer_key.question_options[question_id])
+            if shuffle_options:
+                rng.shuffle(options)
+            # Key string agar sama setelah round-trip kolom JSON
+            option_order[str(question_id)] = options
+        return question_ids, option_order
+
+    @staticmethod
+    def get_open_attempt(user_id, lesson_id):
+        """Attempt yang sudah dimulai tapi belum dikirim (score NULL)"""
+        return QuizAttempt.query.filter(
+            QuizAttempt.user_id == user_id,
+            QuizAttempt.lesson_id == lesson_id,
+            QuizAttempt.score.is_(None)
+        ).order_by(QuizAttempt.id.desc()).first()
+
+    @staticmethod
+    def attempt_size(lesson, answer_key=None):
+        """Jumlah soal per attempt: quiz_pool_size dibatasi jumlah soal yang ada"""
+        if answer_key is None:
+            answer_key = QuizService.get_answer_key(lesson.id)
+        total = len(answer_key.question_ids)
+        return min(lesson.quiz_pool_size, total) if lesson.quiz_pool_size else total
+
+    @staticmethod
+    def is_reusable_attempt(attempt, lesson, answer_key):
+        """Semua soal terpilih masih ada dan jumlahnya sama dengan quiz_pool_size saat ini"""
+        return bool(attempt.question_ids) and (
+            len(attempt.question_ids) == QuizService.attempt_size(lesson, answer_key)
+        ) and all(question_id in answer_key.question_options for question_id in attempt.question_ids)
+
+    @staticmethod
+    def find_reusable_attempt(user_id, lesson):
+        """Attempt terbuka yang masih bisa dilanjutkan (tanpa menulis); None jika harus diundi ulang"""
+        attempt = QuizService.get_open_attempt(user_id, lesson.id)
+        if attempt is None:
+            return None
+        answer_key = QuizService.get_answer_key(lesson.id)
+        return attempt if QuizService.is_reusable_attempt(attempt, lesson, answer_key) else None
+
+    @staticmethod
+    def start_attempt(user_id, lesson):
+        """
+        Attempt terbuka untuk lesson bank soal; dipakai ulang selama masih cocok dengan bank soal,
+        jadi refresh halaman tidak mengacak ulang soal. Dipanggil dari POST mulai quiz (commit).
+        """
+        answer_key = QuizService.get_answer_key(lesson.id)
+        attempt = QuizService.get_open_attempt(user_id, lesson.id)
+        if attempt is not None and QuizService.is_reusable_attempt(attempt, lesson, answer_key):
+            return attempt
+
+        question_ids, option_order = QuizService.draw_questions(
+            answer_key, lesson.quiz_pool_size, lesson.quiz_shuffle_options
+        )
+        if attempt is None:
+            attempt = QuizAttempt(user_id=user_id, lesson_id=lesson.id)
+            db.session.add(attempt)
+        attempt.score = None
+        attempt.completed_at = None
+        attempt.started_at = datetime.utcnow()
+        attempt.question_ids = question_ids
+        attempt.option_order = option_order
+        db.session.commit()
+        return attempt
+
+    @staticmethod
+    def get_attempt_questions(attempt):
+        """
+        Soal attempt sesuai urutan tersimpan, satu query untuk soal + option.
+        Returns: list QuestionView(id, question_text, options=[OptionView])
+        """
+        if not attempt.question_ids:
+            return []
+        rows = db.session.query(
+            QuizQuestion.id, QuizQuestion.question_text, QuizOption.id, QuizOption.option_text
+        ).outerjoin(
+            QuizOption, QuizOption.question_id == QuizQuestion.id
+        ).filter(
+            QuizQuestion.id.in_(attempt.question_ids)
+        ).all()
+
+        texts = {}
+        options = {}
+        for question_id, question_text, option_id, option_text in rows:
+            texts[question_id] = question_text
+            if option_id is not None:
+                options[option_id] = OptionView(option_id, option_text)
+
+        option_order = attempt.option_order or {}
+        return [
+            QuestionView(question_id, texts[question_id], [
+                options[option_id] for option_id in option_order.get(str(question_id), ())
+                if option_id in options
+            ])
+            for question_id in attempt.question_ids if question_id in texts
+        ]
+
+    @staticmethod
+    def record_answers(attempt, result):
+        """
+        Simpan jawaban per soal (satu bulk insert) dan tambahkan ke statistik soal
+        (satu upsert increment). Attempt harus sudah di-flush. Tidak melakukan commit.
+        """
+        if not result.answers:
+            return
+
+        db.session.execute(db.insert(QuizAnswer), [
+            {
+                'attempt_id': attempt.id,
+                'question_id': answer.question_id,
+                'option_id': answer.option_id,
+                'correct': answer.correct
+            }
+            for answer in result.answers
+        ])
+
+        now = datetime.utcnow()
+        score = float(result.score)
+        upsert(
+            QuizItemStatistic,
+            [
+                {
+                    'question_id': answer.question_id,
+                    'lesson_id': attempt.lesson_id,
+                    'attempts': 1,
+                    'correct_count': 1 if answer.correct else 0,
+                    'score_sum': score,
+                    'score_sq_sum': score * score,
+                    'correct_score_sum': score if answer.correct else 0.0,
+                    'updated_at': now
+                }
+                for answer in result.answers
+            ],
+            index_elements=('question_id',),
+            update_columns=('updated_at',),
+            increment_columns=('attempts', 'correct_count', 'score_sum', 'score_sq_sum', 'correct_score_sum')
+        )
+
+    @staticmethod
+    def get_item_statistics(lesson_id):
+        """Statistik per soal untuk satu quiz. Returns: {question_id: QuizItemStatistic}"""
+        return {
+            stat.question_id: stat
+            for stat in QuizItemStatistic.query.filter_by(lesson_id=lesson_id).all()
+        }
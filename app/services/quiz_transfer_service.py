@@ -0,0 +1,238 @@
+import csv
+import io
+import json
+from datetime import datetime
+from app import db
+from app.models.quiz import QuizQuestion, QuizOption
+from app.services.quiz_service import QuizService
+
+
+class QuizImportError(Exception):
+    """Import ditolak; errors berisi daftar pesan per baris"""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} baris tidak valid")
+        self.errors = errors
+
+
+class QuizTransferService:
+    """
+    Import/export soal quiz dalam format CSV atau JSON.
+
+    CSV: question_text, option_1 .. option_N, correct (nomor option benar, pisahkan dengan ';')
+    JSON: [{"question_text": "...", "options": [{"text": "...", "is_correct": true}, ...]}, ...]
+    """
+
+    MIN_OPTIONS = 2
+    MAX_OPTIONS = 10
+    MAX_OPTION_LENGTH = 255
+    MAX_ERRORS = 50
+    INSERT_CHUNK_SIZE = 1000
+    EXPORT_BATCH_SIZE = 1000
+
+    # ---- validasi ----
+
+    @staticmethod
+    def _validate(records):
+        """
+        Validasi semua record dalam satu pass.
+        records: iterable (nomor_baris, question_text, [(option_text, is_correct), ...])
+        Returns: list (question_text, options) yang valid; raise QuizImportError jika ada yang salah
+        """
+        cls = QuizTransferService
+        questions = []
+        errors = []
+        for line, text, options in records:
+            problem = None
+            text = (text or '').strip()
+            options = [((option or '').strip(), bool(correct)) for option, correct in options]
+            options = [(option, correct) for option, correct in options if option]
+
+            if not text:
+                problem = 'question_text kosong'
+            elif not cls.MIN_OPTIONS <= len(options) <= cls.MAX_OPTIONS:
+                problem = f'jumlah option harus {cls.MIN_OPTIONS}-{cls.MAX_OPTIONS}'
+            elif any(len(option) > cls.MAX_OPTION_LENGTH for option, _ in options):
+                problem = f'option lebih dari {cls.MAX_OPTION_LENGTH} karakter'
+            elif not any(correct for _, correct in options):
+                problem = 'tidak ada option yang benar'
+
+            if problem:
+                if len(errors) < cls.MAX_ERRORS:
+                    errors.append(f'Baris {line}: {problem}')
+                continue
+            questions.append((text, options))
+
+        if errors:
+            raise QuizImportError(errors)
+        if not questions:
+            raise QuizImportError(['File tidak berisi soal'])
+        return questions
+
+    @staticmethod
+    def _csv_records(stream):
+        reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        header = next(reader, None)
+        if not header:
+            return
+
+        header = [name.strip().lower() for name in header]
+        if 'question_text' not in header or 'correct' not in header:
+            raise QuizImportError(['Header CSV harus berisi question_text, option_1.., correct'])
+        text_col = header.index('question_text')
+        correct_col = header.index('correct')
+        option_cols = [i for i, name in enumerate(header) if name.startswith('option_')]
+
+        for line, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            row = row + [''] * (len(header) - len(row))
+            try:
+                correct = {int(value) for value in row[correct_col].replace(',', ';').split(';') if value.strip()}
+            except ValueError:
+                correct = set()
+            options = [(row[col], number in correct) for number, col in enumerate(option_cols, start=1)]
+            yield line, row[text_col], options
+
+    @staticmethod
+    def _json_records(stream):
+        try:
+            data = json.load(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+        except ValueError as e:
+            raise QuizImportError([f'JSON tidak valid: {str(e)}'])
+        if not isinstance(data, list):
+            raise QuizImportError(['JSON harus berupa array soal'])
+
+        for line, item in enumerate(data, start=1):
+            if not isinstance(item, dict):
+                yield line, None, []
+                continue
+            options = [
+                (option.get('text'), option.get('is_correct', False)) if isinstance(option, dict) else (None, False)
+                for option in item.get('options') or []
+            ]
+            yield line, item.get('question_text'), options
+
+    # ---- import ----
+
+    @staticmethod
+    def _insert_questions(lesson_id, questions):
+        """Insert soal secara bulk; Returns: list id soal sesuai urutan"""
+        now = datetime.utcnow()
+        rows = [{'lesson_id': lesson_id, 'question_text': text, 'created_at': now} for text, _ in questions]
+
+        if db.session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+            ids = []
+            for i in range(0, len(rows), QuizTransferService.INSERT_CHUNK_SIZE):
+                result = db.session.execute(
+                    db.insert(QuizQuestion).returning(QuizQuestion.id, sort_by_parameter_order=True),
+                    rows[i:i + QuizTransferService.INSERT_CHUNK_SIZE]
+                )
+                ids.extend(row[0] for row in result)
+            return ids
+
+        # Dialect tanpa RETURNING (MySQL): ORM flush tetap dalam transaksi yang sama
+        objects = [QuizQuestion(**row) for row in rows]
+        db.session.add_all(objects)
+        db.session.flush()
+        return [question.id for question in objects]
+
+    @staticmethod
+    def import_questions(lesson_id, stream, fmt):
+        """
+        Validasi lalu insert semua soal + option dalam satu transaksi.
+        Returns: jumlah soal yang diimport; raise QuizImportError jika file tidak valid
+        """
+        if fmt == 'csv':
+            records = QuizTransferService._csv_records(stream)
+        elif fmt == 'json':
+            records = QuizTransferService._json_records(stream)
+        else:
+            raise QuizImportError([f'Format tidak didukung: {fmt}'])
+
+        questions = QuizTransferService._validate(records)
+
+        try:
+            question_ids = QuizTransferService._insert_questions(lesson_id, questions)
+            option_rows = [
+                {'question_id': question_id, 'option_text': option, 'is_correct': correct}
+                for question_id, (_, options) in zip(question_ids, questions)
+                for option, correct in options
+            ]
+            for i in range(0, len(option_rows), QuizTransferService.INSERT_CHUNK_SIZE):
+                db.session.execute(db.insert(QuizOption), option_rows[i:i + QuizTransferService.INSERT_CHUNK_SIZE])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        QuizService.invalidate_answer_key(lesson_id)
+        return len(questions)
+
+    # ---- export ----
+
+    @staticmethod
+    def _iter_questions(lesson_id):
+        """Stream (question_text, [(option_text, is_correct)]) per soal dengan satu query ber-batch"""
+        rows = db.session.query(
+            QuizQuestion.id, QuizQuestion.question_text, QuizOption.option_text, QuizOption.is_correct
+        ).outerjoin(
+            QuizOption, QuizOption.question_id == QuizQuestion.id
+        ).filter(
+            QuizQuestion.lesson_id == lesson_id
+        ).order_by(QuizQuestion.id, QuizOption.id).yield_per(QuizTransferService.EXPORT_BATCH_SIZE)
+
+        current_id, current_text, options = None, None, []
+        for question_id, question_text, option_text, is_correct in rows:
+            if question_id != current_id:
+                if current_id is not None:
+                    yield current_text, options
+                current_id, current_text, options = question_id, question_text, []
+            if option_text is not None:
+                options.append((option_text, bool(is_correct)))
+        if current_id is not None:
+            yield current_text, options
+
+    @staticmethod
+    def export_csv(lesson_id):
+        """Generator baris CSV (header dihitung dari jumlah option terbanyak)"""
+        max_options = db.session.query(db.func.count(QuizOption.id)).join(
+            QuizQuestion, QuizQuestion.id == QuizOption.question_id
+        ).filter(
+            QuizQuestion.lesson_id == lesson_id
+        ).group_by(QuizOption.question_id).order_by(db.func.count(QuizOption.id).desc()).limit(1).scalar() or 0
+        max_options = max(max_options, QuizTransferService.MIN_OPTIONS)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            data = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return data
+
+        writer.writerow(['question_text'] + [f'option_{i}' for i in range(1, max_options + 1)] + ['correct'])
+        yield flush()
+
+        for count, (text, options) in enumerate(QuizTransferService._iter_questions(lesson_id), start=1):
+            texts = [option for option, _ in options]
+            correct = ';'.join(str(i) for i, (_, is_correct) in enumerate(options, start=1) if is_correct)
+            writer.writerow([text] + texts + [''] * (max_options - len(texts)) + [correct])
+            if count % 100 == 0:
+                yield flush()
+        yield flush()
+
+    @staticmethod
+    def export_json(lesson_id):
+        """Generator potongan array JSON, satu soal per potongan"""
+        yield '['
+        first = True
+        for text, options in QuizTransferService._iter_questions(lesson_id):
+            item = {
+                'question_text': text,
+                'options': [{'text': option, 'is_correct': correct} for option, correct in options]
+            }
+            yield ('' if first else ',') + '\n' + json.dumps(item, ensure_ascii=False)
+            first = False
+        yield '\n]\n'
@@ -0,0 +1,144 @@
+import atexit
+import threading
+from datetime import datetime
+
+class TrialExpirySweeper:
+    """
+    Tandai trial yang sudah lewat expires_at sebagai expired secara batch,
+    cabut enrollment trial-nya, dan kirim notifikasi "trial berakhir"
+    dengan satu bulk insert per batch.
+    """
+
+    def __init__(self, app=None, interval=300.0, batch_size=500):
+        self.app = None
+        self.enabled = False
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = {'runs': 0, 'expired': 0, 'failed_runs': 0}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Baca konfigurasi; thread periodik hanya jalan jika TRIAL_SWEEPER_ENABLED"""
+        self.app = app
+        self.enabled = app.config.get('TRIAL_SWEEPER_ENABLED', False)
+        self.interval = app.config.get('TRIAL_SWEEPER_INTERVAL', self.interval)
+        self.batch_size = app.config.get('TRIAL_SWEEPER_BATCH_SIZE', self.batch_size)
+        app.extensions['trial_sweeper'] = self
+
+        if self.enabled:
+            self.start()
+            atexit.register(self.stop)
+
+    def sweep(self, now=None):
+        """Proses semua trial yang kedaluwarsa. Returns: jumlah trial yang ditandai expired"""
+        now = now or datetime.utcnow()
+        total = 0
+        while True:
+            expired = self._sweep_batch(now)
+            total += expired
+            if expired < self.batch_size:
+                break
+
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['expired'] += total
+        return total
+
+    def _sweep_batch(self, now):
+        from app import db
+        from app.models.course import Course
+        from app.models.notification import Notification
+        from app.models.trial import CourseTrial
+        from app.models.user import enrollments
+
+        try:
+            # Index idx_trial_status_expires; SKIP LOCKED agar beberapa worker tidak memproses baris yang sama
+            batch = db.session.query(
+                CourseTrial.user_id, CourseTrial.course_id, Course.title
+            ).join(
+                Course, Course.id == CourseTrial.course_id
+            ).filter(
+                CourseTrial.status == CourseTrial.STATUS_ACTIVE,
+                CourseTrial.expires_at <= now
+            ).order_by(
+                CourseTrial.expires_at
+            ).limit(self.batch_size).with_for_update(skip_locked=True, of=CourseTrial).all()
+
+            if not batch:
+                db.session.commit()
+                return 0
+
+            keys = [(user_id, course_id) for user_id, course_id, _ in batch]
+            db.session.query(CourseTrial).filter(
+                db.tuple_(CourseTrial.user_id, CourseTrial.course_id).in_(keys),
+                CourseTrial.status == CourseTrial.STATUS_ACTIVE
+            ).update({CourseTrial.status: CourseTrial.STATUS_EXPIRED}, synchronize_session=False)
+
+            # Trial memberi enrollment sementara; dicabut seperti cancel_trial
+            db.session.execute(enrollments.delete().where(
+                db.tuple_(enrollments.c.user_id, enrollments.c.course_id).in_(keys)
+            ))
+
+            db.session.execute(db.insert(Notification), [
+                {
+                    'user_id': user_id,
+                    'message': f"Masa trial kursus '{title}' telah berakhir",
+                    'type': 'warning',
+                    'is_read': False,
+                    'created_at': now,
+                    'link': f"/courses/{course_id}"
+                }
+                for user_id, course_id, title in batch
+            ])
+
+            db.session.commit()
+
+            # Insert bulk tidak lewat event ORM: minta stream SSE user terkait sinkron ulang
+            from app.services.notification_service import NotificationService
+            NotificationService.publish_resync(user_id for user_id, _, _ in batch)
+            return len(batch)
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def stats(self):
+        """Counter sweeper untuk monitoring"""
+        with self._lock:
+            data = dict(self._stats)
+        data['running'] = self._thread is not None and self._thread.is_alive()
+        return data
+
+    def start(self):
+        """Jalankan thread sweep periodik"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='trial-expiry-sweeper', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Hentikan thread sweep"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.sweep()
+            except Exception as e:
+                with self._lock:
+                    self._stats['failed_runs'] += 1
+                print(f"Trial Sweeper Error: {str(e)}")
+
+
+trial_sweeper = TrialExpirySweeper()
@@ -0,0 +1,245 @@
+import os
+import re
+import subprocess
+import time
+from collections import namedtuple
+
+Rendition = namedtuple('Rendition', ['name', 'width', 'height', 'video_bitrate', 'crf', 'audio_bitrate'])
+
+# Sama dengan preset compress_video
+DEFAULT_RENDITIONS = (
+    Rendition('low', 480, 270, '500k', 28, '128k'),
+    Rendition('medium', 1280, 720, '1500k', 23, '128k'),
+    Rendition('high', 1920, 1080, '3000k', 20, '128k'),
+)
+
+# Ladder HLS adaptive; rendition di atas resolusi source dilewati
+HLS_LADDER = (
+    Rendition('270p', 480, 270, '400k', 28, '96k'),
+    Rendition('480p', 854, 480, '1000k', 26, '128k'),
+    Rendition('720p', 1280, 720, '2500k', 23, '128k'),
+    Rendition('1080p', 1920, 1080, '5000k', 21, '128k'),
+)
+
+# Key compressed_video_versions yang dipakai template (low/medium/high)
+MP4_VERSION_KEYS = {'270p': 'low', '480p': 'low', '720p': 'medium', '1080p': 'high'}
+
+SEGMENT_TYPES = ('mpegts', 'fmp4')
+
+_BENCH = re.compile(r'bench: utime=([\d.]+)s stime=([\d.]+)s rtime=([\d.]+)s')
+
+
+def _bits(rate):
+    """'1500k' -> 1500000"""
+    rate = str(rate).strip().lower()
+    if rate.endswith('k'):
+        return int(float(rate[:-1]) * 1000)
+    if rate.endswith('m'):
+        return int(float(rate[:-1]) * 1000000)
+    return int(float(rate))
+
+
+def video_encoder_args(encoder, rendition, stream=''):
+    """
+    Argumen encoder video untuk satu rendition. libx264: CRF dengan batas maxrate;
+    encoder H.264 lain (fallback dari registry ffmpeg) memakai target bitrate.
+    stream: specifier output stream, mis. ':v:0' untuk satu output dengan banyak varian
+    """
+    maxrate = _bits(rendition.video_bitrate)
+    if encoder == 'libx264':
+        args = [f'-preset{stream}', 'veryfast', f'-crf{stream}', str(rendition.crf)]
+    else:
+        args = [f'-b{stream or ":v"}', str(maxrate)]
+    return [f'-c{stream or ":v"}', encoder] + args + [
+        f'-maxrate{stream}', str(maxrate), f'-bufsize{stream}', str(maxrate * 2)
+    ]
+
+
+def keyframe_args(hls_time, fps=None):
+    """Keyframe di tiap batas segmen, sama untuk semua rendition, agar player bisa pindah varian di batas segmen"""
+    args = ['-sc_threshold', '0', '-force_key_frames', f'expr:gte(t,n_forced*{hls_time})']
+    if fps:
+        gop = max(int(round(fps * hls_time)), 1)
+        args = ['-g', str(gop), '-keyint_min', str(gop)] + args
+    return args
+
+
+class VideoPipeline:
+    """
+    Encode satu kali decode: source di-split dengan -filter_complex ke semua rendition,
+    tiap rendition di-encode sekali lalu di-tee ke MP4 dan varian HLS, plus frame poster,
+    dalam satu proses ffmpeg.
+    """
+
+    HLS_TIME = 6
+    POSTER_AT = 1.0
+
+    @staticmethod
+    def build_command(input_path, renditions, mp4_paths, hls_dirs, poster_path,
+                      hls_time=None, poster_at=None, segment_type='mpegts', fps=None, remux_path=None,
+                      video_encoder='libx264'):
+        """
+        Susun argumen ffmpeg single-pass.
+        mp4_paths/hls_dirs: satu per rendition (None = tidak dibuat)
+        segment_type: 'mpegts' (.ts) atau 'fmp4' (.m4s + init.mp4)
+        remux_path: MP4 hasil copy stream source tanpa re-encode (source sudah H.264/AAC)
+        """
+        if segment_type not in SEGMENT_TYPES:
+            raise ValueError(f'segment_type tidak dikenal: {segment_type}')
+        hls_time = hls_time or VideoPipeline.HLS_TIME
+        poster_at = VideoPipeline.POSTER_AT if poster_at is None else poster_at
+        n = len(renditions)
+
+        labels = [f'[s{i}]' for i in range(n)] + (['[sp]'] if poster_path else [])
+        graph = [f"[0:v]split={len(labels)}{''.join(labels)}"]
+        for i, rendition in enumerate(renditions):
+            graph.append(f'[s{i}]scale={rendition.width}:{rendition.height}[v{i}]')
+        if poster_path:
+            graph.append(f'[sp]trim=start={poster_at:g},setpts=PTS-STARTPTS[vp]')
+
+        cmd = ['ffmpeg', '-hide_banner', '-benchmark', '-y', '-i', input_path, '-filter_complex', ';'.join(graph)]
+
+        for i, rendition in enumerate(renditions):
+            cmd += ['-map', f'[v{i}]', '-map', '0:a?'] + video_encoder_args(video_encoder, rendition) + [
+                '-c:a', 'aac', '-b:a', rendition.audio_bitrate,
+                # Header global untuk MP4; muxer mpegts menyisipkan SPS/PPS sendiri di keyframe
+                '-flags', '+global_header'
+            ] + keyframe_args(hls_time, fps)
+            targets = []
+            if mp4_paths[i]:
+                targets.append(f'[f=mp4:movflags=+faststart]{mp4_paths[i]}')
+            if hls_dirs[i]:
+                extension = 'm4s' if segment_type == 'fmp4' else 'ts'
+                segment = os.path.join(hls_dirs[i], f'segment_%03d.{extension}')
+                options = f'f=hls:hls_time={hls_time}:hls_playlist_type=vod:hls_list_size=0:hls_segment_type={segment_type}'
+                if segment_type == 'fmp4':
+                    options += ':hls_fmp4_init_filename=init.mp4'
+                targets.append(f'[{options}:hls_segment_filename={segment}]{os.path.join(hls_dirs[i], "index.m3u8")}')
+            cmd += ['-f', 'tee', '|'.join(targets)]
+
+        if remux_path:
+            cmd += ['-map', '0:v:0', '-map', '0:a:0?', '-c', 'copy', '-movflags', '+faststart', remux_path]
+        if poster_path:
+            cmd += ['-map', '[vp]', '-frames:v', '1', '-q:v', '2', poster_path]
+        return cmd
+
+    @staticmethod
+    def master_playlist(renditions, variant_uris, segment_type='mpegts'):
+        """Isi master .m3u8 untuk varian HLS"""
+        lines = ['#EXTM3U', '#EXT-X-VERSION:7' if segment_type == 'fmp4' else '#EXT-X-VERSION:3']
+        for rendition, uri in zip(renditions, variant_uris):
+            bandwidth = _bits(rendition.video_bitrate) + _bits(rendition.audio_bitrate)
+            lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={rendition.width}x{rendition.height}')
+            lines.append(uri)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def parse_benchmark(stderr):
+        """Baris 'bench:' dari ffmpeg -benchmark -> {'ffmpeg_utime','ffmpeg_stime','ffmpeg_rtime'}"""
+        match = _BENCH.search(stderr or '')
+        if not match:
+            return {}
+        utime, stime, rtime = (float(value) for value in match.groups())
+        return {'ffmpeg_utime': utime, 'ffmpeg_stime': stime, 'ffmpeg_rtime': rtime}
+
+    @staticmethod
+    def encode(input_path, compressed_folder, hls_root, lesson_id, renditions=None,
+               segment_type='mpegts', mp4_renditions=('720p',), plan=None):
+        """
+        Thumbnail + varian HLS (+ MP4 fallback) dalam satu invocation ffmpeg.
+        renditions: default rencana EncodePlanner (HLS_LADDER tanpa upscale, aspect ratio source)
+        mp4_renditions: nama rendition yang juga disimpan sebagai MP4 (player memakai HLS;
+            MP4 hanya untuk halaman preview/browser tanpa HLS). Jika tidak ada yang cocok,
+            rendition tertinggi yang dipakai. MP4 yang setara source di-remux, bukan di-encode.
+        Returns: dict berbentuk sama dengan MediaCompressionService.encode_lesson_video,
+        ditambah 'timings' per tahap (detik)
+        """
+        from app.services.encode_planner import EncodePlanner
+
+        timings = {}
+        started = time.perf_counter()
+
+        if plan is None:
+            plan = EncodePlanner.plan(EncodePlanner.probe(input_path))
+        if renditions is None:
+            renditions = plan.renditions
+        mp4_names = {r.name for r in renditions if r.name in mp4_renditions} or {renditions[-1].name}
+        timings['probe'] = time.perf_counter() - started
+
+        stage = time.perf_counter()
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        hls_dir = os.path.join(hls_root, f'lesson_{lesson_id}')
+        thumb_name = f'thumb_lesson_{lesson_id}.jpg'
+        os.makedirs(compressed_folder, exist_ok=True)
+
+        mp4_paths = [
+            os.path.join(compressed_folder, f'{base_name}_{r.name}.mp4') if r.name in mp4_names else None
+            for r in renditions
+        ]
+        # HLS tetap di-encode agar keyframe semua varian sejajar; hanya MP4 yang bisa di-copy
+        remux_path = None
+        for i, rendition in enumerate(renditions):
+            if mp4_paths[i] and rendition.name in plan.remux:
+                remux_path, mp4_paths[i] = mp4_paths[i], None
+                break
+        hls_dirs = [os.path.join(hls_dir, r.name) for r in renditions]
+        for directory in hls_dirs:
+            os.makedirs(directory, exist_ok=True)
+        poster_path = os.path.join(compressed_folder, thumb_name)
+
+        cmd = VideoPipeline.build_command(
+            input_path, renditions, mp4_paths, hls_dirs, poster_path,
+            segment_type=segment_type, fps=plan.source.fps, remux_path=remux_path,
+            video_encoder=plan.video_encoder
+        )
+        timings['prepare'] = time.perf_counter() - stage
+
+        stage = time.perf_counter()
+        process = subprocess.run(cmd, capture_output=True, text=True)
+        timings['encode'] = time.perf_counter() - stage
+        timings.update(VideoPipeline.parse_benchmark(process.stderr))
+        if process.returncode != 0:
+            raise RuntimeError(f'ffmpeg single-pass gagal: {process.stderr[-500:]}')
+
+        stage = time.perf_counter()
+        playlist_name = 'playlist.m3u8'
+        with open(os.path.join(hls_dir, playlist_name), 'w') as f:
+            f.write(VideoPipeline.master_playlist(
+                renditions, [f'{r.name}/index.m3u8' for r in renditions], segment_type
+            ))
+
+        original_size = os.path.getsize(input_path)
+        versions = {}
+        written = []
+        for rendition in renditions:
+            if rendition.name not in mp4_names:
+                continue
+            path = os.path.join(compressed_folder, f'{base_name}_{rendition.name}.mp4')
+            if os.path.exists(path):
+                versions[MP4_VERSION_KEYS.get(rendition.name, rendition.name)] = f'uploads/compressed/{os.path.basename(path)}'
+                written.append(path)
+        total_compressed = sum(os.path.getsize(path) for path in written)
+        timings['package'] = time.perf_counter() - stage
+        timings['total'] = time.perf_counter() - started
+
+        return {
+            'thumbnail': {
+                'success': os.path.exists(poster_path),
+                'thumbnail_path': f'uploads/compressed/{thumb_name}'
+            },
+            'compress': {
+                'success': bool(versions),
+                'original_size': original_size,
+                'total_compressed_size': total_compressed,
+                'compression_ratio': round((1 - total_compressed / original_size) * 100, 2) if original_size > 0 else 0,
+                'versions': versions,
+                'remuxed': sorted(name for name in mp4_names if name in plan.remux)
+            },
+            'hls': {
+                'success': True,
+                'playlist_path': f'uploads/hls/lesson_{lesson_id}/{playlist_name}',
+                'variants': [r.name for r in renditions],
+                'segment_type': segment_type
+            },
+            'timings': timings
+        }
@@ -0,0 +1,23 @@
+import pytest
+from app import create_app, db
+from app.extensions.query_profiler import assert_max_queries as _assert_max_queries
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def assert_max_queries():
+    """with assert_max_queries(5): client.get(...)"""
+    return _assert_max_queries
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import User, Course, CourseTrial
+from app.services.access_service import AccessService
+from app.services.course_service import CourseService
+from app.extensions.query_profiler import record_queries
+
+def _setup():
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    student = User(username='siswa', email='siswa@cendrawasih.id')
+    for user in (teacher, student):
+        user.set_password('password123')
+        db.session.add(user)
+    db.session.flush()
+    course = Course(title='Kursus', instructor_id=teacher.id)
+    db.session.add(course)
+    db.session.commit()
+    topic, _ = CourseService.create_topic(course.id, 'Topik', order=1)
+    first, _ = CourseService.create_lesson(topic.id, 'Pelajaran 1', order=1)
+    second, _ = CourseService.create_lesson(topic.id, 'Pelajaran 2', order=2)
+    return student.id, course.id, first.id, second.id
+
+def test_resolve_uses_at_most_two_queries_and_memoizes(app):
+    student_id, course_id, first_id, second_id = _setup()
+    expires_at = datetime.utcnow() + timedelta(days=3)
+    db.session.add(CourseTrial(user_id=student_id, course_id=course_id, expires_at=expires_at))
+    db.session.commit()
+    CourseService.invalidate_course_outline(course_id)
+
+    with app.test_request_context():
+        with record_queries() as recorder:
+            access = AccessService.resolve(student_id, course_id, second_id)
+            assert AccessService.resolve(student_id, course_id, second_id) is access
+            assert CourseService.has_trial_access(student_id, course_id)
+            assert not CourseService.is_student_enrolled(student_id, course_id)
+        assert recorder.count <= 2
+
+    assert access.trial_active and not access.enrolled
+    assert access.trial_expiry == expires_at
+    assert not access.is_preview_lesson
+
+def test_first_lesson_is_preview(app):
+    student_id, course_id, first_id, second_id = _setup()
+
+    with app.test_request_context():
+        assert AccessService.resolve(student_id, course_id, first_id).has_access
+        assert not AccessService.resolve(student_id, course_id, second_id).has_access
@@ -0,0 +1,90 @@
+import pickle
+import threading
+import time
+import pytest
+from app.extensions.cache import Cache, MemoryBackend, FileSystemBackend, RedisBackend
+from app.services.course_outline import CourseOutline, LessonOutline, TopicOutline
+
+def _backends(tmp_path):
+    return [
+        MemoryBackend(threshold=100),
+        FileSystemBackend(str(tmp_path / 'cache'), threshold=100),
+        RedisBackend.from_url('fakeredis://', 'test:')
+    ]
+
+@pytest.mark.parametrize('index', [0, 1, 2])
+def test_namespace_version_bump(tmp_path, index):
+    cache = Cache()
+    cache.backend = _backends(tmp_path)[index]
+
+    cache.set('kursus', 1, {'title': 'A'})
+    cache.set('lain', 1, 'tetap')
+    assert cache.get('kursus', 1) == {'title': 'A'}
+
+    cache.bump('kursus')
+    assert cache.get('kursus', 1) is None
+    assert cache.get('lain', 1) == 'tetap'
+
+    stats = cache.stats('kursus')
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['invalidations'] == 1
+
+def test_memory_ttl_and_eviction_metrics():
+    cache = Cache()
+    cache.backend = MemoryBackend(threshold=3, on_evict=cache._record_eviction)
+
+    cache.set('ns', 'ttl', 'x', timeout=0.05)
+    time.sleep(0.1)
+    assert cache.get('ns', 'ttl') is None
+
+    for i in range(5):
+        cache.set('ns', i, i)
+    # 1 slot dipakai version key namespace
+    assert cache.stats('ns')['evictions'] >= 3
+    assert cache.get('ns', 4) == 4
+
+def test_single_flight_computes_once():
+    cache = Cache()
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'hasil'
+
+    results = []
+    def worker():
+        barrier.wait()
+        results.append(cache.get_or_set('ns', 'key', factory))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ['hasil'] * 8
+    assert len(calls) == 1
+
+def test_memoize_and_invalidate():
+    cache = Cache()
+    calls = []
+
+    @cache.memoize('katalog')
+    def levels(prefix):
+        calls.append(prefix)
+        return [prefix + '1', prefix + '2']
+
+    assert levels('SMA') == levels('SMA') == ['SMA1', 'SMA2']
+    assert calls == ['SMA']
+    levels.invalidate()
+    levels('SMA')
+    assert calls == ['SMA', 'SMA']
+
+def test_course_outline_survives_pickle():
+    lessons = (LessonOutline(1, 'A', 'text', 1, 10), LessonOutline(2, 'B', 'video', 2, 10))
+    outline = CourseOutline.from_topics(5, (TopicOutline(10, 'Topik', 1, lessons),))
+
+    restored = pickle.loads(pickle.dumps(outline))
+    assert restored == outline
+    assert restored.get_navigation(2).prev.id == 1
@@ -0,0 +1,71 @@
+from app import db
+from app.models import User, Course
+from app.services.course_service import CourseService
+from app.services.course_outline import CourseOutlineService
+
+def _make_course():
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    teacher.set_password('password123')
+    db.session.add(teacher)
+    db.session.flush()
+    course = Course(title='Kursus Uji', instructor_id=teacher.id)
+    db.session.add(course)
+    db.session.commit()
+    return course.id
+
+def test_outline_is_ordered_and_cached(app):
+    course_id = _make_course()
+    second, _ = CourseService.create_topic(course_id, 'Topik B', order=2)
+    first, _ = CourseService.create_topic(course_id, 'Topik A', order=1)
+    CourseService.create_lesson(second.id, 'B1', order=1)
+    CourseService.create_lesson(first.id, 'A2', order=2)
+    CourseService.create_lesson(first.id, 'A1', order=1)
+
+    before = CourseOutlineService.stats()
+    outline = CourseService.get_course_outline(course_id)
+    assert [topic.title for topic in outline.topics] == ['Topik A', 'Topik B']
+    assert [lesson.title for lesson in outline.lessons] == ['A1', 'A2', 'B1']
+    assert CourseService.get_course_outline(course_id) is outline
+
+    after = CourseOutlineService.stats()
+    assert after['misses'] == before['misses'] + 1
+    assert after['hits'] == before['hits'] + 1
+
+def test_outline_invalidated_by_mutators(app):
+    course_id = _make_course()
+    topic, _ = CourseService.create_topic(course_id, 'Topik', order=1)
+    lesson, _ = CourseService.create_lesson(topic.id, 'Pelajaran 1', order=1)
+    assert CourseService.get_course_outline(course_id).first_lesson_id == lesson.id
+
+    new_first, _ = CourseService.create_lesson(topic.id, 'Pelajaran 0', order=0)
+    assert CourseService.get_course_outline(course_id).first_lesson_id == new_first.id
+
+    CourseService.update_topic(topic.id, title='Topik Baru', order=1)
+    assert CourseService.get_course_outline(course_id).topics[0].title == 'Topik Baru'
+
+    CourseService.delete_lesson(new_first.id)
+    assert CourseService.get_course_outline(course_id).lesson_ids == (lesson.id,)
+
+    CourseService.delete_course(course_id)
+    assert CourseService.get_course_outline(course_id) is None
+
+def test_navigation_crosses_topic_boundaries(app):
+    course_id = _make_course()
+    first_topic, _ = CourseService.create_topic(course_id, 'Topik 1', order=1)
+    second_topic, _ = CourseService.create_topic(course_id, 'Topik 2', order=2)
+    a, _ = CourseService.create_lesson(first_topic.id, 'A', order=1)
+    b, _ = CourseService.create_lesson(first_topic.id, 'B', order=2)
+    c, _ = CourseService.create_lesson(second_topic.id, 'C', order=1)
+
+    nav_a = CourseService.get_lesson_navigation(course_id, a.id)
+    assert nav_a.is_first and nav_a.prev is None and nav_a.next.id == b.id
+
+    nav_b = CourseService.get_lesson_navigation(course_id, b.id)
+    assert (nav_b.position, nav_b.prev.id, nav_b.next.id) == (1, a.id, c.id)
+
+    nav_c = CourseService.get_lesson_navigation(course_id, c.id)
+    assert nav_c.is_last and nav_c.next is None and nav_c.prev.id == b.id
+
+    # Urutan berubah -> index ikut dibangun ulang
+    CourseService.update_topic(second_topic.id, title='Topik 2', order=0)
+    assert CourseService.get_lesson_navigation(course_id, c.id).is_first
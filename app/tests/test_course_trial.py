@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import User, Course, CourseTrial
+from app.services.course_service import CourseService
+from app.extensions.query_profiler import record_queries
+
+def _setup():
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    student = User(username='siswa', email='siswa@cendrawasih.id')
+    for user in (teacher, student):
+        user.set_password('password123')
+        db.session.add(user)
+    db.session.flush()
+    course = Course(title='Kursus Trial', instructor_id=teacher.id, is_trial_enabled=True, trial_days=7)
+    db.session.add(course)
+    db.session.commit()
+    return student.id, course.id
+
+def test_trial_lifecycle(app):
+    student_id, course_id = _setup()
+
+    success, _ = CourseService.start_trial(student_id, course_id)
+    assert success
+    db.session.expire_all()
+
+    with record_queries() as recorder:
+        assert CourseService.is_trial_active(student_id, course_id)
+    assert recorder.count == 1
+    assert CourseService.get_trial_expiry(student_id, course_id) > datetime.utcnow()
+
+    success, _ = CourseService.cancel_trial(student_id, course_id)
+    assert success
+    assert CourseTrial.query.get((student_id, course_id)).status == CourseTrial.STATUS_CANCELLED
+    assert not CourseService.has_trial_access(student_id, course_id)
+
+def test_expired_trial_has_no_access(app):
+    student_id, course_id = _setup()
+    db.session.add(CourseTrial(
+        user_id=student_id, course_id=course_id,
+        started_at=datetime.utcnow() - timedelta(days=8),
+        expires_at=datetime.utcnow() - timedelta(days=1)
+    ))
+    db.session.commit()
+
+    assert not CourseService.is_trial_active(student_id, course_id)
+    assert not CourseService.has_trial_access(student_id, course_id)
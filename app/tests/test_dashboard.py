@@ -0,0 +1,59 @@
+from app import db
+from app.models import User, Course, Topic, Lesson, LessonProgress, CourseProgressSummary
+from app.services.course_service import CourseService
+from app.services.dashboard_service import DashboardService
+from app.services.progress_summary_service import ProgressSummaryService
+
+def _make_courses():
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    teacher.set_password('password123')
+    student = User(username='siswa', email='siswa@cendrawasih.id', role='student')
+    student.set_password('password123')
+    db.session.add_all([teacher, student])
+    db.session.flush()
+
+    lesson_ids = {}
+    for title, count in (('Kursus A', 4), ('Kursus B', 2)):
+        course = Course(title=title, instructor_id=teacher.id)
+        db.session.add(course)
+        db.session.flush()
+        topic = Topic(title='Topik 1', course_id=course.id, order=1)
+        db.session.add(topic)
+        db.session.flush()
+        lessons = [Lesson(title=f'Pelajaran {i}', topic_id=topic.id, order=i) for i in range(count)]
+        db.session.add_all(lessons)
+        db.session.flush()
+        lesson_ids[course.id] = [lesson.id for lesson in lessons]
+    db.session.commit()
+    return student.id, lesson_ids
+
+def test_dashboard_computes_missing_summaries_without_writing(app, client):
+    """Baris summary yang belum di-backfill dihitung di memori, tidak dibuat saat GET"""
+    student_id, lesson_ids = _make_courses()
+    course_a, course_b = lesson_ids
+    for course_id in lesson_ids:
+        CourseService.enroll_student(student_id, course_id)
+    # Progress lama tanpa baris summary (sebelum backfill)
+    db.session.add(LessonProgress(user_id=student_id, lesson_id=lesson_ids[course_a][0], is_completed=True))
+    db.session.commit()
+    CourseProgressSummary.query.delete()
+    db.session.commit()
+
+    data = DashboardService.load_dashboard(student_id)
+    progress = {item['course'].id: item['progress'] for item in data['courses_with_progress']}
+    assert (progress[course_a]['completed_lessons'], progress[course_a]['total_lessons']) == (1, 4)
+    assert progress[course_a]['progress_percent'] == 25
+    assert (progress[course_b]['completed_lessons'], progress[course_b]['total_lessons']) == (0, 2)
+    # Quick stats juga mencakup kursus tanpa baris summary
+    assert (data['total_lessons_completed'], data['total_lessons'], data['avg_progress']) == (1, 6, 17)
+
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student_id)
+    assert client.get('/dashboard').status_code == 200
+    db.session.expire_all()
+    assert CourseProgressSummary.query.count() == 0
+
+    # Setelah backfill hasilnya sama, dibaca dari tabel
+    ProgressSummaryService.rebuild(user_id=student_id)
+    data = DashboardService.load_dashboard(student_id)
+    assert (data['total_lessons_completed'], data['total_lessons'], data['avg_progress']) == (1, 6, 17)
@@ -0,0 +1,101 @@
+import pytest
+from app.services.encode_planner import EncodePlanner
+from app.services.ffmpeg_capabilities import Capabilities, ffmpeg_capabilities
+from app.services.media_compression_service import MediaCompressionService
+from app.services.video_pipeline import VideoPipeline, DEFAULT_RENDITIONS, HLS_LADDER
+
+FFMPEG = Capabilities(True, '6.1.1', '6.1.1', frozenset({'libx264', 'aac'}), frozenset({'mp4', 'hls'}), None, None)
+
+@pytest.fixture(autouse=True)
+def ffmpeg_build(monkeypatch):
+    """Build ffmpeg dengan libx264 + muxer mp4/hls, terlepas dari ffmpeg di mesin test"""
+    monkeypatch.setattr(ffmpeg_capabilities, '_snapshot', FFMPEG)
+
+def make_source(width, height, video_codec='h264', audio_codec='aac', bit_rate='2000000', r_frame_rate='30/1'):
+    streams = [{
+        'codec_type': 'video', 'codec_name': video_codec, 'pix_fmt': 'yuv420p',
+        'width': width, 'height': height, 'r_frame_rate': r_frame_rate, 'bit_rate': bit_rate
+    }]
+    if audio_codec:
+        streams.append({'codec_type': 'audio', 'codec_name': audio_codec})
+    return EncodePlanner.source_from_metadata({'streams': streams, 'format': {'duration': '12.5', 'bit_rate': '2100000'}})
+
+def test_probe_metadata_to_source_info():
+    source = make_source(1280, 720, r_frame_rate='30000/1001', bit_rate=None)
+    assert (source.width, source.height, source.video_codec, source.audio_codec) == (1280, 720, 'h264', 'aac')
+    assert round(source.fps, 2) == 29.97 and source.duration == 12.5
+    # Tanpa bitrate stream, bitrate container dipakai
+    assert source.video_bitrate == 2100000
+
+def test_plan_never_upscales_and_keeps_aspect_ratio():
+    plan = EncodePlanner.plan(make_source(854, 480, video_codec='vp9'))
+    assert [(r.name, r.width, r.height) for r in plan.renditions] == [('270p', 480, 270), ('480p', 854, 480)]
+    assert not plan.remux
+
+    # 4:3 dan portrait: sisi pendek menentukan rendition
+    plan = EncodePlanner.plan(make_source(640, 480, video_codec='vp9'))
+    assert [(r.width, r.height) for r in plan.renditions] == [(360, 270), (640, 480)]
+    plan = EncodePlanner.plan(make_source(720, 1280, video_codec='vp9'))
+    assert [(r.name, r.width, r.height) for r in plan.renditions][-1] == ('720p', 720, 1280)
+
+    # Source lebih kecil dari ladder: satu rendition di resolusi source
+    plan = EncodePlanner.plan(make_source(320, 180))
+    assert [(r.width, r.height) for r in plan.renditions] == [(320, 180)]
+
+    # Resolusi tidak diketahui: ladder apa adanya
+    assert EncodePlanner.plan(EncodePlanner.source_from_metadata({})).renditions == HLS_LADDER
+
+def test_compliant_source_is_remuxed():
+    plan = EncodePlanner.plan(make_source(1280, 720, bit_rate='2000000'))
+    assert plan.remux == {'720p'}
+    # Bitrate rendition tidak melebihi source
+    assert plan.renditions[-1].video_bitrate == '2000000'
+
+    assert not EncodePlanner.plan(make_source(1280, 720, audio_codec='mp3')).remux
+    assert not EncodePlanner.plan(make_source(1280, 720, bit_rate='8000000')).remux
+    assert not EncodePlanner.plan(make_source(1280, 720), allow_remux=False).remux
+
+def test_odd_sized_source_plans_even_sizes():
+    """libx264/yuv420p menolak ukuran ganjil: rendition setinggi source dibulatkan ke bawah, tanpa remux"""
+    plan = EncodePlanner.plan(make_source(853, 480, bit_rate='800000'))
+    assert [(r.name, r.width, r.height) for r in plan.renditions] == [('270p', 480, 270), ('480p', 852, 480)]
+    assert not plan.remux
+
+    plan = EncodePlanner.plan(make_source(1366, 767))
+    assert [(r.width, r.height) for r in plan.renditions][-1] == (1282, 720)
+    plan = EncodePlanner.plan(make_source(767, 1366))
+    assert [(r.width, r.height) for r in plan.renditions][-1] == (720, 1282)
+
+    for width, height in ((853, 480), (1366, 767), (255, 201), (1919, 1079)):
+        plan = EncodePlanner.plan(make_source(width, height))
+        for rendition in plan.renditions:
+            assert rendition.width % 2 == 0 and rendition.height % 2 == 0, (width, height, rendition)
+            assert rendition.width <= width and rendition.height <= height
+    assert EncodePlanner.plan(make_source(255, 201)).renditions[0][1:3] == (254, 200)
+
+    # Rendition MP4 multi-pass memakai planner yang sama
+    plan = EncodePlanner.plan(make_source(1281, 720, bit_rate='800000'), DEFAULT_RENDITIONS)
+    assert [(r.name, r.width, r.height) for r in plan.renditions] == [('low', 480, 270), ('medium', 1280, 720)]
+    assert not plan.remux
+
+def test_compress_video_remuxes_and_skips_upscale(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr('subprocess.run', lambda cmd, **kwargs: calls.append(cmd))
+    source_file = tmp_path / 'rekaman.mp4'
+    source_file.write_bytes(b'0' * 100)
+
+    source = make_source(1280, 720, bit_rate='1200000')
+    result = MediaCompressionService.compress_video(str(source_file), str(tmp_path), source=source)
+
+    assert len(calls) == 2 and result['remuxed'] == ['medium']
+    low, medium = calls
+    assert 'scale=480:270' in low and 'libx264' in low
+    assert medium[medium.index('-c') + 1] == 'copy' and 'libx264' not in medium
+    assert not any('1920' in arg for cmd in calls for arg in cmd)
+
+def test_single_pass_remuxes_mp4_fallback():
+    cmd = VideoPipeline.build_command(
+        'in.mp4', DEFAULT_RENDITIONS[:1], [None], ['hls/low'], None, remux_path='out/medium.mp4'
+    )
+    assert cmd[-1] == 'out/medium.mp4' and cmd[cmd.index('-c') + 1] == 'copy'
+    assert 'f=mp4' not in cmd[cmd.index('tee') + 1]
@@ -0,0 +1,41 @@
+from app import db
+from app.models import User, Course
+from app.services.course_service import CourseService
+from app.extensions.query_profiler import record_queries
+
+def _setup(course_count=12, enrolled_count=5):
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    student = User(username='siswa', email='siswa@cendrawasih.id')
+    for user in (teacher, student):
+        user.set_password('password123')
+        db.session.add(user)
+    db.session.flush()
+
+    courses = [Course(title=f'Kursus {i}', instructor_id=teacher.id) for i in range(course_count)]
+    db.session.add_all(courses)
+    db.session.flush()
+    student.enrolled_courses.extend(courses[:enrolled_count])
+    db.session.commit()
+    return student.id, [course.id for course in courses]
+
+def test_enrolled_ids_cached_per_request(app):
+    student_id, course_ids = _setup()
+
+    with app.test_request_context():
+        with record_queries() as recorder:
+            assert CourseService.get_enrolled_course_ids(student_id, course_ids) == set(course_ids[:5])
+            for course_id in course_ids:
+                CourseService.is_student_enrolled(student_id, course_id)
+        assert recorder.count == 1
+
+        CourseService.unenroll_student(student_id, course_ids[0])
+        assert not CourseService.is_student_enrolled(student_id, course_ids[0])
+
+def test_course_list_enrollment_queries_do_not_scale(app, client, assert_max_queries):
+    student_id, course_ids = _setup()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student_id)
+
+    with assert_max_queries(9):
+        response = client.get('/courses/list')
+    assert response.status_code == 200
@@ -0,0 +1,79 @@
+import subprocess
+from app import db
+from app.models.user import User
+from app.services.ffmpeg_capabilities import (
+    FFmpegCapabilities, Capabilities, ffmpeg_capabilities, parse_encoders, parse_muxers, parse_version
+)
+
+ENCODERS = """Encoders:
+ V..... = Video
+ A..... = Audio
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC (codec h264)
+ V....D libvpx-vp9           libvpx VP9 (codec vp9)
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+MUXERS = """File formats:
+ D. = Demuxing supported
+ .E = Muxing supported
+ --
+  E hls             Apple HTTP Live Streaming
+  E matroska,webm   Matroska / WebM
+  E mp4             MP4 (MPEG-4 Part 14)
+"""
+
+def fake_run(calls):
+    outputs = {'-version': 'ffmpeg version 6.1.1 Copyright (c) 2000-2023', '-encoders': ENCODERS, '-muxers': MUXERS}
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=outputs[cmd[-1]], stderr='')
+    return run
+
+def test_parse_ffmpeg_listings():
+    assert parse_version('ffmpeg version 6.1.1-3ubuntu5 Copyright (c)') == '6.1.1-3ubuntu5'
+    assert parse_encoders(ENCODERS) == {'libx264', 'libvpx-vp9', 'aac'}
+    assert parse_muxers(MUXERS) == {'hls', 'matroska', 'webm', 'mp4'}
+
+def test_probe_runs_once_per_process(monkeypatch):
+    calls = []
+    monkeypatch.setattr('subprocess.run', fake_run(calls))
+    registry = FFmpegCapabilities()
+
+    assert registry.available and registry.get().ffmpeg_version == '6.1.1'
+    assert registry.has_encoder('libx264') and registry.has_muxer('hls')
+    assert registry.pick_encoder(('libopenh264', 'libvpx-vp9', 'libvpx')) == 'libvpx-vp9'
+    for _ in range(10):
+        registry.available
+    assert len(calls) == 4
+
+    registry.refresh()
+    assert len(calls) == 8
+
+def test_missing_ffmpeg_is_cached(monkeypatch):
+    calls = []
+
+    def missing(cmd, **kwargs):
+        calls.append(cmd)
+        raise FileNotFoundError(2, 'No such file or directory', cmd[0])
+    monkeypatch.setattr('subprocess.run', missing)
+    registry = FFmpegCapabilities()
+
+    assert not registry.available and not registry.available
+    assert len(calls) == 1 and 'No such file' in registry.get().error
+    assert registry.to_dict()['h264_encoder'] is None
+
+def test_admin_media_status_page(app, client, monkeypatch):
+    monkeypatch.setattr(ffmpeg_capabilities, '_snapshot', Capabilities(
+        True, '6.1.1', '6.1.1', frozenset({'libx264', 'aac'}), frozenset({'mp4', 'hls'}), None, None
+    ))
+    admin = User(username='admin', email='admin@cendrawasih.id', role='admin')
+    db.session.add(admin)
+    db.session.commit()
+
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+    response = client.get('/admin/media/status')
+    assert response.status_code == 200
+    assert b'6.1.1' in response.data and b'libx264' in response.data
@@ -0,0 +1,155 @@
+import io
+import os
+import pytest
+from datetime import datetime, timedelta
+from app import db
+from app.models import User, Course, Topic, Lesson, MediaJob, Notification
+from app.services.course_service import CourseService
+from app.services.media_jobs import MediaJobService, MediaJobRunner
+
+ENCODED = []
+
+def fake_encoder(lesson_id, input_path, compressed_folder, hls_folder, hls_segment_type='mpegts'):
+    """Pengganti ffmpeg: hasil berbentuk sama dengan encode_lesson_video"""
+    if 'rusak' in input_path:
+        raise RuntimeError('ffmpeg exit 1')
+    ENCODED.append(lesson_id)
+    if 'gagal' in input_path:
+        # Semua tahap gagal tanpa raise, seperti generate_hls/compress_video saat ffmpeg error
+        return {
+            'thumbnail': {'success': False, 'message': 'ffmpeg exit 1'},
+            'compress': {'success': False, 'message': 'ffmpeg exit 1'},
+            'hls': {'success': False, 'message': 'ffmpeg exit 1'}
+        }
+    return {
+        'thumbnail': {'success': True, 'thumbnail_path': f'uploads/compressed/thumb_lesson_{lesson_id}.jpg'},
+        'compress': {'success': False, 'message': 'dilewati'},
+        'hls': {'success': True, 'playlist_path': f'uploads/hls/lesson_{lesson_id}/playlist.m3u8'}
+    }
+
+def _make_lessons(count):
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    teacher.set_password('password123')
+    db.session.add(teacher)
+    db.session.flush()
+    course = Course(title='Kursus Video', instructor_id=teacher.id)
+    db.session.add(course)
+    db.session.commit()
+    topic, _ = CourseService.create_topic(course.id, 'Topik', order=1)
+    lessons = [CourseService.create_lesson(topic.id, f'Video {i}', content_type='video', order=i)[0] for i in range(count)]
+    return teacher.id, [lesson.id for lesson in lessons]
+
+def _runner(app, concurrency=1, executor='thread'):
+    runner = MediaJobRunner()
+    runner.init_app(app)
+    runner.concurrency = concurrency
+    runner.executor_type = executor
+    runner.encoder = f'{__name__}:fake_encoder'
+    return runner
+
+def test_jobs_run_by_priority_and_update_lesson(app):
+    user_id, lesson_ids = _make_lessons(3)
+    for lesson_id, priority in zip(lesson_ids, (0, 5, 1)):
+        MediaJobService.enqueue(lesson_id, user_id, f'/tmp/{lesson_id}.mp4', '/tmp/c', '/tmp/h', priority=priority)
+    db.session.commit()
+
+    ENCODED.clear()
+    runner = _runner(app)
+    runner.run_until_idle(timeout=10)
+    runner.stop()
+
+    assert ENCODED == [lesson_ids[1], lesson_ids[2], lesson_ids[0]]
+    assert MediaJobService.stats() == {MediaJob.STATUS_DONE: 3}
+    lesson = db.session.get(Lesson, lesson_ids[0])
+    assert lesson.compression_status == 'completed'
+    assert lesson.hls_path == f'uploads/hls/lesson_{lesson_ids[0]}/playlist.m3u8'
+    assert Notification.query.filter_by(user_id=user_id, type='success').count() == 3
+
+def test_retry_with_backoff_then_fail(app):
+    user_id, (lesson_id,) = _make_lessons(1)
+    job = MediaJobService.enqueue(lesson_id, user_id, '/tmp/rusak.mp4', '/tmp/c', '/tmp/h', max_attempts=2)
+    db.session.commit()
+
+    runner = _runner(app)
+    runner.backoff = 60
+    runner.run_until_idle(timeout=10)
+    job = db.session.get(MediaJob, job.id)
+    assert job.status == MediaJob.STATUS_QUEUED and job.attempts == 1
+    assert job.run_after > datetime.utcnow() + timedelta(seconds=50)
+    assert db.session.get(Lesson, lesson_id).compression_status == 'pending'
+
+    # Belum waktunya: tidak diklaim
+    assert MediaJobService.claim('w1') is None
+    claimed = MediaJobService.claim('w1', now=datetime.utcnow() + timedelta(seconds=61))
+    assert MediaJobService.fail(claimed[0], 'w1', 'ffmpeg exit 1')
+    job = db.session.get(MediaJob, job.id)
+    assert job.status == MediaJob.STATUS_FAILED and job.attempts == 2
+    assert db.session.get(Lesson, lesson_id).compression_status == 'failed'
+    assert Notification.query.filter_by(user_id=user_id, type='danger').count() == 1
+
+def test_unsuccessful_result_is_retried_not_completed(app, monkeypatch):
+    user_id, (lesson_id,) = _make_lessons(1)
+    job = MediaJobService.enqueue(lesson_id, user_id, '/tmp/gagal.mp4', '/tmp/c', '/tmp/h', max_attempts=2)
+    db.session.commit()
+
+    runner = _runner(app)
+    runner.backoff = 60
+    runner.run_until_idle(timeout=10)
+    job = db.session.get(MediaJob, job.id)
+    assert job.status == MediaJob.STATUS_QUEUED and job.attempts == 1
+    assert 'ffmpeg exit 1' in job.last_error
+    assert db.session.get(Lesson, lesson_id).compression_status == 'pending'
+    assert Notification.query.filter_by(user_id=user_id, type='success').count() == 0
+
+    # Encoder asli: tanpa ffmpeg semua tahap gagal -> raise, bukan hasil "completed"
+    from app.services.ffmpeg_capabilities import ffmpeg_capabilities, UNAVAILABLE
+    from app.services.media_compression_service import MediaCompressionService
+    monkeypatch.setattr(ffmpeg_capabilities, '_snapshot', UNAVAILABLE)
+    with pytest.raises(RuntimeError, match='FFmpeg'):
+        MediaCompressionService.encode_lesson_video(lesson_id, '/tmp/gagal.mp4', '/tmp/c', '/tmp/h')
+
+def test_stale_job_recovered_and_late_result_discarded(app):
+    user_id, (lesson_id,) = _make_lessons(1)
+    job = MediaJobService.enqueue(lesson_id, user_id, '/tmp/a.mp4', '/tmp/c', '/tmp/h')
+    db.session.commit()
+
+    job_id, _, _ = MediaJobService.claim('worker-mati')
+    MediaJobService.heartbeat('worker-mati', [job_id], now=datetime.utcnow() - timedelta(minutes=10))
+    assert MediaJobService.recover_stale(120, backoff=0) == 1
+    assert db.session.get(MediaJob, job_id).status == MediaJob.STATUS_QUEUED
+
+    claimed = MediaJobService.claim('worker-baru')
+    assert claimed[0] == job_id
+    # Worker lama yang ternyata masih hidup tidak boleh menimpa hasil
+    assert not MediaJobService.complete(job_id, 'worker-mati', {})
+    assert MediaJobService.complete(job_id, 'worker-baru', fake_encoder(lesson_id, '/tmp/a.mp4', '', ''))
+    assert db.session.get(MediaJob, job_id).attempts == 2
+
+def test_process_pool_executor(app):
+    user_id, (lesson_id,) = _make_lessons(1)
+    MediaJobService.enqueue(lesson_id, user_id, '/tmp/a.mp4', '/tmp/c', '/tmp/h')
+    db.session.commit()
+
+    runner = _runner(app, concurrency=2, executor='process')
+    try:
+        runner.run_until_idle(timeout=60)
+    finally:
+        runner.stop()
+    assert db.session.get(Lesson, lesson_id).compression_status == 'completed'
+
+def test_lesson_upload_enqueues_job(app, client, tmp_path):
+    user_id, _ = _make_lessons(0)
+    app.config['MEDIA_UPLOAD_FOLDER'] = str(tmp_path)
+    topic_id = Topic.query.first().id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    response = client.post(f'/admin/topics/{topic_id}/lessons/create', data={
+        'title': 'Video Baru', 'content_type': 'video', 'order': 1,
+        'video_file': (io.BytesIO(b'bukan video'), 'video.mp4')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 302
+
+    job = MediaJob.query.one()
+    assert job.status == MediaJob.STATUS_QUEUED and job.user_id == user_id
+    assert os.path.exists(job.payload['input_path'])
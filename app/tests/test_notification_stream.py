@@ -0,0 +1,70 @@
+import queue
+from app import db
+from app.extensions.pubsub import PubSub, RESYNC, pubsub
+from app.extensions.cache import FakeRedis
+from app.models import User, Notification
+from app.services.notification_service import NotificationService
+
+def _make_user():
+    user = User(username='siswa', email='siswa@cendrawasih.id')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+def test_notification_published_after_commit_only(app):
+    user_id = _make_user()
+    with pubsub.subscribe(NotificationService.channel(user_id)) as subscription:
+        db.session.add(Notification(user_id=user_id, message='Batal'))
+        db.session.flush()
+        db.session.rollback()
+
+        db.session.add(Notification(user_id=user_id, message='Video siap', type='success'))
+        db.session.commit()
+
+        message = subscription.get(timeout=1)
+        assert message['message'] == 'Video siap' and message['type'] == 'success'
+        try:
+            subscription.get(timeout=0.05)
+            assert False, 'notifikasi rollback tidak boleh di-publish'
+        except queue.Empty:
+            pass
+
+def test_redis_fanout_and_overflow_resync():
+    bus = PubSub()
+    bus.client = FakeRedis()
+    try:
+        with bus.subscribe('notifications:1') as subscription:
+            bus.publish('notifications:1', {'id': 1})
+            bus.publish('notifications:2', {'id': 2})
+            assert subscription.get(timeout=2) == {'id': 1}
+
+        bus.client = None
+        bus.queue_size = 2
+        with bus.subscribe('notifications:1') as subscription:
+            for i in range(5):
+                bus.publish('notifications:1', {'id': i})
+            # Subscriber yang tertinggal diminta sinkron ulang, bukan menerima sebagian
+            assert subscription.get(timeout=1) is RESYNC
+        assert bus.subscriber_count() == 0
+    finally:
+        bus.stop()
+
+def test_stream_resumes_from_last_event_id(app, client):
+    app.config['NOTIFICATION_STREAM_TIMEOUT'] = 0.2
+    app.config['NOTIFICATION_STREAM_KEEPALIVE'] = 0.05
+    user_id = _make_user()
+    notifications = [Notification(user_id=user_id, message=f'Pesan {i}') for i in range(3)]
+    db.session.add_all(notifications)
+    db.session.commit()
+    ids = [n.id for n in notifications]
+
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    response = client.get('/api/notifications/stream', headers={'Last-Event-ID': str(ids[0])})
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert f'id: {ids[0]}\n' not in body
+    assert f'id: {ids[1]}\n' in body and f'id: {ids[2]}\n' in body
+    assert ': keepalive' in body
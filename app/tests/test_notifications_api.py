@@ -0,0 +1,56 @@
+from app import db
+from app.models import User, Notification
+from app.services.notification_service import NotificationService
+
+def _login_user_with_notifications(client, count):
+    users = []
+    for name in ('siswa', 'lain'):
+        user = User(username=name, email=f'{name}@cendrawasih.id')
+        user.set_password('password123')
+        db.session.add(user)
+        users.append(user)
+    db.session.flush()
+    db.session.add_all([Notification(user_id=users[0].id, message=f'Pesan {i}') for i in range(count)])
+    db.session.add(Notification(user_id=users[1].id, message='Milik user lain'))
+    db.session.commit()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(users[0].id)
+    ids = [row[0] for row in db.session.query(Notification.id).filter_by(user_id=users[0].id).order_by(Notification.id)]
+    other_id = db.session.query(Notification.id).filter_by(user_id=users[1].id).scalar()
+    return users[0].id, ids, other_id
+
+def test_cursor_pagination(app, client):
+    _, ids, _ = _login_user_with_notifications(client, 5)
+
+    page = client.get('/api/notifications?limit=2').get_json()
+    assert [n['id'] for n in page['notifications']] == ids[:-3:-1]
+    page = client.get(f"/api/notifications?limit=2&before_id={page['next_before_id']}").get_json()
+    assert [n['id'] for n in page['notifications']] == [ids[2], ids[1]]
+    page = client.get(f"/api/notifications?limit=2&before_id={page['next_before_id']}").get_json()
+    assert [n['id'] for n in page['notifications']] == [ids[0]] and page['next_before_id'] is None
+
+    page = client.get(f'/api/notifications?since_id={ids[2]}').get_json()
+    assert [n['id'] for n in page['notifications']] == [ids[4], ids[3]]
+
+def test_unread_count_cached_and_maintained(app, client, assert_max_queries):
+    user_id, ids, other_id = _login_user_with_notifications(client, 4)
+
+    assert client.get('/api/notifications/unread-count').get_json()['unread_count'] == 4
+    with assert_max_queries(1):  # hanya load user, count dari cache
+        assert client.get('/api/notifications/unread-count').get_json()['unread_count'] == 4
+
+    db.session.add(Notification(user_id=user_id, message='Baru'))
+    db.session.commit()
+    assert client.get('/api/notifications/unread-count').get_json()['unread_count'] == 5
+
+    # Batch by ids: milik user lain diabaikan
+    data = client.post('/api/notifications/mark-read', json={'ids': [ids[0], ids[1], other_id]}).get_json()
+    assert data['updated'] == 2 and data['unread_count'] == 3
+    assert not db.session.get(Notification, other_id).is_read
+
+    # Semua sebelum id tertentu
+    data = client.post('/api/notifications/mark-read', json={'before_id': ids[3] + 1}).get_json()
+    assert data['updated'] == 2 and data['unread_count'] == 1
+
+    assert client.post('/api/notifications/mark-read', json={}).status_code == 400
+    assert client.post(f'/api/notifications/{other_id}/read').status_code == 403
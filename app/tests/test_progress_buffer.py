@@ -0,0 +1,127 @@
+from app import db
+from app.models import Lesson, LessonProgress
+from app.services.course_service import CourseService
+from app.services.progress_buffer import ProgressWriteBuffer
+from app.tests.test_progress_upsert import _make_lesson
+
+def _buffer(app, **kwargs):
+    buffer = ProgressWriteBuffer(**kwargs)
+    buffer.app = app
+    return buffer
+
+def _timestamps():
+    db.session.expire_all()
+    return {(row.user_id, row.lesson_id): row.video_timestamp for row in LessonProgress.query.all()}
+
+def test_repeated_heartbeats_coalesce_to_one_row(app):
+    """Banyak heartbeat (user, lesson) yang sama -> satu baris dengan posisi terakhir"""
+    user_id, _, lesson_id = _make_lesson()
+    buffer = _buffer(app)
+
+    for timestamp in (10, 20, 30):
+        assert buffer.record(user_id, lesson_id, timestamp)
+    assert buffer.stats()['pending'] == 1
+    assert buffer.stats()['coalesced'] == 2
+
+    assert buffer.flush() == 1
+    assert _timestamps() == {(user_id, lesson_id): 30}
+
+    # Flush berikutnya meng-update baris yang sama, bukan menambah baris
+    buffer.record(user_id, lesson_id, 45)
+    assert buffer.flush() == 1
+    assert _timestamps() == {(user_id, lesson_id): 45}
+    assert buffer.stats()['flushed_rows'] == 2
+
+def test_max_pending_drops_new_keys_only(app):
+    """Buffer penuh: key baru dibuang, key yang sudah ada tetap di-update"""
+    buffer = _buffer(app, max_pending=2)
+
+    assert buffer.record(1, 1, 5)
+    assert buffer.record(1, 2, 5)
+    assert buffer.record(1, 3, 5) is False
+    assert buffer.record(1, 1, 9)
+
+    stats = buffer.stats()
+    assert (stats['pending'], stats['dropped'], stats['coalesced']) == (2, 1, 1)
+    assert buffer._pending[(1, 1)][0] == 9
+    assert (1, 3) not in buffer._pending
+
+class FailingBuffer(ProgressWriteBuffer):
+    """Flush pertama gagal; heartbeat baru masuk selagi batch sedang ditulis"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail = True
+        self.during_write = []
+
+    def _write(self, batch):
+        if self.fail:
+            self.fail = False
+            for user_id, lesson_id, timestamp in self.during_write:
+                self.record(user_id, lesson_id, timestamp)
+            raise RuntimeError('database is locked')
+        super()._write(batch)
+
+def test_failed_flush_requeues_without_overwriting_newer_positions(app):
+    user_id, _, lesson_id = _make_lesson()
+    buffer = FailingBuffer(max_pending=10)
+    buffer.app = app
+
+    buffer.record(user_id, lesson_id, 30)
+    buffer.record(user_id, lesson_id + 1, 12)
+    buffer.during_write = [(user_id, lesson_id, 50)]
+
+    assert buffer.flush() == 0
+    stats = buffer.stats()
+    assert (stats['failed_flushes'], stats['pending']) == (1, 2)
+    # Posisi 50 yang masuk saat flush gagal tidak ditimpa posisi lama 30 dari batch
+    assert buffer._pending[(user_id, lesson_id)][0] == 50
+    assert buffer._pending[(user_id, lesson_id + 1)][0] == 12
+
+    assert buffer.flush() == 2
+    assert _timestamps() == {(user_id, lesson_id): 50, (user_id, lesson_id + 1): 12}
+
+def test_failed_flush_requeue_respects_max_pending(app):
+    buffer = FailingBuffer(max_pending=2)
+    buffer.app = app
+
+    buffer.record(1, 1, 5)
+    buffer.during_write = [(1, 2, 5), (1, 3, 5)]
+
+    assert buffer.flush() == 0
+    # Slot sudah terisi heartbeat baru -> batch lama dibuang dan tercatat
+    assert set(buffer._pending) == {(1, 2), (1, 3)}
+    assert buffer.stats()['dropped'] == 1
+
+def test_stop_flushes_pending_and_stops_worker(app):
+    user_id, _, lesson_id = _make_lesson()
+    buffer = _buffer(app, flush_interval=60)
+    buffer.enabled = True
+
+    buffer.record(user_id, lesson_id, 77)
+    assert buffer.stats()['running']
+
+    buffer.stop()
+    stats = buffer.stats()
+    assert stats['running'] is False
+    assert (stats['pending'], stats['flushes']) == (0, 1)
+    assert _timestamps() == {(user_id, lesson_id): 77}
+
+def test_lesson_player_heartbeat_stores_position(app, client):
+    """Player video mengirim heartbeat ke /api/lessons/<id>/position dan melanjutkan dari posisi tersimpan"""
+    user_id, course_id, lesson_id = _make_lesson()
+    lesson = Lesson.query.get(lesson_id)
+    lesson.content_type, lesson.content_url = 'video', 'https://cdn.cendrawasih.id/video.mp4'
+    db.session.commit()
+    CourseService.enroll_student(user_id, course_id)
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    response = client.post(f'/api/lessons/{lesson_id}/position', json={'timestamp': 95})
+    assert response.get_json() == {'success': True}
+    assert _timestamps() == {(user_id, lesson_id): 95}
+    assert client.post(f'/api/lessons/{lesson_id}/position', json={'timestamp': 'x'}).status_code == 400
+
+    page = client.get(f'/courses/lesson/{lesson_id}').get_data(as_text=True)
+    assert f'/api/lessons/{lesson_id}/position' in page
+    assert 'const resumeAt = 95;' in page
@@ -0,0 +1,71 @@
+import threading
+from app import db
+from app.models import User, Course, Topic, Lesson, LessonProgress, CourseProgressSummary
+from app.services.progress import ProgressService
+
+def _make_lesson():
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    teacher.set_password('password123')
+    student = User(username='siswa', email='siswa@cendrawasih.id', role='student')
+    student.set_password('password123')
+    db.session.add_all([teacher, student])
+    db.session.flush()
+
+    course = Course(title='Kursus Uji', instructor_id=teacher.id)
+    db.session.add(course)
+    db.session.flush()
+    topic = Topic(title='Topik 1', course_id=course.id, order=1)
+    db.session.add(topic)
+    db.session.flush()
+    lessons = [Lesson(title=f'Pelajaran {i}', topic_id=topic.id, order=i) for i in range(2)]
+    db.session.add_all(lessons)
+    db.session.commit()
+    return student.id, course.id, lessons[0].id
+
+def test_upsert_preserves_other_columns(app):
+    """Update timestamp tidak boleh menimpa status completed"""
+    user_id, course_id, lesson_id = _make_lesson()
+
+    assert ProgressService.mark_lesson_complete(user_id, lesson_id)[0]
+    assert ProgressService.update_video_timestamp(user_id, lesson_id, 42, buffered=False)[0]
+
+    progress, _ = ProgressService.get_lesson_progress(user_id, lesson_id)
+    assert progress.is_completed is True
+    assert progress.video_timestamp == 42
+
+    summary = CourseProgressSummary.query.get((user_id, course_id))
+    assert (summary.completed_lessons, summary.total_lessons, summary.percent) == (1, 2, 50)
+
+def test_concurrent_writes_same_row(app):
+    """Banyak thread menulis baris (user, lesson) yang sama tanpa duplicate-key error"""
+    user_id, course_id, lesson_id = _make_lesson()
+    errors = []
+    start = threading.Barrier(8)
+
+    def worker(n):
+        with app.app_context():
+            start.wait()
+            for i in range(10):
+                if i % 3 == 0:
+                    ok, message = ProgressService.mark_lesson_complete(user_id, lesson_id)
+                elif i % 3 == 1:
+                    ok, message = ProgressService.track_lesson_progress(
+                        user_id, lesson_id, is_completed=True, video_timestamp=n * 100 + i
+                    )
+                    ok = ok is not None
+                else:
+                    ok, message = ProgressService.update_video_timestamp(user_id, lesson_id, n * 100 + i, buffered=False)
+                if not ok:
+                    errors.append(message)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    assert errors == []
+    assert LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson_id).count() == 1
+    assert LessonProgress.query.filter_by(user_id=user_id, lesson_id=lesson_id).first().is_completed is True
+    assert CourseProgressSummary.query.get((user_id, course_id)).completed_lessons == 1
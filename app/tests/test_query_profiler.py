@@ -0,0 +1,41 @@
+import logging
+from app import db
+from app.models import User, Course
+from app.extensions.query_profiler import record_queries, statement_shape
+
+def _make_courses(count):
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    teacher.set_password('password123')
+    db.session.add(teacher)
+    db.session.flush()
+    for i in range(count):
+        db.session.add(Course(title=f'Kursus {i}', instructor_id=teacher.id))
+    db.session.commit()
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape('SELECT a FROM t WHERE id IN (?, ?, ?)') == \
+        statement_shape('SELECT a  FROM t\nWHERE id IN (?)')
+
+def test_repeated_shapes_are_detected(app):
+    _make_courses(6)
+    ids = [row[0] for row in db.session.query(Course.id).all()]
+    db.session.expire_all()
+
+    with record_queries() as recorder:
+        for course_id in ids:
+            db.session.get(Course, course_id)
+
+    assert recorder.count == 6
+    assert recorder.repeated(5)[0][1] == 6
+
+def test_course_list_query_budget(app, client, assert_max_queries, caplog):
+    _make_courses(12)
+
+    with caplog.at_level(logging.WARNING):
+        with assert_max_queries(8):
+            response = client.get('/courses/list')
+
+    assert response.status_code == 200
+    assert int(response.headers['X-Query-Count']) <= 8
+    assert 'X-Query-Time-Ms' in response.headers
+    assert 'Possible N+1' not in caplog.text
@@ -0,0 +1,54 @@
+import numpy as np
+from app import db
+from app.models import QuizAttempt
+from app.services.quiz_service import QuizService
+from app.services.quiz_analytics import QuizAnalyticsService, ItemAnalysisAccumulator
+from app.tests.test_quiz_grading import _make_quiz
+
+def test_accumulator_chunks_match_full_matrix():
+    rng = np.random.default_rng(0)
+    correct = (rng.random((101, 6)) < 0.6).astype(np.int8)
+    choices = np.where(correct == 1, 0, rng.integers(1, 4, correct.shape)).astype(np.int16)
+
+    full = ItemAnalysisAccumulator(6, 4)
+    full.update(correct, choices)
+    chunked = ItemAnalysisAccumulator(6, 4)
+    for start in range(0, 101, 17):
+        chunked.update(correct[start:start + 17], choices[start:start + 17])
+
+    a, b = full.result(), chunked.result()
+    assert np.allclose(a['point_biserial'], b['point_biserial'])
+    assert (a['choice_counts'] == b['choice_counts']).all()
+
+    totals = correct.sum(axis=1)
+    expected_r = [np.corrcoef(correct[:, j], totals)[0, 1] for j in range(6)]
+    assert np.allclose(a['point_biserial'], expected_r)
+    k = 6
+    expected_alpha = k / (k - 1) * (1 - correct.var(axis=0).sum() / totals.var())
+    assert abs(a['cronbach_alpha'] - expected_alpha) < 1e-9
+
+def test_analyze_lesson_matches_incremental_statistics(app):
+    student_id, _, lesson_id, key = _make_quiz(3)
+    question_ids = list(key)
+    answer_key = QuizService.get_answer_key(lesson_id)
+
+    patterns = [(0, 0, 1), (0, 2, 1), (1, 0, None), (0, 3, 0)]
+    for pattern in patterns:
+        submitted = {qid: key[qid][choice] for qid, choice in zip(question_ids, pattern) if choice is not None}
+        result = QuizService.grade(answer_key, submitted)
+        attempt = QuizAttempt(user_id=student_id, lesson_id=lesson_id, score=result.score)
+        db.session.add(attempt)
+        db.session.flush()
+        QuizService.record_answers(attempt, result)
+    db.session.commit()
+
+    report = QuizAnalyticsService.analyze_lesson(lesson_id, chunk_size=3)
+    assert report['attempts'] == 4
+
+    first = report['items'][0]
+    assert first['difficulty'] == 0.75
+    assert [option['count'] for option in first['options']] == [3, 1, 0, 0]
+    assert report['items'][2]['unanswered'] == 1
+
+    stats = QuizService.get_item_statistics(lesson_id)
+    assert abs(first['point_biserial'] - stats[question_ids[0]].discrimination) < 1e-9
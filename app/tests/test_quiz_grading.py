@@ -0,0 +1,88 @@
+from app import db
+from app.models import User, Course, Lesson, QuizQuestion, QuizOption, QuizAttempt
+from app.services.course_service import CourseService
+from app.services.quiz_service import QuizService
+
+def _make_quiz(question_count):
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    student = User(username='siswa', email='siswa@cendrawasih.id')
+    for user in (teacher, student):
+        user.set_password('password123')
+        db.session.add(user)
+    db.session.flush()
+    course = Course(title='Kursus Quiz', instructor_id=teacher.id)
+    db.session.add(course)
+    db.session.commit()
+    topic, _ = CourseService.create_topic(course.id, 'Topik', order=1)
+    lesson, _ = CourseService.create_lesson(topic.id, 'Quiz', content_type='quiz', order=1)
+
+    key = {}
+    for i in range(question_count):
+        question = QuizQuestion(lesson_id=lesson.id, question_text=f'Soal {i}')
+        db.session.add(question)
+        db.session.flush()
+        options = [QuizOption(question_id=question.id, option_text=f'Opsi {j}', is_correct=j == 0) for j in range(4)]
+        db.session.add_all(options)
+        db.session.flush()
+        key[question.id] = [option.id for option in options]
+    db.session.commit()
+    return student.id, course.id, lesson.id, key
+
+def test_grading_validates_option_ownership(app):
+    _, _, lesson_id, key = _make_quiz(4)
+    question_ids = list(key)
+    submitted = {
+        question_ids[0]: str(key[question_ids[0]][0]),   # benar
+        question_ids[1]: str(key[question_ids[1]][1]),   # salah
+        question_ids[2]: str(key[question_ids[0]][0]),   # option benar milik soal lain
+        question_ids[3]: 'bukan-angka'
+    }
+    result = QuizService.grade(QuizService.get_answer_key(lesson_id), submitted)
+    assert result.correct_answers == 1
+    assert result.total_questions == 4
+    assert result.score == 25.0
+
+def test_submit_quiz_query_count_is_constant(app, client, assert_max_queries):
+    student_id, course_id, lesson_id, key = _make_quiz(50)
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student_id)
+
+    form = {f'question_{qid}': str(options[0] if i % 5 else options[1]) for i, (qid, options) in enumerate(key.items())}
+    with assert_max_queries(18):
+        response = client.post(f'/courses/lessons/{lesson_id}/quiz/submit', data=form)
+
+    assert response.status_code == 302
+    assert QuizAttempt.query.filter_by(user_id=student_id).one().score == 80.0
+
+def test_answers_recorded_and_item_statistics_incremental(app):
+    import math
+    from app.models import QuizAnswer
+    student_id, _, lesson_id, key = _make_quiz(3)
+    question_ids = list(key)
+    answer_key = QuizService.get_answer_key(lesson_id)
+
+    # Tiga attempt: (q0, q1, q2) benar/salah
+    patterns = [(True, True, False), (True, False, False), (False, False, True)]
+    for pattern in patterns:
+        submitted = {qid: key[qid][0 if ok else 1] for qid, ok in zip(question_ids, pattern)}
+        result = QuizService.grade(answer_key, submitted)
+        attempt = QuizAttempt(user_id=student_id, lesson_id=lesson_id, score=result.score)
+        db.session.add(attempt)
+        db.session.flush()
+        QuizService.record_answers(attempt, result)
+    db.session.commit()
+
+    assert QuizAnswer.query.count() == 9
+    stats = QuizService.get_item_statistics(lesson_id)
+    first = stats[question_ids[0]]
+    assert first.attempts == 3 and first.correct_count == 2
+    assert first.difficulty == 2 / 3
+
+    scores = [sum(p) / 3 * 100 for p in patterns]
+    item = [1 if p[0] else 0 for p in patterns]
+    mean = sum(scores) / 3
+    sd = math.sqrt(sum((s - mean) ** 2 for s in scores) / 3)
+    mean_correct = sum(s for s, i in zip(scores, item) if i) / sum(item)
+    p = sum(item) / 3
+    expected = (mean_correct - mean) / sd * math.sqrt(p / (1 - p))
+    assert abs(first.discrimination - expected) < 1e-9
@@ -0,0 +1,146 @@
+import pickle
+import random
+from app import db
+from app.models import Course, Lesson, QuizAttempt, QuizAnswer
+from app.services.course_service import CourseService
+from app.services.quiz_service import QuizService
+from app.services.quiz_analytics import QuizAnalyticsService
+from app.tests.test_quiz_grading import _make_quiz
+
+def _enable_pool(lesson_id, pool_size, shuffle_options=True):
+    lesson = Lesson.query.get(lesson_id)
+    lesson.quiz_pool_size = pool_size
+    lesson.quiz_shuffle_options = shuffle_options
+    db.session.commit()
+    return lesson
+
+def test_draw_questions_from_cached_key(app):
+    _, _, lesson_id, key = _make_quiz(10)
+    answer_key = QuizService.get_answer_key(lesson_id)
+    assert pickle.loads(pickle.dumps(answer_key)) == answer_key
+
+    question_ids, option_order = QuizService.draw_questions(answer_key, 4, True, random.Random(7))
+    assert len(question_ids) == len(set(question_ids)) == 4
+    assert set(question_ids) <= set(key)
+    for question_id in question_ids:
+        assert sorted(option_order[str(question_id)]) == key[question_id]
+
+    # Pool lebih besar dari jumlah soal -> semua soal
+    question_ids, _ = QuizService.draw_questions(answer_key, 50)
+    assert sorted(question_ids) == sorted(key)
+
+def test_attempt_selection_persisted_and_graded(app, client):
+    student_id, course_id, lesson_id, key = _make_quiz(10)
+    _enable_pool(lesson_id, 3)
+    CourseService.enroll_student(student_id, course_id)
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student_id)
+
+    # GET tidak membuat attempt; soal diundi lewat POST mulai quiz
+    response = client.get(f'/courses/lesson/{lesson_id}')
+    assert response.status_code == 200
+    assert f'/courses/lessons/{lesson_id}/quiz/start' in response.get_data(as_text=True)
+    assert QuizAttempt.query.count() == 0
+    assert client.post(f'/courses/lessons/{lesson_id}/quiz/start').status_code == 302
+    attempt = QuizService.get_open_attempt(student_id, lesson_id)
+    selected = list(attempt.question_ids)
+    assert len(selected) == 3
+
+    # Refresh dan mulai ulang tidak mengacak ulang soal
+    client.get(f'/courses/lesson/{lesson_id}')
+    client.post(f'/courses/lessons/{lesson_id}/quiz/start')
+    assert QuizAttempt.query.filter_by(user_id=student_id).count() == 1
+    assert QuizService.get_open_attempt(student_id, lesson_id).question_ids == selected
+    questions = QuizService.get_attempt_questions(QuizService.get_open_attempt(student_id, lesson_id))
+    assert [question.id for question in questions] == selected
+    assert [option.id for option in questions[0].options] == attempt.option_order[str(selected[0])]
+
+    # Jawaban untuk soal yang tidak terpilih diabaikan
+    form = {f'question_{qid}': str(options[0]) for qid, options in key.items()}
+    form[f'question_{selected[0]}'] = str(key[selected[0]][1])
+    response = client.post(f'/courses/lessons/{lesson_id}/quiz/submit', data=form)
+    assert response.status_code == 302
+
+    db.session.expire_all()
+    attempt = QuizAttempt.query.filter_by(user_id=student_id).one()
+    assert round(attempt.score, 2) == 66.67
+    assert attempt.completed_at is not None
+    assert sorted(answer.question_id for answer in QuizAnswer.query.filter_by(attempt_id=attempt.id)) == sorted(selected)
+
+    # Tanpa attempt terbuka submit ditolak
+    client.post(f'/courses/lessons/{lesson_id}/quiz/submit', data=form)
+    assert QuizAttempt.query.filter_by(user_id=student_id).count() == 1
+
+def test_pool_size_change_redraws_open_attempt(app):
+    student_id, _, lesson_id, _ = _make_quiz(10)
+    lesson = _enable_pool(lesson_id, 3)
+    attempt = QuizService.start_attempt(student_id, lesson)
+    assert len(attempt.question_ids) == 3
+
+    lesson = _enable_pool(lesson_id, 5)
+    assert QuizService.find_reusable_attempt(student_id, lesson) is None
+    attempt = QuizService.start_attempt(student_id, lesson)
+    assert len(attempt.question_ids) == 5
+    assert QuizAttempt.query.filter_by(user_id=student_id).count() == 1
+
+def test_instructor_preview_does_not_create_attempt(app, client):
+    _, course_id, lesson_id, key = _make_quiz(6)
+    _enable_pool(lesson_id, 2)
+    with client.session_transaction() as session:
+        session['_user_id'] = str(Course.query.get(course_id).instructor_id)
+
+    response = client.get(f'/courses/lesson/{lesson_id}')
+    assert response.status_code == 200
+    assert QuizAttempt.query.count() == 0
+    # Pratinjau menampilkan seluruh bank soal
+    assert all(f'question_{question_id}' in response.get_data(as_text=True) for question_id in key)
+
+def test_student_cannot_change_quiz_settings(app, client):
+    student_id, _, lesson_id, _ = _make_quiz(4)
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student_id)
+
+    response = client.post(f'/admin/lessons/{lesson_id}/quiz/settings',
+                           data={'quiz_pool_size': '1', 'quiz_shuffle_options': 'y'})
+    assert response.status_code == 302
+
+    db.session.expire_all()
+    lesson = Lesson.query.get(lesson_id)
+    assert lesson.quiz_pool_size is None
+    assert not lesson.quiz_shuffle_options
+
+def test_item_analysis_only_counts_presented_questions(app):
+    student_id, _, lesson_id, key = _make_quiz(10)
+    _enable_pool(lesson_id, 2)
+    answer_key = QuizService.get_answer_key(lesson_id)
+    rng = random.Random(3)
+
+    for i in range(20):
+        question_ids, option_order = QuizService.draw_questions(answer_key, 2, True, rng)
+        # Attempt genap menjawab semua soal terpilih dengan benar, ganjil salah di soal pertama
+        submitted = {qid: key[qid][0] for qid in question_ids}
+        if i % 2:
+            submitted[question_ids[0]] = key[question_ids[0]][1]
+        result = QuizService.grade(answer_key, submitted, question_ids)
+        attempt = QuizAttempt(user_id=student_id, lesson_id=lesson_id, score=result.score,
+                              question_ids=question_ids, option_order=option_order)
+        db.session.add(attempt)
+        db.session.flush()
+        QuizService.record_answers(attempt, result)
+    db.session.commit()
+
+    report = QuizAnalyticsService.analyze_lesson(lesson_id, chunk_size=7)
+    assert report['attempts'] == 20 and report['cronbach_alpha'] is None
+    items = report['items']
+    assert sum(item['attempts'] for item in items) == 40
+    for item in items:
+        assert item['unanswered'] == 0
+        assert sum(option['count'] for option in item['options']) == item['attempts']
+    # 40 soal ditampilkan, 10 dijawab salah
+    assert round(sum(item['difficulty'] * item['attempts'] for item in items if item['attempts'])) == 30
+
+    # Tanpa jawaban salah, semua soal yang terpilih difficulty 1.0
+    QuizAnswer.query.update({QuizAnswer.correct: True})
+    db.session.commit()
+    for item in QuizAnalyticsService.analyze_lesson(lesson_id)['items']:
+        assert item['difficulty'] in (None, 1.0)
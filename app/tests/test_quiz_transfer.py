@@ -0,0 +1,77 @@
+import io
+import json
+import time
+from app import db
+from app.models import Course, QuizQuestion, QuizOption
+from app.services.quiz_transfer_service import QuizTransferService, QuizImportError
+from app.tests.test_quiz_grading import _make_quiz
+
+def _login(client, user_id):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+def test_csv_import_roundtrip_and_bulk_speed(app):
+    _, _, lesson_id, _ = _make_quiz(0)
+    lines = ['question_text,option_1,option_2,option_3,option_4,correct']
+    lines += [f'Soal {i},A,B,C,D,{i % 4 + 1}' for i in range(10000)]
+
+    started = time.perf_counter()
+    count = QuizTransferService.import_questions(lesson_id, io.BytesIO('\n'.join(lines).encode()), 'csv')
+    elapsed = time.perf_counter() - started
+
+    assert count == 10000
+    assert QuizOption.query.count() == 40000
+    assert elapsed < 10
+
+    exported = ''.join(QuizTransferService.export_csv(lesson_id)).splitlines()
+    assert exported[0] == lines[0]
+    assert exported[1:] == lines[1:]
+
+def test_invalid_rows_reject_whole_file(app):
+    _, _, lesson_id, _ = _make_quiz(0)
+    data = json.dumps([
+        {'question_text': 'Valid', 'options': [{'text': 'A', 'is_correct': True}, {'text': 'B'}]},
+        {'question_text': 'Tanpa jawaban benar', 'options': [{'text': 'A'}, {'text': 'B'}]},
+        {'question_text': '', 'options': []}
+    ])
+    try:
+        QuizTransferService.import_questions(lesson_id, io.BytesIO(data.encode()), 'json')
+        assert False, 'import seharusnya ditolak'
+    except QuizImportError as e:
+        assert [error.split(':')[0] for error in e.errors] == ['Baris 2', 'Baris 3']
+    assert QuizQuestion.query.count() == 0
+
+def test_import_and_export_endpoints(app, client):
+    _, course_id, lesson_id, _ = _make_quiz(2)
+    _login(client, Course.query.get(course_id).instructor_id)
+
+    payload = json.dumps([{'question_text': 'Ibu kota?', 'options': [
+        {'text': 'Jakarta', 'is_correct': True}, {'text': 'Bandung', 'is_correct': False}
+    ]}])
+    response = client.post(f'/admin/lessons/{lesson_id}/quiz/import',
+                           data={'file': (io.BytesIO(payload.encode()), 'soal.json')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 302
+
+    response = client.get(f'/admin/lessons/{lesson_id}/quiz/export.json')
+    assert response.is_streamed or response.status_code == 200
+    items = json.loads(response.get_data(as_text=True))
+    assert len(items) == 3
+    assert items[-1]['options'][0] == {'text': 'Jakarta', 'is_correct': True}
+
+def test_student_cannot_import_or_export(app, client):
+    student_id, _, lesson_id, _ = _make_quiz(2)
+    _login(client, student_id)
+
+    payload = json.dumps([{'question_text': 'Sisipan', 'options': [
+        {'text': 'A', 'is_correct': True}, {'text': 'B', 'is_correct': False}
+    ]}])
+    response = client.post(f'/admin/lessons/{lesson_id}/quiz/import',
+                           data={'file': (io.BytesIO(payload.encode()), 'soal.json')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 302
+    assert QuizQuestion.query.count() == 2
+
+    response = client.get(f'/admin/lessons/{lesson_id}/quiz/export.json')
+    assert response.status_code == 302
+    assert 'is_correct' not in response.get_data(as_text=True)
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import User, Course, CourseTrial, Notification
+from app.services.course_service import CourseService
+from app.services.trial_sweeper import TrialExpirySweeper
+
+def test_sweep_expires_in_batches_and_notifies(app):
+    teacher = User(username='guru', email='guru@cendrawasih.id', role='teacher')
+    teacher.set_password('password123')
+    db.session.add(teacher)
+    db.session.flush()
+    course = Course(title='Kursus Trial', instructor_id=teacher.id)
+    db.session.add(course)
+
+    now = datetime.utcnow()
+    students = []
+    for i in range(5):
+        student = User(username=f'siswa{i}', email=f'siswa{i}@cendrawasih.id')
+        student.set_password('password123')
+        db.session.add(student)
+        students.append(student)
+    db.session.flush()
+
+    for i, student in enumerate(students):
+        # 3 kedaluwarsa, 2 masih aktif
+        expires_at = now - timedelta(hours=1) if i < 3 else now + timedelta(days=1)
+        student.enrolled_courses.append(course)
+        db.session.add(CourseTrial(user_id=student.id, course_id=course.id, expires_at=expires_at))
+    db.session.commit()
+
+    sweeper = TrialExpirySweeper(batch_size=2)
+    assert sweeper.sweep(now) == 3
+    assert sweeper.sweep(now) == 0
+
+    statuses = {trial.user_id: trial.status for trial in CourseTrial.query.all()}
+    assert sorted(statuses.values()) == ['active', 'active', 'expired', 'expired', 'expired']
+    assert Notification.query.count() == 3
+    assert not CourseService.has_trial_access(students[0].id, course.id)
+    assert CourseService.has_trial_access(students[4].id, course.id)
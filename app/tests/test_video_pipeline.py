@@ -0,0 +1,71 @@
+from app.services.ffmpeg_capabilities import Capabilities, ffmpeg_capabilities
+from app.services.media_compression_service import MediaCompressionService
+from app.services.encode_planner import EncodePlanner
+from app.services.video_pipeline import VideoPipeline, DEFAULT_RENDITIONS, HLS_LADDER
+
+FFMPEG = Capabilities(True, '6.1.1', '6.1.1', frozenset({'libx264', 'aac'}), frozenset({'mp4', 'hls'}), None, None)
+
+SOURCE_720P = {'streams': [
+    {'codec_type': 'video', 'codec_name': 'h264', 'width': 1280, 'height': 720, 'r_frame_rate': '30000/1001'},
+    {'codec_type': 'audio', 'codec_name': 'aac'}
+]}
+
+def test_single_pass_command_decodes_once():
+    renditions = DEFAULT_RENDITIONS
+    cmd = VideoPipeline.build_command(
+        'in.mp4', renditions,
+        [f'out/{r.name}.mp4' for r in renditions], [f'hls/{r.name}' for r in renditions], 'out/poster.jpg'
+    )
+    assert cmd.count('-i') == 1
+    graph = cmd[cmd.index('-filter_complex') + 1]
+    assert graph.startswith('[0:v]split=4[s0][s1][s2][sp]')
+    assert '[s1]scale=1280:720[v1]' in graph
+
+    # Tiap rendition di-encode sekali dan di-tee ke MP4 + varian HLS
+    assert cmd.count('libx264') == 3 and cmd.count('tee') == 3
+    tee = cmd[cmd.index('tee') + 1]
+    assert tee.startswith('[f=mp4:movflags=+faststart]out/low.mp4|[f=hls:')
+    assert tee.endswith('hls/low/index.m3u8')
+    assert cmd[-1] == 'out/poster.jpg' and cmd[cmd.index('[vp]') - 1] == '-map'
+
+def test_master_playlist_and_benchmark_parsing():
+    master = VideoPipeline.master_playlist(DEFAULT_RENDITIONS[:2], ['low/index.m3u8', 'medium/index.m3u8'])
+    assert master.splitlines() == [
+        '#EXTM3U', '#EXT-X-VERSION:3',
+        '#EXT-X-STREAM-INF:BANDWIDTH=628000,RESOLUTION=480x270', 'low/index.m3u8',
+        '#EXT-X-STREAM-INF:BANDWIDTH=1628000,RESOLUTION=1280x720', 'medium/index.m3u8'
+    ]
+    timings = VideoPipeline.parse_benchmark('frame=1\nbench: utime=12.500s stime=0.300s rtime=4.200s\n')
+    assert timings == {'ffmpeg_utime': 12.5, 'ffmpeg_stime': 0.3, 'ffmpeg_rtime': 4.2}
+
+def test_fmp4_segments_and_aligned_keyframes():
+    renditions = HLS_LADDER[:2]
+    cmd = VideoPipeline.build_command(
+        'in.mp4', renditions, [None, None], [f'hls/{r.name}' for r in renditions], None,
+        segment_type='fmp4', fps=25
+    )
+    # GOP = fps * hls_time untuk semua varian agar batas segmen sejajar
+    assert cmd.count('-g') == 2 and cmd[cmd.index('-g') + 1] == '150'
+    assert cmd[cmd.index('-sc_threshold') + 1] == '0'
+    tee = cmd[cmd.index('tee') + 1]
+    assert 'hls_segment_type=fmp4' in tee and 'hls_fmp4_init_filename=init.mp4' in tee
+    assert 'segment_%03d.m4s' in tee and 'f=mp4' not in tee
+    assert VideoPipeline.master_playlist(renditions, ['a', 'b'], 'fmp4').splitlines()[1] == '#EXT-X-VERSION:7'
+
+def test_generate_hls_builds_single_ladder_command(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(ffmpeg_capabilities, '_snapshot', FFMPEG)
+    monkeypatch.setattr('subprocess.run', lambda cmd, **kwargs: calls.append(cmd))
+
+    source = EncodePlanner.source_from_metadata(SOURCE_720P)
+    result = MediaCompressionService.generate_hls('in.mov', str(tmp_path), 7, source=source)
+    assert result['success'] and result['variants'] == ['270p', '480p', '720p']
+    assert result['playlist_path'] == 'uploads/hls/lesson_7/playlist.m3u8'
+
+    (cmd,) = calls
+    assert cmd.count('-i') == 1 and cmd.count('0:a:0') == 3
+    assert cmd[cmd.index('-var_stream_map') + 1] == 'v:0,a:0,name:270p v:1,a:1,name:480p v:2,a:2,name:720p'
+    assert cmd[cmd.index('-master_pl_name') + 1] == 'playlist.m3u8'
+    assert cmd[cmd.index('-hls_segment_type') + 1] == 'mpegts'
+    assert cmd[-1].endswith('lesson_7/%v/index.m3u8')
+    assert (tmp_path / 'lesson_7' / '720p').is_dir() and not (tmp_path / 'lesson_7' / '1080p').exists()
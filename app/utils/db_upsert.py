@@ -0,0 +1,59 @@
+from app import db
+
+
+def build_upsert(model, rows, index_elements, update_columns, increment_columns=()):
+    """
+    Bangun statement INSERT multi-row yang meng-update baris yang bentrok
+    pada unique key (MySQL ON DUPLICATE KEY UPDATE, SQLite/PostgreSQL ON CONFLICT).
+    increment_columns ditambahkan ke nilai lama (kolom = kolom + nilai baru).
+    Returns: statement atau None jika dialect tidak didukung
+    """
+    dialect = db.session.get_bind().dialect.name
+    table = model.__table__
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(model).values(rows)
+        values = {name: stmt.inserted[name] for name in update_columns}
+        values.update({name: table.c[name] + stmt.inserted[name] for name in increment_columns})
+        return stmt.on_duplicate_key_update(values)
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(model).values(rows)
+        values = {name: stmt.excluded[name] for name in update_columns}
+        values.update({name: table.c[name] + stmt.excluded[name] for name in increment_columns})
+        return stmt.on_conflict_do_update(index_elements=list(index_elements), set_=values)
+
+    return None
+
+
+def upsert(model, rows, index_elements, update_columns, chunk_size=500, increment_columns=()):
+    """
+    Jalankan upsert satu statement per chunk. Tidak melakukan commit.
+    Dialect lain memakai fallback UPDATE lalu INSERT per baris.
+    """
+    if isinstance(rows, dict):
+        rows = [rows]
+    if not rows:
+        return
+
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        stmt = build_upsert(model, chunk, index_elements, update_columns, increment_columns)
+
+        if stmt is not None:
+            db.session.execute(stmt)
+            continue
+
+        table = model.__table__
+        for row in chunk:
+            key_clause = db.and_(*[table.c[name] == row[name] for name in index_elements])
+            values = {name: row[name] for name in update_columns}
+            values.update({name: table.c[name] + row[name] for name in increment_columns})
+            result = db.session.execute(table.update().where(key_clause).values(values))
+            if result.rowcount == 0:
+                db.session.execute(table.insert().values(row))
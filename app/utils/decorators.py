@@ -37,3 +37,17 @@ def admin_required(f):
         
         return f(*args, **kwargs)
     return decorated_function
+
+def enrollment_required(f):
+    """Decorator untuk route dengan course_id: user harus terdaftar di kursus"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from app.services.access_service import AccessService
+
+        course_id = kwargs.get('course_id')
+        if not AccessService.resolve_current(course_id).enrolled:
+            flash('Anda belum mendaftar kursus ini', 'danger')
+            return redirect(url_for('courses.detail', course_id=course_id))
+        
+        return f(*args, **kwargs)
+    return decorated_function
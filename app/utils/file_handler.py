@@ -3,6 +3,7 @@ import hashlib
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from app.services.media_compression_service import MediaCompressionService
+from app.services.encode_planner import EncodePlanner
 
 class FileHandler:
     """Handle file uploads dan compression"""
@@ -40,13 +41,14 @@ class FileHandler:
             original_path = os.path.join(upload_folder, filename)
             file.save(original_path)
             
-            # Get video metadata
+            # Get video metadata (satu kali ffprobe, dipakai ulang untuk rencana kompresi)
             metadata = MediaCompressionService.get_video_metadata(original_path)
             
             # Compress video
             compress_result = MediaCompressionService.compress_video(
                 original_path, 
-                compressed_folder
+                compressed_folder,
+                source=EncodePlanner.source_from_metadata(metadata)
             )
             
             if not compress_result['success']:
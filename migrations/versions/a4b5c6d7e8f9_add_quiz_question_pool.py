@@ -0,0 +1,40 @@
+"""Add quiz question pool settings and per-attempt selection
+
+Revision ID: a4b5c6d7e8f9
+Revises: f3a4b5c6d7e8
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4b5c6d7e8f9'
+down_revision = 'f3a4b5c6d7e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('quiz_pool_size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('quiz_shuffle_options', sa.Boolean(), nullable=True))
+
+    with op.batch_alter_table('quiz_attempt', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('started_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('question_ids', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('option_order', sa.JSON(), nullable=True))
+        batch_op.create_index('idx_attempt_user_lesson', ['user_id', 'lesson_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_attempt', schema=None) as batch_op:
+        batch_op.drop_index('idx_attempt_user_lesson')
+        batch_op.drop_column('option_order')
+        batch_op.drop_column('question_ids')
+        batch_op.drop_column('started_at')
+
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.drop_column('quiz_shuffle_options')
+        batch_op.drop_column('quiz_pool_size')
@@ -0,0 +1,41 @@
+"""Add course_progress_summary table
+
+Revision ID: d1e2f3a4b5c6
+Revises: c931626b8cec
+Create Date: 2026-10-17 09:00:00.000000
+
+Setelah upgrade jalankan backfill: flask progress-summary rebuild
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1e2f3a4b5c6'
+down_revision = 'c931626b8cec'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('course_progress_summary',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('completed_lessons', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_lessons', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('percent', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_activity', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['course_id'], ['course.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'course_id')
+    )
+    with op.batch_alter_table('course_progress_summary', schema=None) as batch_op:
+        batch_op.create_index('idx_summary_course_id', ['course_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('course_progress_summary', schema=None) as batch_op:
+        batch_op.drop_index('idx_summary_course_id')
+
+    op.drop_table('course_progress_summary')
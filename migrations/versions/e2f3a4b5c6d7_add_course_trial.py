@@ -0,0 +1,93 @@
+"""Add course_trial table and move trial data from lesson_progress
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f3a4b5c6d7'
+down_revision = 'd1e2f3a4b5c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    course_trial = op.create_table('course_trial',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='active'),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('cancelled_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['course_id'], ['course.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'course_id')
+    )
+    with op.batch_alter_table('course_trial', schema=None) as batch_op:
+        batch_op.create_index('idx_trial_course_id', ['course_id'])
+        batch_op.create_index('idx_trial_status_expires', ['status', 'expires_at'])
+
+    # Pindahkan trial dari lesson_progress: satu baris per (user, course)
+    lesson_progress = sa.table('lesson_progress',
+        sa.column('user_id', sa.Integer), sa.column('lesson_id', sa.Integer),
+        sa.column('trial_started_at', sa.DateTime), sa.column('trial_expires_at', sa.DateTime),
+        sa.column('trial_cancelled', sa.Boolean)
+    )
+    lesson = sa.table('lesson', sa.column('id', sa.Integer), sa.column('topic_id', sa.Integer))
+    topic = sa.table('topic', sa.column('id', sa.Integer), sa.column('course_id', sa.Integer))
+
+    rows = op.get_bind().execute(
+        sa.select(
+            lesson_progress.c.user_id, topic.c.course_id, lesson_progress.c.trial_started_at,
+            lesson_progress.c.trial_expires_at, lesson_progress.c.trial_cancelled
+        ).select_from(
+            lesson_progress.join(lesson, lesson.c.id == lesson_progress.c.lesson_id)
+            .join(topic, topic.c.id == lesson.c.topic_id)
+        ).where(
+            lesson_progress.c.trial_started_at.isnot(None),
+            lesson_progress.c.trial_expires_at.isnot(None)
+        )
+    ).fetchall()
+
+    now = datetime.utcnow()
+    trials = {}
+    for user_id, course_id, started_at, expires_at, cancelled in rows:
+        trial = trials.get((user_id, course_id))
+        if trial is None:
+            trial = trials[(user_id, course_id)] = {
+                'user_id': user_id,
+                'course_id': course_id,
+                'started_at': started_at,
+                'expires_at': expires_at,
+                'cancelled': False
+            }
+        trial['started_at'] = min(trial['started_at'], started_at)
+        trial['expires_at'] = max(trial['expires_at'], expires_at)
+        trial['cancelled'] = trial['cancelled'] or bool(cancelled)
+
+    data = []
+    for trial in trials.values():
+        if trial.pop('cancelled'):
+            trial['status'], trial['cancelled_at'] = 'cancelled', now
+        elif trial['expires_at'] <= now:
+            trial['status'], trial['cancelled_at'] = 'expired', None
+        else:
+            trial['status'], trial['cancelled_at'] = 'active', None
+        data.append(trial)
+
+    if data:
+        op.bulk_insert(course_trial, data)
+
+
+def downgrade():
+    with op.batch_alter_table('course_trial', schema=None) as batch_op:
+        batch_op.drop_index('idx_trial_status_expires')
+        batch_op.drop_index('idx_trial_course_id')
+
+    op.drop_table('course_trial')
@@ -0,0 +1,62 @@
+"""Add quiz_answer and quiz_item_statistic tables
+
+Revision ID: f3a4b5c6d7e8
+Revises: e2f3a4b5c6d7
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a4b5c6d7e8'
+down_revision = 'e2f3a4b5c6d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('quiz_answer',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('attempt_id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('option_id', sa.Integer(), nullable=True),
+        sa.Column('correct', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['attempt_id'], ['quiz_attempt.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['question_id'], ['quiz_question.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['option_id'], ['quiz_option.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('quiz_answer', schema=None) as batch_op:
+        batch_op.create_index('idx_answer_attempt_id', ['attempt_id'])
+        batch_op.create_index('idx_answer_question_option', ['question_id', 'option_id'])
+
+    op.create_table('quiz_item_statistic',
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('lesson_id', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('correct_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score_sq_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('correct_score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['question_id'], ['quiz_question.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['lesson_id'], ['lesson.id'], ),
+        sa.PrimaryKeyConstraint('question_id')
+    )
+    with op.batch_alter_table('quiz_item_statistic', schema=None) as batch_op:
+        batch_op.create_index('idx_item_stat_lesson_id', ['lesson_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_item_statistic', schema=None) as batch_op:
+        batch_op.drop_index('idx_item_stat_lesson_id')
+
+    op.drop_table('quiz_item_statistic')
+
+    with op.batch_alter_table('quiz_answer', schema=None) as batch_op:
+        batch_op.drop_index('idx_answer_question_option')
+        batch_op.drop_index('idx_answer_attempt_id')
+
+    op.drop_table('quiz_answer')
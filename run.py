@@ -23,4 +23,10 @@ def make_shell_context():
     }
 
 if __name__ == '__main__':
+    # Server development satu proses: dispatcher antrian video ikut berjalan di sini
+    # (set MEDIA_JOB_WORKER_ENABLED=0 untuk memakai `flask media-jobs work` terpisah)
+    if not app.config['MEDIA_JOB_WORKER_ENABLED'] and os.environ.get('MEDIA_JOB_WORKER_ENABLED') != '0':
+        from app.services.media_jobs import media_job_runner
+        app.config['MEDIA_JOB_WORKER_ENABLED'] = True
+        media_job_runner.init_app(app)
     app.run(debug=True, host='0.0.0.0', port=5001)